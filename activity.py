@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import streamlit as st
+
+import cache
+import calendar_view
+import db
+
+# ---------------------------
+# 일별 활동 집계
+# ---------------------------
+# activity_daily 에 (날짜, 원본 테이블, 학생) 별 작성 수를 쌓는다. 원본 테이블마다
+# activity_watermarks.last_id 이후의 id 만 읽어 더하므로 한 번의 갱신 비용은 새 행 수에 비례하고,
+# 통계 탭은 원본 테이블 대신 집계만 읽는다.
+# id 는 커밋 순서와 다르게 보일 수 있어서(먼저 받은 id 가 늦게 커밋), 갱신 때 본 최대 id 를
+# horizon 으로 적어 두고 SETTLE 초가 지난 다음 갱신에서야 그 id 까지 집계한다.
+# 날짜는 집계할 때의 timezone 시크릿 기준이다. 원본 행을 지우거나 보관해도 집계는 줄지 않는다.
+
+log = logging.getLogger(__name__)
+
+# 원본 테이블: (작성자 컬럼, 표시 이름)
+SOURCES = {
+    "chat_messages": ("username", "채팅"),
+    "homeworks": ("posted_by", "과제"),
+    "essays": ("uploaded_by", "에세이"),
+    "newbery_books": ("rated_by", "평점"),
+    "materials": ("uploaded_by", "자료"),
+    "debate_articles": ("shared_by", "기사"),
+    "tools": ("added_by", "도구"),
+    "current_book": ("posted_by", "도서"),
+}
+INTERVAL = 300
+SETTLE = 60
+BATCH = 50000
+LOCK_KEY = 0x41637469  # "Acti"
+
+
+def _step(conn, source, tz):
+    # 한 트랜잭션에서 최대 BATCH 개의 id 를 집계한다. (집계한 행 수, 다 따라잡았는지)
+    author = SOURCES[source][0]
+    with db.transaction(conn) as cur:
+        cur.execute("INSERT INTO activity_watermarks (source) VALUES (%s) ON CONFLICT DO NOTHING", (source,))
+        cur.execute("""
+            SELECT last_id, horizon, horizon_at < now() - make_interval(secs => %s)
+            FROM activity_watermarks WHERE source = %s FOR UPDATE
+        """, (SETTLE, source))
+        last, horizon, settled = cur.fetchone()
+        done = 0
+        if settled and horizon > last:
+            upto = min(horizon, last + BATCH)
+            # 시각이 없는 옛 행은 날짜를 알 수 없어 세지 않는다
+            cur.execute(f"""
+                WITH g AS (
+                    SELECT (timestamp AT TIME ZONE %s)::date AS day, coalesce({author}, '') AS username,
+                           count(*) AS n
+                    FROM {source} WHERE id > %s AND id <= %s AND timestamp IS NOT NULL
+                    GROUP BY 1, 2
+                ), up AS (
+                    INSERT INTO activity_daily AS a (day, source, username, n)
+                    SELECT day, %s, username, n FROM g
+                    ON CONFLICT (day, source, username) DO UPDATE SET n = a.n + EXCLUDED.n
+                )
+                SELECT coalesce(sum(n), 0)::bigint FROM g
+            """, (tz, last, upto, source))
+            done, last = cur.fetchone()[0], upto
+        caught_up = not settled or last >= horizon
+        if settled and last >= horizon:
+            # 따라잡았으면 지금 보이는 최대 id 를 다음 기준점으로
+            cur.execute(f"SELECT coalesce(max(id), 0) FROM {source}")
+            cur.execute("""
+                UPDATE activity_watermarks SET last_id = %s, horizon = greatest(%s, %s), horizon_at = now(),
+                       refreshed_at = now()
+                WHERE source = %s
+            """, (last, cur.fetchone()[0], last, source))
+        else:
+            cur.execute("UPDATE activity_watermarks SET last_id = %s, refreshed_at = now() WHERE source = %s",
+                        (last, source))
+    return done, caught_up
+
+
+def refresh(conn, tz):
+    # 모든 원본 테이블을 따라잡고 {원본: 집계한 행 수} 를 돌려준다.
+    # 여러 프로세스가 동시에 돌지 않도록 advisory lock 을 잡지 못하면 건너뛴다
+    result = {}
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (LOCK_KEY,))
+        if not cur.fetchone()[0]:
+            return result
+        try:
+            for source in SOURCES:
+                total, caught_up = 0, False
+                while not caught_up:
+                    done, caught_up = _step(conn, source, tz)
+                    total += done
+                result[source] = total
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+    if any(result.values()):
+        cache.invalidate("activity_daily")
+    return result
+
+
+class Refresher:
+    def __init__(self, tz, interval):
+        self._tz = tz
+        self._interval = interval
+        self.last_run = None
+        self.last_result = {}
+        self._thread = threading.Thread(target=self._run, name="activity-rollup", daemon=True)
+        self._thread.start()
+
+    def run_once(self):
+        with db.connection() as conn:
+            result = refresh(conn, self._tz)
+        self.last_run = datetime.now(timezone.utc)
+        self.last_result = result
+        return result
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("activity rollup failed")
+            time.sleep(self._interval)
+
+
+@st.cache_resource
+def get_refresher():
+    if db.backend() == "sqlite":
+        return None
+    return Refresher(st.secrets.get("timezone", calendar_view.TIMEZONE),
+                     float(st.secrets.get("activity_interval", INTERVAL)))
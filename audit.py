@@ -0,0 +1,141 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from psycopg2.extras import execute_values
+import streamlit as st
+
+import db
+
+# ---------------------------
+# 활동/시스템 로그 비동기 기록
+# ---------------------------
+# 요청 경로에서는 메모리 큐에 넣기만 하고, 백그라운드 스레드가 모아서
+# execute_values 한 번으로 user_logs / system_logs 에 쓴다.
+# 큐가 가득 차면 버리고(dropped) DB 오류가 나면 물러섰다가 다시 시도한다.
+
+log = logging.getLogger(__name__)
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 2.0
+MAX_RETRIES = 5
+
+_STOP = object()
+_SQL = {
+    "user_logs": "INSERT INTO user_logs (username, action, timestamp) VALUES %s",
+    "system_logs": "INSERT INTO system_logs (level, message, timestamp) VALUES %s",
+}
+
+
+class LogWriter:
+    def __init__(self, queue_size, batch_size, interval):
+        self._q = queue.Queue(queue_size)
+        self._batch_size = batch_size
+        self._interval = interval
+        self._lock = threading.Lock()
+        self.counters = {"enqueued": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def put(self, table, row):
+        try:
+            self._q.put_nowait((table, row))
+            self._count("enqueued")
+        except queue.Full:
+            self._count("dropped")
+
+    def _collect(self):
+        # 첫 항목을 기다린 뒤 BATCH_SIZE 나 FLUSH_INTERVAL 중 먼저 닿을 때까지 모은다
+        item = self._q.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self._interval
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _flush(self, batch):
+        by_table = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+        for attempt in range(MAX_RETRIES):
+            try:
+                with db.connection() as conn, db.transaction(conn) as cur:
+                    for table, rows in by_table.items():
+                        if db.dialect(cur) == "sqlite":
+                            # execute_values 는 psycopg2 커서에서만 된다
+                            cur.executemany(_SQL[table] % "(%s, %s, %s)", rows)
+                        else:
+                            execute_values(cur, _SQL[table], rows, page_size=self._batch_size)
+                self._count("written", len(batch))
+                self._count("batches")
+                return
+            except db.ERRORS:
+                self._count("errors")
+                log.exception("audit flush failed (attempt %s)", attempt + 1)
+                time.sleep(min(2 ** attempt, 30))
+        self._count("dropped", len(batch))
+
+    def _run(self):
+        while True:
+            batch, stop = self._collect()
+            if batch:
+                self._flush(batch)
+            if stop:
+                return
+
+    def close(self, timeout=5.0):
+        if self._thread.is_alive():
+            try:
+                self._q.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, queued=self._q.qsize())
+
+
+@st.cache_resource
+def get_writer():
+    return LogWriter(
+        int(st.secrets.get("log_queue_size", QUEUE_SIZE)),
+        int(st.secrets.get("log_batch_size", BATCH_SIZE)),
+        float(st.secrets.get("log_flush_interval", FLUSH_INTERVAL)),
+    )
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def user_event(username, action):
+    get_writer().put("user_logs", (username, action, _now()))
+
+
+def system_event(level, message):
+    get_writer().put("system_logs", (level, message, _now()))
+
+
+def stats():
+    return get_writer().stats()
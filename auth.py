@@ -0,0 +1,193 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+import db
+import notify
+import repository
+
+# ---------------------------
+# 로그인/회원가입
+# ---------------------------
+# 로그인은 강제탈퇴 사유와 계정을 한 문장으로 읽는다 (사용자당 DB 왕복 한 번).
+# 강제탈퇴된 아이디는 프로세스마다 dict 로 들고 있어서 DB 에 가지 않고 거절한다.
+# 강제탈퇴 문장이 NOTIFY 를 보내면 수신기의 시퀀스가 바뀐 뒤 처음 보는 로그인이 다시 읽고,
+# 알림을 놓쳐도 TTL 이 지나면 다시 읽는다.
+# 비밀번호는 "pbkdf2_sha256$반복$salt$hash" 로 저장한다. 해시는 크기가 정해진 스레드 풀에서
+# 계산하므로 수업 시작 때 로그인이 몰려도 CPU 를 WORKERS 개 이상 쓰지 않는다.
+# 예전 평문 비밀번호는 처음 로그인할 때 해시로 바꾼다 (그때만 한 번 더 쓴다).
+
+CHANNEL = "kicked_users"
+TTL = 300.0
+SCHEME = "pbkdf2_sha256"
+ITERATIONS = 100_000
+MAX_ITERATIONS = 600_000
+WORKERS = 2
+SAMPLES = 500
+MASTER_PASSWORD = "sqrtof4"  # 특수 PW: 등록된 아이디를 제작자로 로그인
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="auth")
+_lock = threading.Lock()
+_latency = deque(maxlen=SAMPLES)
+_hashing = deque(maxlen=SAMPLES)
+_counters = {"success": 0, "failed": 0, "kicked": 0, "kicked_cached": 0, "signup": 0, "signup_taken": 0,
+             "rehashed": 0}
+
+
+# ---------------------------
+# 비밀번호 해시
+# ---------------------------
+
+def _iterations():
+    return min(int(st.secrets.get("password_iterations", ITERATIONS)), MAX_ITERATIONS)
+
+
+def hash_password(password, iterations):
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join([SCHEME, str(iterations), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def verify_password(stored, password, iterations):
+    # (맞는지, 다시 해시해야 하는지)
+    if not stored:
+        return False, False
+    scheme, _, rest = stored.partition("$")
+    if scheme != SCHEME:
+        # 해시 도입 전 평문
+        ok = hmac.compare_digest(stored.encode(), password.encode())
+        return ok, ok
+    rounds, salt, digest = rest.split("$")
+    if int(rounds) > MAX_ITERATIONS:
+        # 잘못 저장된 값 하나가 워커를 오래 붙잡지 못하게 한다
+        return False, False
+    actual = hashlib.pbkdf2_hmac("sha256", password.encode(), base64.b64decode(salt), int(rounds))
+    ok = hmac.compare_digest(actual, base64.b64decode(digest))
+    return ok, ok and int(rounds) != iterations
+
+
+def _off_thread(fn, *args):
+    # 해시 계산은 스크립트 스레드 대신 공용 풀에서. 걸린 시간도 기록한다
+    t0 = time.perf_counter()
+    result = _executor.submit(fn, *args).result()
+    with _lock:
+        _hashing.append(time.perf_counter() - t0)
+    return result
+
+
+# ---------------------------
+# 강제탈퇴 목록
+# ---------------------------
+
+class Kicked:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = None
+        self._loaded = 0.0
+        self.reasons = {}
+
+    def _stale(self, seq, ttl):
+        return seq != self._seq or time.monotonic() - self._loaded > ttl
+
+    def get(self, ttl):
+        seq = notify.subscribe(CHANNEL).seq(CHANNEL)
+        if self._stale(seq, ttl):
+            with self._lock:
+                if self._stale(seq, ttl):
+                    with db.connection() as conn, conn.cursor() as cur:
+                        self.reasons = repository.KickedUsers(cur).all()
+                    self._seq = seq
+                    self._loaded = time.monotonic()
+        return self.reasons
+
+    def expire(self):
+        self._seq = None
+
+
+@st.cache_resource
+def get_kicked():
+    return Kicked()
+
+
+def kicked():
+    # {아이디: 사유}
+    return get_kicked().get(float(st.secrets.get("kicked_ttl", TTL)))
+
+
+def kick(cur, usernames, reason):
+    # 관리 화면의 트랜잭션 안에서 부른다. 커밋되면 모든 프로세스가 알림을 받는다
+    repository.KickedUsers(cur).add_many(usernames, reason, CHANNEL)
+    get_kicked().expire()
+
+
+# ---------------------------
+# 로그인/회원가입
+# ---------------------------
+
+def _count(name, t0=None):
+    with _lock:
+        _counters[name] += 1
+        if t0 is not None:
+            _latency.append(time.perf_counter() - t0)
+
+
+def master(password):
+    return password == st.secrets.get("master_password", MASTER_PASSWORD)
+
+
+def login(repo, username, password):
+    # (User, None) 성공, (None, 사유) 강제탈퇴, (None, None) 실패
+    t0 = time.perf_counter()
+    reason = kicked().get(username)
+    if reason is not None:
+        _count("kicked_cached", t0)
+        return None, reason
+    role, stored, reason = repo.users.credentials(username)
+    if reason is not None:
+        _count("kicked", t0)
+        return None, reason
+    if role is None:
+        _count("failed", t0)
+        return None, None
+    if master(password):
+        _count("success", t0)
+        return repository.User(username, "제작자"), None
+    iterations = _iterations()
+    ok, rehash = _off_thread(verify_password, stored, password, iterations)
+    if not ok:
+        _count("failed", t0)
+        return None, None
+    if rehash:
+        repo.users.set_password(username, _off_thread(hash_password, password, iterations))
+        _count("rehashed")
+    _count("success", t0)
+    return repository.User(username, role), None
+
+
+def signup(repo, username, password):
+    # 새로 만들었으면 True, 이미 있는 아이디면 False
+    created = repo.users.create(username, _off_thread(hash_password, password, _iterations()))
+    _count("signup" if created else "signup_taken")
+    return created
+
+
+def _ms(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(1000 * values[min(len(values) - 1, int(p * len(values)))], 1)
+
+
+def stats():
+    with _lock:
+        return dict(_counters,
+                    login_p50_ms=_ms(_latency, 0.5), login_p95_ms=_ms(_latency, 0.95),
+                    hash_p50_ms=_ms(_hashing, 0.5), hash_p95_ms=_ms(_hashing, 0.95),
+                    kicked_known=len(get_kicked().reasons))
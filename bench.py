@@ -0,0 +1,529 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import psycopg2
+import streamlit as st
+from streamlit.runtime.secrets import Secrets
+from streamlit.testing.v1 import AppTest
+
+import audit
+import db
+import migrations
+import timing
+import views
+
+# ---------------------------
+# 부하/성능 측정 (AppTest 로 app.py 를 headless 실행)
+# ---------------------------
+# 테이블을 지정한 크기로 채운 뒤 N 개 세션(각각 별도 프로세스)이 동시에 메뉴를 돌며 재실행 지연을,
+# 한 세션으로 페이지별 쿼리 수를, 두 세션으로 채팅 전송→표시 지연을 잰다.
+# 결과는 JSON 으로 남겨 변경 전후를 비교한다.
+#   python -m bench --sessions 30 --out bench.json                 (임시 클러스터, root 가 아닌 계정)
+#   python -m bench --host /tmp/pg --dbname bench --rows chat_messages=50000
+#   python -m bench --backend sqlite --sessions 4                  (외부 DB 없이, sqlite_backend)
+# 지정한 DB 의 콘텐츠 테이블은 비우고 다시 채운다. 운영 DB 에 쓰지 말 것.
+# sqlite 는 프로세스마다 메모리 DB 를 따로 채우므로 세션끼리 DB 를 나눠 쓰지 않는다
+# (앱 쪽 비용 비교용이고 동시 접속 시 DB 경합은 재지 않는다).
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+DEFAULT_ROWS = {
+    "users": 200,
+    "homeworks": 2000,
+    "tools": 200,
+    "word_of_day": 1000,
+    "schedule": 1000,
+    "materials": 1000,
+    "essays": 1000,
+    "newbery_books": 5000,
+    "debate_articles": 1000,
+    "chat_messages": 20000,
+    "announcements": 100,
+    "user_logs": 20000,
+    "system_logs": 5000,
+}
+
+# 테이블별 채우기 문장. %(n)s 는 행 수 (나머지 연산자는 %%)
+SEED = {
+    "users": """
+        INSERT INTO users (username, password, role)
+        SELECT 'bench' || i, 'pw', CASE WHEN i %% 20 = 0 THEN '선생님' ELSE '학생' END
+        FROM generate_series(1, %(n)s) i
+    """,
+    "homeworks": """
+        INSERT INTO homeworks (title, description, due_date, posted_by, timestamp)
+        SELECT 'homework ' || i, 'read chapter ' || i %% 30 || ' and summarize', current_date + i %% 60,
+               'bench' || i %% 200, now() - i * interval '1 minute'
+        FROM generate_series(1, %(n)s) i
+    """,
+    "tools": """
+        INSERT INTO tools (name, url, description, added_by, timestamp)
+        SELECT 'tool ' || i, 'https://example.com/' || i, 'useful tool ' || i, 'bench1',
+               now() - i * interval '1 hour'
+        FROM generate_series(1, %(n)s) i
+    """,
+    "word_of_day": """
+        INSERT INTO word_of_day (word, definition, date)
+        SELECT 'word' || i, 'meaning of word' || i, current_date - i
+        FROM generate_series(0, %(n)s - 1) i
+    """,
+    "schedule": """
+        INSERT INTO schedule (class_date, content)
+        SELECT current_date - %(n)s / 2 + i, 'class ' || i
+        FROM generate_series(1, %(n)s) i
+    """,
+    "materials": """
+        INSERT INTO materials (title, description, file_url, file_name, uploaded_by, timestamp)
+        SELECT 'material ' || i, 'worksheet ' || i, '', NULL, 'bench' || i %% 200, now() - i * interval '1 hour'
+        FROM generate_series(1, %(n)s) i
+    """,
+    "essays": """
+        INSERT INTO essays (title, file_path, file_name, uploaded_by, timestamp)
+        SELECT 'essay ' || i, '', NULL, 'bench' || i %% 200, now() - i * interval '1 hour'
+        FROM generate_series(1, %(n)s) i
+    """,
+    "newbery_books": """
+        WITH ins AS (
+            INSERT INTO newbery_books (title, rating, rated_by, timestamp)
+            SELECT 'book ' || i %% 150, 1 + i %% 5, 'bench' || i %% 200, now() - i * interval '1 minute'
+            FROM generate_series(1, %(n)s) i
+            RETURNING title, rating
+        )
+        INSERT INTO newbery_ratings (title, rating_count, rating_sum, r1, r2, r3, r4, r5)
+        SELECT title, count(*), sum(rating),
+               count(*) FILTER (WHERE rating = 1), count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3), count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5)
+        FROM ins GROUP BY title
+    """,
+    "debate_articles": """
+        INSERT INTO debate_articles (url, description, shared_by, timestamp)
+        SELECT 'https://news.example.com/' || i, 'debate article ' || i, 'bench' || i %% 200,
+               now() - i * interval '1 hour'
+        FROM generate_series(1, %(n)s) i
+    """,
+    "chat_messages": """
+        INSERT INTO chat_messages (username, message, timestamp)
+        SELECT 'bench' || i %% 200, 'message ' || i, now() - (%(n)s - i) * interval '1 second'
+        FROM generate_series(1, %(n)s) i
+    """,
+    "announcements": """
+        INSERT INTO announcements (content, posted_by, timestamp)
+        SELECT 'announcement ' || i, 'bench1', now() - i * interval '1 day'
+        FROM generate_series(1, %(n)s) i
+    """,
+    "user_logs": """
+        INSERT INTO user_logs (username, action, timestamp)
+        SELECT 'bench' || i %% 200, '로그인', now() - i * interval '1 minute'
+        FROM generate_series(1, %(n)s) i
+    """,
+    "system_logs": """
+        INSERT INTO system_logs (level, message, timestamp)
+        SELECT 'INFO', 'event ' || i, now() - i * interval '1 minute'
+        FROM generate_series(1, %(n)s) i
+    """,
+}
+
+# SQLite 용 (generate_series/interval 이 없다). 시각은 sqlite_backend 가 저장하는 모양으로 맞춘다
+_SERIES = "WITH RECURSIVE s(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM s WHERE i < %(n)s) "
+
+
+def _ago(amount, unit):
+    return f"datetime('now', -({amount}) || ' {unit}') || '.000000'"
+
+
+SQLITE_SEED = {
+    "users": _SERIES + """
+        INSERT INTO users (username, password, role)
+        SELECT 'bench' || i, 'pw', CASE WHEN i %% 20 = 0 THEN '선생님' ELSE '학생' END FROM s
+    """,
+    "homeworks": _SERIES + f"""
+        INSERT INTO homeworks (title, description, due_date, posted_by, timestamp)
+        SELECT 'homework ' || i, 'read chapter ' || (i %% 30) || ' and summarize', date('now', (i %% 60) || ' days'),
+               'bench' || (i %% 200), {_ago("i", "minutes")}
+        FROM s
+    """,
+    "tools": _SERIES + f"""
+        INSERT INTO tools (name, url, description, added_by, timestamp)
+        SELECT 'tool ' || i, 'https://example.com/' || i, 'useful tool ' || i, 'bench1', {_ago("i", "hours")}
+        FROM s
+    """,
+    "word_of_day": _SERIES + """
+        INSERT INTO word_of_day (word, definition, date)
+        SELECT 'word' || (i - 1), 'meaning of word' || (i - 1), date('now', -(i - 1) || ' days') FROM s
+    """,
+    "schedule": _SERIES + """
+        INSERT INTO schedule (class_date, content)
+        SELECT date('now', (i - %(n)s / 2) || ' days'), 'class ' || i FROM s
+    """,
+    "materials": _SERIES + f"""
+        INSERT INTO materials (title, description, file_url, file_name, uploaded_by, timestamp)
+        SELECT 'material ' || i, 'worksheet ' || i, '', NULL, 'bench' || (i %% 200), {_ago("i", "hours")}
+        FROM s
+    """,
+    "essays": _SERIES + f"""
+        INSERT INTO essays (title, file_path, file_name, uploaded_by, timestamp)
+        SELECT 'essay ' || i, '', NULL, 'bench' || (i %% 200), {_ago("i", "hours")}
+        FROM s
+    """,
+    # 평점 집계는 seed_embedded 에서 따로 채운다
+    "newbery_books": _SERIES + f"""
+        INSERT INTO newbery_books (title, rating, rated_by, timestamp)
+        SELECT 'book ' || (i %% 150), 1 + i %% 5, 'bench' || (i %% 200), {_ago("i", "minutes")}
+        FROM s
+    """,
+    "debate_articles": _SERIES + f"""
+        INSERT INTO debate_articles (url, description, shared_by, timestamp)
+        SELECT 'https://news.example.com/' || i, 'debate article ' || i, 'bench' || (i %% 200),
+               {_ago("i", "hours")}
+        FROM s
+    """,
+    "chat_messages": _SERIES + f"""
+        INSERT INTO chat_messages (username, message, timestamp)
+        SELECT 'bench' || (i %% 200), 'message ' || i, {_ago("%(n)s - i", "seconds")}
+        FROM s
+    """,
+    "announcements": _SERIES + f"""
+        INSERT INTO announcements (content, posted_by, timestamp)
+        SELECT 'announcement ' || i, 'bench1', {_ago("i", "days")}
+        FROM s
+    """,
+    "user_logs": _SERIES + f"""
+        INSERT INTO user_logs (username, action, timestamp)
+        SELECT 'bench' || (i %% 200), '로그인', {_ago("i", "minutes")}
+        FROM s
+    """,
+    "system_logs": _SERIES + f"""
+        INSERT INTO system_logs (level, message, timestamp)
+        SELECT 'INFO', 'event ' || i, {_ago("i", "minutes")}
+        FROM s
+    """,
+}
+
+
+# ---------------------------
+# 임시 클러스터
+# ---------------------------
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pg_tool(bindir, name):
+    path = os.path.join(bindir, name) if bindir else shutil.which(name)
+    if not path or not os.path.exists(path):
+        raise SystemExit(f"{name} 을 찾을 수 없습니다. --pg-bin 으로 PostgreSQL bin 경로를 주거나 --host 를 쓰세요.")
+    return path
+
+
+@contextmanager
+def throwaway_cluster(bindir=None):
+    # initdb 는 root 로 실행할 수 없다
+    workdir = tempfile.mkdtemp(prefix="honority-bench-")
+    data = os.path.join(workdir, "data")
+    port = _free_port()
+    subprocess.run([_pg_tool(bindir, "initdb"), "-D", data, "-U", "postgres", "-A", "trust", "--no-sync"],
+                   check=True, stdout=subprocess.DEVNULL)
+    pg_ctl = _pg_tool(bindir, "pg_ctl")
+    subprocess.run([pg_ctl, "-D", data, "-w", "-l", os.path.join(workdir, "server.log"),
+                    "-o", f"-p {port} -k {workdir} -c listen_addresses='' -c fsync=off "
+                          f"-c max_connections=200", "start"],
+                   check=True, stdout=subprocess.DEVNULL)
+    try:
+        yield dict(user="postgres", password="", host=workdir, port=port, dbname="postgres")
+    finally:
+        subprocess.run([pg_ctl, "-D", data, "-m", "fast", "stop"], stdout=subprocess.DEVNULL)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------------------------
+# 데이터 채우기
+# ---------------------------
+
+_CURRENT_BOOK = """
+    INSERT INTO current_book (book_title, week_of, debate_topic, posted_by, timestamp)
+    VALUES ('Holes', current_date, 'Is fate real?', 'bench1', now())
+"""
+
+
+def seed(params, rows):
+    conn = psycopg2.connect(**params)
+    try:
+        migrations.migrate(conn)
+        conn.autocommit = True
+        t0 = time.perf_counter()
+        with db.transaction(conn) as cur:
+            cur.execute("TRUNCATE {}, newbery_ratings, current_book, kicked_users, user_sessions, essay_jobs, activity_daily, activity_watermarks RESTART IDENTITY".format(
+                ", ".join(SEED)))
+            for table, n in rows.items():
+                cur.execute(SEED[table], {"n": n})
+            cur.execute(_CURRENT_BOOK)
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+        return round(time.perf_counter() - t0, 2)
+    finally:
+        conn.close()
+
+
+def seed_embedded(rows):
+    # SQLite 백엔드: 이 프로세스의 메모리 DB 를 채운다 (처음 만든 빈 DB 라 비우지 않는다)
+    t0 = time.perf_counter()
+    with db.connection() as conn, db.transaction(conn) as cur:
+        for table, n in rows.items():
+            cur.execute(SQLITE_SEED[table], {"n": n})
+        cur.execute("""
+            INSERT INTO newbery_ratings (title, rating_count, rating_sum, r1, r2, r3, r4, r5)
+            SELECT title, count(*), sum(rating),
+                   count(*) FILTER (WHERE rating = 1), count(*) FILTER (WHERE rating = 2),
+                   count(*) FILTER (WHERE rating = 3), count(*) FILTER (WHERE rating = 4),
+                   count(*) FILTER (WHERE rating = 5)
+            FROM newbery_books GROUP BY title
+        """)
+        cur.execute(_CURRENT_BOOK)
+    with db.connection() as conn, conn.cursor() as cur:
+        cur.execute("ANALYZE")
+    return round(time.perf_counter() - t0, 2)
+
+
+def prepare(secrets, rows):
+    # 이 프로세스가 쓸 DB 를 준비한다. Postgres 는 한 번, SQLite 는 프로세스마다
+    use_secrets(secrets)
+    if db.backend() == "sqlite":
+        return seed_embedded(rows)
+    return None
+
+
+# ---------------------------
+# 세션 실행
+# ---------------------------
+
+def use_secrets(secrets):
+    # AppTest.secrets 대신 전역 st.secrets 를 한 번 설정한다. 시드 단계와 앱, 채팅 측정의
+    # 두 세션이 같은 값을 본다.
+    shared = Secrets()
+    shared._secrets = dict(secrets)
+    st.secrets = shared
+
+
+def session(username="bench1", role="선생님", timeout=60):
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.session_state["logged_in"] = True
+    at.session_state["username"] = username
+    at.session_state["role"] = role
+    return at
+
+
+def _menu(at):
+    return next((r for r in at.sidebar.radio if r.label == "메뉴"), None)
+
+
+def _open(at, page):
+    # 직전 실행이 예외로 끝나 메뉴가 없으면 선택 없이 다시 실행한다
+    menu = _menu(at)
+    if menu is not None and menu.value != page:
+        menu.set_value(page)
+    t0 = time.perf_counter()
+    at.run()
+    return time.perf_counter() - t0
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"n": 0}
+    s = sorted(samples)
+    pick = lambda p: round(1000 * s[min(len(s) - 1, int(p * len(s)))], 1)
+    return {"n": len(s), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": round(1000 * s[-1], 1)}
+
+
+def query_counts(pages):
+    # 한 세션으로 페이지마다 두 번 연다. 첫 번째는 PREPARE/캐시가 빈 상태, 두 번째는 찬 상태
+    # (로그 기록기의 배치 INSERT 가 섞여 들어올 수 있다)
+    at = session()
+    t0 = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - t0
+    counts = {}
+    for page in pages:
+        runs = []
+        for _ in range(2):
+            before = db.query_count()
+            _open(at, page)
+            runs.append(db.query_count() - before)
+        counts[page] = {"queries_cold": runs[0], "queries": runs[1]}
+    return counts, round(1000 * first_run, 1)
+
+
+def _session_worker(secrets, rows, i, pages, reruns, barrier):
+    # AppTest 는 실행이 끝날 때 전역 Runtime 을 지워서 한 프로세스에서 동시에 돌릴 수 없다.
+    # 세션마다 프로세스를 따로 띄우고(각자 연결 풀/캐시를 가진다) 준비되면 한꺼번에 시작한다.
+    os.chdir(os.path.dirname(APP))
+    prepare(secrets, rows)
+    at = session(f"bench{i + 1}")
+    # 페이지 모듈 import 는 서버 프로세스에서 한 번뿐이므로 측정 전에 한 바퀴 돌아 둔다
+    at.run()
+    for page in pages:
+        _open(at, page)
+    barrier.wait()
+    results = []
+    for _ in range(reruns):
+        for page in pages:
+            seconds = _open(at, page)
+            error = at.exception[0].message if at.exception else None
+            results.append((page, seconds, error))
+    return results
+
+
+def load(secrets, rows, pages, sessions, reruns):
+    samples = {page: [] for page in pages}
+    errors = []
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=sessions, mp_context=ctx) as pool:
+        barrier = manager.Barrier(sessions + 1)
+        futures = [pool.submit(_session_worker, secrets, rows, i, pages, reruns, barrier) for i in range(sessions)]
+        barrier.wait()
+        t0 = time.perf_counter()
+        for f in futures:
+            for page, seconds, error in f.result():
+                if error:
+                    errors.append(f"{page}: {error}")
+                else:
+                    samples[page].append(seconds)
+        wall = time.perf_counter() - t0
+    return samples, errors, wall
+
+
+def chat_latency(samples, timeout=10.0):
+    # A 가 보낸 메시지가 B 의 채팅 피드에 보일 때까지 (A 의 전송 재실행이 끝난 시점부터)
+    page = "💬 채팅방"
+    sender, reader = session("bench1"), session("bench2")
+    for at in (sender, reader):
+        at.run()
+        _open(at, page)
+    results, missed = [], 0
+    for _ in range(samples):
+        text = f"bench-{uuid.uuid4().hex[:8]}"
+        next(t for t in sender.text_input if t.label == "메시지").set_value(text)
+        next(b for b in sender.button if b.label == "전송").click()
+        sender.run()
+        t0 = time.perf_counter()
+        while True:
+            reader.run()
+            if any(text in m.value for m in reader.markdown):
+                results.append(time.perf_counter() - t0)
+                break
+            if time.perf_counter() - t0 > timeout:
+                missed += 1
+                break
+            time.sleep(0.02)
+    return results, missed
+
+
+def run(secrets, args):
+    rows = dict(DEFAULT_ROWS, **args.rows)
+    seed_seconds = prepare(secrets, rows)
+    if seed_seconds is None:
+        seed_seconds = seed(db.connect_params(), rows)
+    pages = list(views.PAGES)
+
+    # 동시 부하를 먼저: AppTest 를 한 번 돌리면 __main__ 이 app.py 로 바뀌어 spawn 이 그것을 다시 실행한다
+    samples, errors, wall = load(secrets, rows, pages, args.sessions, args.reruns)
+    counts, first_run_ms = query_counts(pages)
+    chat, missed = chat_latency(args.chat_samples)
+    # 서버를 내리기 전에 쌓인 활동 로그를 비운다
+    audit.get_writer().close()
+
+    return {
+        "meta": {
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "backend": db.backend(),
+            "sessions": args.sessions,
+            "reruns": args.reruns,
+            "rows": rows,
+            "seed_seconds": seed_seconds,
+            "wall_seconds": round(wall, 2),
+        },
+        "pages": {page: dict(_percentiles(samples[page]), **counts[page]) for page in pages},
+        "chat_post_to_display": dict(_percentiles(chat), missed=missed),
+        # 벤치마크 프로세스는 앱 모듈을 이미 불러온 상태라 실제 cold start 보다 짧다
+        "startup": {"first_run_ms": first_run_ms, "page_import_ms": timing.stats()["page_import_ms"]},
+        "pool": db.pool_stats(),
+        "errors": errors[:50],
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(APP)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _rows(value):
+    table, _, n = value.partition("=")
+    if table not in SEED or not n.isdigit():
+        raise argparse.ArgumentTypeError(f"테이블=행수 형식이어야 합니다 ({', '.join(SEED)})")
+    return table, int(n)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    parser.add_argument("--sessions", type=int, default=20, help="동시 세션 수")
+    parser.add_argument("--reruns", type=int, default=3, help="세션마다 전체 메뉴를 도는 횟수")
+    parser.add_argument("--chat-samples", type=int, default=20)
+    parser.add_argument("--rows", type=_rows, action="append", default=[], metavar="TABLE=N")
+    parser.add_argument("--pool-max", type=int, default=20)
+    parser.add_argument("--backend", choices=db.BACKENDS, default="postgres",
+                        help="sqlite 면 외부 DB 없이 프로세스마다 메모리 DB 를 쓴다")
+    parser.add_argument("--host", help="기존 서버 (없으면 임시 클러스터를 띄운다)")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--dbname", default="postgres")
+    parser.add_argument("--pg-bin", help="initdb/pg_ctl 이 있는 디렉터리")
+    parser.add_argument("--out", help="결과 JSON 파일 (없으면 표준출력)")
+    args = parser.parse_args(argv)
+    args.rows = dict(args.rows)
+    # 앱은 저장소 루트에서 실행된다고 가정한다 (assets/, uploads/)
+    os.chdir(os.path.dirname(APP))
+
+    # 에세이 분석 작업자는 측정 중 CPU 를 나눠 쓰지 않도록 띄우지 않는다
+    base = {"pool_max": args.pool_max, "essay_worker": False, "session_secret": os.urandom(32).hex()}
+    if args.backend == "sqlite":
+        result = run(dict(base, db_backend="sqlite"), args)
+    elif args.host:
+        secrets = dict(base, user=args.user, password=args.password, host=args.host,
+                       port=args.port, dbname=args.dbname)
+        result = run(secrets, args)
+    else:
+        with throwaway_cluster(args.pg_bin) as conn_params:
+            result = run(dict(base, **conn_params), args)
+
+    text = json.dumps(result, ensure_ascii=False, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
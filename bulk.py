@@ -0,0 +1,216 @@
+import argparse
+import csv
+import importlib.util
+import io
+import tempfile
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+import db
+
+# ---------------------------
+# 수업 데이터 일괄 가져오기/내보내기 (COPY)
+# ---------------------------
+# CSV/Parquet 를 COPY FROM STDIN 으로 임시 스테이징 테이블에 흘려 넣고,
+# 한 트랜잭션 안에서 INSERT ... ON CONFLICT / NOT EXISTS 로 본 테이블에 합친다.
+# 파일 안에서 키가 같은 행이 여럿이면 마지막 행만 쓴다.
+#   python -m bulk import word_of_day words.csv
+#   python -m bulk export schedule schedule.parquet
+
+SPOOL = 8 * 1024 * 1024
+# Parquet 는 pyarrow 가 있어야 읽고 쓴다
+FORMATS = ["csv", "parquet"] if importlib.util.find_spec("pyarrow") else ["csv"]
+
+# 테이블별 컬럼, 헤더 별칭(화면 표시 이름), 중복 판정 방식
+TABLES = {
+    "word_of_day": {
+        "columns": ["date", "word", "definition"],
+        "aliases": {"날짜": "date", "단어": "word", "뜻": "definition"},
+        # date UNIQUE: 같은 날짜는 새 값으로 덮어쓴다
+        "merge": "ON CONFLICT (date) DO UPDATE SET word = EXCLUDED.word, definition = EXCLUDED.definition",
+        "key": ["date"],
+        "order": "date",
+    },
+    "schedule": {
+        "columns": ["class_date", "content"],
+        "aliases": {"일자": "class_date", "수업일": "class_date", "내용": "content"},
+        "key": ["class_date", "content"],
+        "order": "class_date, id",
+    },
+    "homeworks": {
+        "columns": ["title", "description", "due_date", "posted_by"],
+        "aliases": {"과제": "title", "과제명": "title", "설명": "description",
+                    "마감일": "due_date", "등록자": "posted_by"},
+        "key": ["title", "due_date"],
+        # 파일에 없는 컬럼의 값 (SQL 식)
+        "defaults": {"timestamp": "now()"},
+        "order": "id",
+    },
+}
+
+
+def _header(spec, names):
+    cols = []
+    for name in names:
+        name = name.strip()
+        col = spec["aliases"].get(name, name)
+        if col not in spec["columns"]:
+            raise ValueError(f"알 수 없는 컬럼: {name}")
+        cols.append(col)
+    return cols
+
+
+def _csv_source(fileobj):
+    # 업로드 파일(바이트)이면 텍스트로 감싸고, 첫 줄을 헤더로 읽는다
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    names = next(csv.reader([fileobj.readline()]))
+    return names, fileobj
+
+
+def _parquet_source(fileobj):
+    import pandas as pd  # Parquet 는 pyarrow 가 있어야 읽힌다
+    df = pd.read_parquet(fileobj)
+    out = tempfile.SpooledTemporaryFile(SPOOL, mode="w+", newline="")
+    df.to_csv(out, index=False, header=False)
+    out.seek(0)
+    return list(df.columns), out
+
+
+def _merge_sql(table, spec, cols):
+    target = sql.Identifier(table)
+    col_list = sql.SQL(", ").join(map(sql.Identifier, cols))
+    defaults = spec.get("defaults", {})
+    # 키가 같은 행은 파일에서 마지막 것 하나만 (ON CONFLICT DO UPDATE 는 한 행을 두 번 바꿀 수 없다)
+    keys = sql.SQL(", ").join(map(sql.Identifier, [k for k in spec["key"] if k in cols] or cols))
+    insert = sql.SQL(
+        "INSERT INTO {} ({}) SELECT {} FROM (SELECT DISTINCT ON ({}) * FROM bulk_stage ORDER BY {}, bulk_row DESC) s"
+    ).format(
+        target,
+        sql.SQL(", ").join([col_list] + [sql.Identifier(c) for c in defaults]),
+        sql.SQL(", ").join([col_list] + [sql.SQL(v) for v in defaults.values()]),
+        keys, keys)
+    if "merge" in spec:
+        return insert + sql.SQL(" " + spec["merge"])
+    # UNIQUE 제약이 없는 테이블은 같은 키의 행이 이미 있으면 건너뛴다
+    match = sql.SQL(" AND ").join(
+        sql.SQL("t.{0} IS NOT DISTINCT FROM s.{0}").format(sql.Identifier(k))
+        for k in spec["key"] if k in cols
+    )
+    return insert + sql.SQL(" WHERE NOT EXISTS (SELECT 1 FROM {} t WHERE {})").format(target, match)
+
+
+def _require_copy(conn):
+    if db.dialect(conn) != "postgres":
+        raise ValueError("일괄 가져오기/내보내기는 Postgres 백엔드에서만 쓸 수 있습니다.")
+
+
+def import_file(conn, table, fileobj, fmt="csv"):
+    _require_copy(conn)
+    spec = TABLES[table]
+    names, source = _parquet_source(fileobj) if fmt == "parquet" else _csv_source(fileobj)
+    cols = _header(spec, names)
+    t0 = time.perf_counter()
+    with db.transaction(conn) as cur:
+        cur.execute(sql.SQL(
+            "CREATE TEMP TABLE bulk_stage ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA"
+        ).format(sql.SQL(", ").join(map(sql.Identifier, cols)), sql.Identifier(table)))
+        # 파일 안의 순서 (COPY 가 읽는 순서대로 채워진다)
+        cur.execute("ALTER TABLE bulk_stage ADD COLUMN bulk_row bigserial")
+        cur.copy_expert(sql.SQL("COPY bulk_stage ({}) FROM STDIN WITH (FORMAT csv)").format(
+            sql.SQL(", ").join(map(sql.Identifier, cols))).as_string(cur), source)
+        staged = cur.rowcount
+        cur.execute(_merge_sql(table, spec, cols))
+        merged = cur.rowcount
+    seconds = time.perf_counter() - t0
+    return {
+        "table": table,
+        "rows": staged,
+        "merged": merged,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(staged / seconds) if seconds else staged,
+    }
+
+
+def export_file(conn, table, out, fmt="csv"):
+    _require_copy(conn)
+    spec = TABLES[table]
+    query = sql.SQL("COPY (SELECT {} FROM {} ORDER BY {}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(
+        sql.SQL(", ").join(map(sql.Identifier, spec["columns"])),
+        sql.Identifier(table),
+        sql.SQL(spec["order"]),
+    )
+    t0 = time.perf_counter()
+    with conn.cursor() as cur:
+        if fmt == "parquet":
+            import pandas as pd
+            buf = tempfile.SpooledTemporaryFile(SPOOL, mode="w+b")
+            cur.copy_expert(query.as_string(cur), buf)
+            buf.seek(0)
+            df = pd.read_csv(buf, parse_dates=[c for c in spec["columns"] if c.endswith("date")])
+            df.to_parquet(out, index=False)
+            rows = len(df)
+        else:
+            cur.copy_expert(query.as_string(cur), out)
+            rows = max(cur.rowcount, 0)
+    seconds = time.perf_counter() - t0
+    return {"table": table, "rows": rows, "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds) if seconds else rows}
+
+
+def export_bytes(table, fmt="csv"):
+    # st.download_button 에 넘기는 지연 생성용
+    with db.connection() as conn:
+        if fmt == "parquet":
+            out = io.BytesIO()
+            export_file(conn, table, out, fmt)
+        else:
+            text = io.StringIO()
+            export_file(conn, table, text, fmt)
+            out = io.BytesIO(text.getvalue().encode("utf-8-sig"))
+    out.seek(0)
+    return out
+
+
+def _format(path, fmt):
+    return fmt or ("parquet" if path.endswith(".parquet") else "csv")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bulk")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    args = parser.parse_args(argv)
+    fmt = _format(args.path, args.format)
+    if fmt not in FORMATS:
+        # 확장자로 고른 parquet 도 pyarrow 가 없으면 쓸 수 없다
+        parser.error(f"{fmt} 형식은 pyarrow 가 있어야 합니다 (pip install pyarrow). 쓸 수 있는 형식: {', '.join(FORMATS)}")
+
+    conn = psycopg2.connect(**db.connect_params())
+    conn.autocommit = True
+    try:
+        if args.action == "import":
+            if fmt == "parquet":
+                f = open(args.path, "rb")
+            else:
+                f = open(args.path, encoding="utf-8-sig", newline="")
+            with f:
+                result = import_file(conn, args.table, f, fmt)
+        else:
+            if fmt == "parquet":
+                f = open(args.path, "wb")
+            else:
+                f = open(args.path, "w", encoding="utf-8", newline="")
+            with f:
+                result = export_file(conn, args.table, f, fmt)
+    finally:
+        conn.close()
+    print(", ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
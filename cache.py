@@ -0,0 +1,108 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+import streamlit as st
+
+import db
+import notify
+
+# ---------------------------
+# 프로세스 공용 조회 캐시
+# ---------------------------
+# (테이블 버전, SQL, 파라미터) 를 키로 결과 행을 보관한다.
+# SQL 은 db.execute 형식($1, $2 자리표시자)이다.
+# 쓰기 경로에서 invalidate(table) 로 버전을 올리면 이전 결과는 더 이상
+# 조회되지 않고 TTL/LRU 로 밀려난다.
+# invalidate 는 CHANNEL 로 NOTIFY 도 보내서 다른 프로세스(레플리카)도 버전을 올린다.
+# 쓰기에 쓴 커서로 부르면 NOTIFY 도, 이 프로세스의 버전 올리기(db.on_commit)도 커밋된 뒤에
+# 일어나므로 같은 프로세스든 다른 프로세스든 커밋 전 값을 새 버전으로 캐시하지 않는다.
+# 수신기가 다시 연결되면(알림을 놓쳤을 수 있으면) 전부 비운다. TTL 은 그래도 놓친 경우의 상한이다.
+
+TTL = 300
+MAX_ENTRIES = 512
+CHANNEL = "cache_invalidate"
+# 자기가 보낸 알림은 이미 반영했으므로 건너뛴다
+_ORIGIN = secrets.token_hex(4)
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_versions = {}
+_counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+
+def _limits():
+    return (float(st.secrets.get("cache_ttl", TTL)),
+            int(st.secrets.get("cache_size", MAX_ENTRIES)))
+
+
+def expire(*tables):
+    # 이 프로세스에서만 버전을 올린다 (모든 프로세스가 받는 알림의 콜백에서)
+    with _lock:
+        for t in tables:
+            _versions[t] = _versions.get(t, 0) + 1
+        _counters["invalidations"] += 1
+
+
+def invalidate(*tables, cur=None):
+    # cur: 쓰기를 한 커서. 없으면 (이미 커밋된 뒤) 풀에서 연결을 잠깐 빌려 보낸다
+    payload = f"{_ORIGIN}:{','.join(tables)}"
+    if cur is not None:
+        db.execute(cur, "SELECT pg_notify($1, $2)", (CHANNEL, payload))
+        db.on_commit(cur.connection, partial(expire, *tables))
+    else:
+        expire(*tables)
+        with db.connection() as conn, conn.cursor() as c:
+            db.execute(c, "SELECT pg_notify($1, $2)", (CHANNEL, payload))
+
+
+def _on_notify(payload):
+    if payload is None:
+        # 수신기가 (다시) 연결됨: 그동안의 알림을 놓쳤을 수 있다
+        with _lock:
+            _entries.clear()
+            for t in _versions:
+                _versions[t] += 1
+        return
+    origin, _, tables = payload.partition(":")
+    if origin != _ORIGIN and tables:
+        expire(*tables.split(","))
+
+
+def listen():
+    # app.py 가 재실행마다 부른다 (이미 구독했으면 아무 일도 하지 않는다)
+    notify.subscribe(CHANNEL, _on_notify)
+
+
+def query(cur, tables, sql, params=(), ttl=None):
+    default_ttl, size = _limits()
+    now = time.monotonic()
+    with _lock:
+        key = (tuple(_versions.get(t, 0) for t in tables), sql, tuple(params))
+        entry = _entries.get(key)
+        if entry and entry[0] > now:
+            _entries.move_to_end(key)
+            _counters["hits"] += 1
+            return entry[1]
+        _counters["misses"] += 1
+
+    rows = db.execute(cur, sql, params)
+
+    with _lock:
+        # 조회 도중 쓰기가 있었으면 낡은 결과를 새 버전 키로 저장하지 않는다
+        if key[0] == tuple(_versions.get(t, 0) for t in tables):
+            _entries[key] = (now + (default_ttl if ttl is None else ttl), rows)
+            _entries.move_to_end(key)
+            while len(_entries) > size:
+                _entries.popitem(last=False)
+                _counters["evictions"] += 1
+    return rows
+
+
+def stats():
+    with _lock:
+        total = _counters["hits"] + _counters["misses"]
+        return dict(_counters, entries=len(_entries), origin=_ORIGIN,
+                    hit_rate=round(_counters["hits"] / total, 3) if total else 0.0)
@@ -0,0 +1,124 @@
+import calendar
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import streamlit as st
+
+import db
+
+# ---------------------------
+# 월/주 달력 보기
+# ---------------------------
+# 화면에 보이는 날짜 구간만 class_date/date 인덱스로 조회한다. 기록이 몇 년 쌓여도
+# 한 화면 비용은 같다. 주는 일요일에 시작하고, 날짜 기준은 timezone 시크릿(기본 Asia/Seoul).
+
+log = logging.getLogger(__name__)
+
+TIMEZONE = "Asia/Seoul"
+WEEKDAYS = ["일", "월", "화", "수", "목", "금", "토"]
+
+_calendar = calendar.Calendar(firstweekday=calendar.SUNDAY)
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+_pending = set()
+_lock = threading.Lock()
+
+
+def _zone():
+    return ZoneInfo(st.secrets.get("timezone", TIMEZONE))
+
+
+def today():
+    return datetime.now(_zone()).date()
+
+
+def seconds_until_midnight():
+    now = datetime.now(_zone())
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), now.tzinfo)
+    return max((midnight - now).total_seconds(), 1.0)
+
+
+def window(mode, anchor):
+    # 화면에 그릴 (첫날, 마지막날). 월 보기는 앞뒤 달의 날짜가 섞인 주 단위 격자 전체
+    if mode == "주":
+        start = anchor - timedelta(days=(anchor.weekday() + 1) % 7)
+        return start, start + timedelta(days=6)
+    weeks = _calendar.monthdatescalendar(anchor.year, anchor.month)
+    return weeks[0][0], weeks[-1][-1]
+
+
+def shift(mode, anchor, step):
+    if mode == "주":
+        return anchor + timedelta(weeks=step)
+    month = anchor.month - 1 + step
+    return date(anchor.year + month // 12, month % 12 + 1, 1)
+
+
+def _move(key, step):
+    state = st.session_state[key]
+    state["anchor"] = shift(state["mode"], state["anchor"], step) if step else today()
+
+
+def navigator(key):
+    # 보기 방식과 기준 날짜는 세션에 두고 (mode, 첫날, 마지막날, 기준 날짜) 를 돌려준다
+    state = st.session_state.setdefault(key, {"mode": "월", "anchor": today()})
+    c1, c2, c3, c4, c5 = st.columns([2, 1, 1, 1, 3])
+    with c1:
+        state["mode"] = st.radio("보기", ["월", "주"], horizontal=True, key=f"{key}:mode",
+                                 index=["월", "주"].index(state["mode"]), label_visibility="collapsed")
+    with c2:
+        st.button("◀", key=f"{key}:prev", on_click=_move, args=(key, -1))
+    with c3:
+        st.button("오늘", key=f"{key}:today", on_click=_move, args=(key, 0))
+    with c4:
+        st.button("▶", key=f"{key}:next", on_click=_move, args=(key, 1))
+    anchor = state["anchor"]
+    start, end = window(state["mode"], anchor)
+    with c5:
+        if state["mode"] == "월":
+            st.markdown(f"**{anchor.year}년 {anchor.month}월**")
+        else:
+            st.markdown(f"**{start:%Y-%m-%d} ~ {end:%m-%d}**")
+    return state["mode"], start, end, anchor
+
+
+def grid(mode, start, end, anchor, items):
+    # items: {날짜: [표시 문자열, ...]}
+    header = st.columns(7)
+    for col, name in zip(header, WEEKDAYS):
+        col.markdown(f"**{name}**")
+    now = today()
+    day = start
+    while day <= end:
+        cols = st.columns(7)
+        for col in cols:
+            label = f"{day.day}"
+            if day == now:
+                label = f":blue[**{day.day}**]"
+            elif mode == "월" and day.month != anchor.month:
+                label = f":gray[{day.day}]"
+            lines = [label] + [f"- {text}" for text in items.get(day, [])]
+            col.markdown("  \n".join(lines))
+            day += timedelta(days=1)
+
+
+def prefetch(key, fn):
+    # 캐시를 미리 채우는 조회를 백그라운드로. 같은 key 가 진행 중이면 건너뛴다
+    with _lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+
+    def run():
+        try:
+            with db.connection() as conn, conn.cursor() as cur:
+                fn(cur)
+        except Exception:
+            log.exception("prefetch %s failed", key)
+        finally:
+            with _lock:
+                _pending.discard(key)
+
+    _executor.submit(run)
@@ -0,0 +1,56 @@
+from collections import deque
+
+import streamlit as st
+
+import db
+import notify
+import repository
+
+# ---------------------------
+# 채팅방: 증분 피드
+# ---------------------------
+# 세션마다 last_seen_id 이후의 메시지만 읽어 붙인다. 프래그먼트가 짧은 주기로
+# 돌지만, LISTEN 수신기가 새 알림을 받지 않았으면 DB 에 가지 않는다.
+
+CHANNEL = "chat_messages"
+HISTORY = 100
+REFRESH = 1.0
+
+
+def post(repo, name, msg):
+    repo.chat_messages.post(name, msg, CHANNEL)
+    # 내가 쓴 메시지는 수신기를 기다리지 않고 바로 읽는다
+    _state()["seq"] = None
+
+
+def _state():
+    return st.session_state.setdefault("chat_feed", {
+        "last_seen_id": 0,
+        "seq": None,
+        "messages": deque(maxlen=HISTORY),
+    })
+
+
+def _fetch_new(state):
+    # 새 메시지가 HISTORY 보다 많아도 보여줄 최신 HISTORY 개만 읽는다
+    with db.connection() as conn, conn.cursor() as cur:
+        rows = repository.ChatMessages(cur).newest_after(state["last_seen_id"], HISTORY)
+    for m in rows:
+        state["messages"].append((m.username, m.message, m.timestamp))
+    if rows:
+        state["last_seen_id"] = rows[-1].id
+
+
+@st.fragment(run_every=REFRESH)
+def feed():
+    state = _state()
+    listener = notify.subscribe(CHANNEL)
+    seq = listener.seq(CHANNEL)
+    # 수신기가 죽어 있으면 매 주기 id > last_seen_id 로 폴링한다
+    if seq != state["seq"] or not listener.alive:
+        state["seq"] = seq
+        _fetch_new(state)
+    if state["messages"]:
+        st.markdown("  \n".join(
+            f"**[{ts:%H:%M:%S}] {u}**: {m}" for u, m, ts in state["messages"]
+        ))
@@ -0,0 +1,300 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import pool as pgpool
+import streamlit as st
+
+import profiler
+
+# ---------------------------
+# DB 연결 풀
+# ---------------------------
+# 세션(스크립트 재실행)마다 풀에서 연결을 하나 빌려 쓰고 끝나면 돌려준다.
+# 풀이 가득 차면 PoolError 대신 최대 pool_timeout 초까지 기다린다.
+# db_backend = "sqlite" 이면 외부 서버 없이 프로세스 안의 메모리 DB 를 쓴다 (sqlite_backend.py).
+
+BACKENDS = ("postgres", "sqlite")
+# 두 백엔드의 DB 오류
+ERRORS = (psycopg2.Error, sqlite3.Error)
+
+
+def backend():
+    name = st.secrets.get("db_backend", "postgres")
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 db_backend: {name}")
+    return name
+
+
+def dialect(cur):
+    # SQLite 연결/커서는 dialect 속성을 가진다
+    return getattr(cur, "dialect", "postgres")
+
+
+def connect_params():
+    return dict(
+        user=st.secrets["user"],
+        password=st.secrets["password"],
+        host=st.secrets["host"],
+        port=st.secrets["port"],
+        dbname=st.secrets["dbname"],
+        keepalives=1, keepalives_idle=30,
+        keepalives_interval=10, keepalives_count=5
+    )
+
+
+_query_lock = threading.Lock()
+_queries = 0
+
+
+def query_count():
+    # 프로세스 전체에서 풀 연결로 보낸 문장 수 (벤치마크용)
+    return _queries
+
+
+def record(query, seconds, rows):
+    global _queries
+    with _query_lock:
+        _queries += 1
+    profiler.record(_label(query), seconds, rows)
+
+
+class Cursor(psycopg2.extensions.cursor):
+    # 모든 문장의 소요 시간/행 수를 profiler 에 남긴다
+    def execute(self, query, vars=None):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record(query, time.perf_counter() - t0, self.rowcount)
+
+
+def _label(query):
+    # EXECUTE q_... 는 PREPARE 할 때의 원래 SQL 로 보여준다
+    if isinstance(query, str) and query.startswith("EXECUTE q_"):
+        name = query[8:].split(" ", 1)[0]
+        if name in _statements:
+            return _statements[name]
+    return profiler.normalize(query)
+
+
+class Connection(psycopg2.extensions.connection):
+    # 이 연결에서 이미 PREPARE 한 문장 이름들
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        # 트랜잭션이 커밋된 뒤 부를 함수들 (on_commit)
+        self.after_commit = []
+        self.cursor_factory = Cursor
+
+
+class ConnectionPool:
+    def __init__(self, minconn, maxconn, timeout=10.0, validate_after=30.0, **params):
+        self._pool = pgpool.ThreadedConnectionPool(minconn, maxconn, **params)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+        self._validate_after = validate_after
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.reconnects = 0
+
+    def getconn(self):
+        t0 = time.perf_counter()
+        if not self._slots.acquire(timeout=self._timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise pgpool.PoolError("connection pool exhausted")
+        waited = time.perf_counter() - t0
+        try:
+            conn = self._checked(self._pool.getconn())
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if waited > 0.001:
+                self.waits += 1
+        return conn
+
+    def _checked(self, conn):
+        # 오래 놀고 있던 연결만 SELECT 1 로 확인해 매 재실행의 왕복을 아낀다
+        idle = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if not conn.closed and idle < self._validate_after:
+            return self._ready(conn)
+        try:
+            if not conn.closed:
+                # autocommit 을 먼저 켠다. SELECT 1 이 연 트랜잭션 안에서는 바꿀 수 없다
+                self._ready(conn)
+                with conn.cursor() as c:
+                    c.execute("SELECT 1")
+                return conn
+        except psycopg2.Error:
+            pass
+        # 끊어진 연결은 버리고 새로 연결
+        self._forget(conn)
+        with self._lock:
+            self.reconnects += 1
+        return self._ready(self._pool.getconn())
+
+    def _ready(self, conn):
+        if not conn.autocommit:
+            conn.autocommit = True
+        return conn
+
+    def _forget(self, conn):
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    def putconn(self, conn):
+        try:
+            if conn.closed:
+                self._forget(conn)
+                return
+            if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            finish(conn, False)
+            conn.autocommit = True
+            self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn)
+        except psycopg2.Error:
+            self._forget(conn)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_avg_ms": round(1000 * self.wait_total / max(self.checkouts, 1), 2),
+                "wait_max_ms": round(1000 * self.wait_max, 2),
+                "timeouts": self.timeouts,
+                "reconnects": self.reconnects,
+            }
+
+
+@st.cache_resource
+def get_pool():
+    if backend() == "sqlite":
+        import sqlite_backend  # 테스트/벤치마크에서만 쓴다
+        return sqlite_backend.Pool()
+    return ConnectionPool(
+        int(st.secrets.get("pool_min", 1)),
+        int(st.secrets.get("pool_max", 10)),
+        timeout=float(st.secrets.get("pool_timeout", 10)),
+        connection_factory=Connection,
+        **connect_params()
+    )
+
+
+def checkout():
+    return get_pool().getconn()
+
+
+def release(conn):
+    get_pool().putconn(conn)
+
+
+@contextmanager
+def transaction(conn):
+    # 풀 연결은 autocommit 이므로 여러 문장을 묶을 때만 잠시 끈다
+    conn.autocommit = False
+    committed = False
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                yield cur
+        committed = True
+    finally:
+        conn.autocommit = True
+        finish(conn, committed)
+
+
+def on_commit(conn, fn):
+    # 트랜잭션 안이면 커밋된 뒤에 부른다 (롤백되면 버린다). 트랜잭션 밖이거나
+    # after_commit 이 없는 일반 연결이면 바로 부른다
+    pending = getattr(conn, "after_commit", None)
+    if pending is None or conn.autocommit:
+        fn()
+    else:
+        pending.append(fn)
+
+
+def finish(conn, committed):
+    # 트랜잭션이 끝난 뒤: 커밋됐으면 on_commit 으로 미룬 함수를 부르고, 아니면 버린다
+    pending = getattr(conn, "after_commit", None)
+    if not pending:
+        return
+    callbacks = list(pending)
+    pending.clear()
+    if committed:
+        for fn in callbacks:
+            fn()
+
+
+@contextmanager
+def connection():
+    # 프래그먼트나 백그라운드 스레드처럼 재실행 밖에서 쓰는 연결
+    conn = checkout()
+    try:
+        yield conn
+    finally:
+        release(conn)
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+# ---------------------------
+# 서버 쪽 PREPARE 문장
+# ---------------------------
+# $1, $2 자리표시자를 쓴 SQL 을 연결마다 처음 한 번만 PREPARE 하고 이후에는
+# EXECUTE 로 파싱/계획 단계를 건너뛴다. 이름은 SQL 의 해시로 정한다.
+
+_PLACEHOLDER = re.compile(r"\$(\d+)")
+_statements = {}
+
+
+def statement_name(sql):
+    return "q_" + hashlib.md5(sql.encode()).hexdigest()[:16]
+
+
+def execute(cur, sql, params=()):
+    prepared = getattr(cur.connection, "prepared", None)
+    if prepared is None:
+        # 풀 밖의 일반 연결 (CLI 등): 그냥 실행
+        cur.execute(_PLACEHOLDER.sub(r"%(p\1)s", sql.replace("%", "%%")),
+                    {f"p{i}": v for i, v in enumerate(params, 1)})
+    else:
+        name = statement_name(sql)
+        if name not in prepared:
+            _statements.setdefault(name, profiler.normalize(sql))
+            cur.execute(f"PREPARE {name} AS {sql}")
+            prepared.add(name)
+        if params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", tuple(params))
+        else:
+            cur.execute(f"EXECUTE {name}")
+    return cur.fetchall() if cur.description else []
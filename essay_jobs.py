@@ -0,0 +1,192 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import psycopg2
+import streamlit as st
+
+import cache
+import db
+import essay_text
+import notify
+import repository
+import storage
+
+# ---------------------------
+# 에세이 분석 작업자
+# ---------------------------
+# 업로드는 essays 행과 essay_jobs 행을 한 문장으로 넣고 NOTIFY 만 보낸 뒤 바로 돌아온다.
+# 작업자(python -m essay_jobs)는 FOR UPDATE SKIP LOCKED 로 빈 프로세스 수만큼 작업을 가져와
+# 프로세스 풀에서 essay_text.analyze 를 돌리고 결과를 essays 컬럼에 쓴다. 작업자가 여럿이어도
+# 한 작업은 한 곳에서만 처리되고, 작업 중 죽은 작업은 STALE 초 뒤 다른 작업자가 다시 가져간다.
+# app 은 프로세스마다 작업자 하나를 자식 프로세스로 띄운다 (essay_worker = false 면 띄우지 않는다).
+# 설정(DB 비밀번호 포함)은 환경 변수 대신 표준입력으로 넘겨 /proc/<pid>/environ 에 남지 않게 한다.
+# 캐시가 비워져 start_worker 가 다시 불리면 이전 작업자를 끝내고 새로 띄운다.
+#   python -m essay_jobs --processes 4
+
+log = logging.getLogger(__name__)
+
+JOBS = "essay_jobs"       # 새 작업 알림
+DONE = "essay_results"    # 결과 기록 알림 (app 의 essays 캐시 무효화)
+MAX_ATTEMPTS = 3
+STALE = 600
+POLL = 5.0
+STOP_TIMEOUT = 10.0
+
+
+class Worker:
+    def __init__(self, params, files, processes, parent=None):
+        self.params = params
+        self.files = files
+        self.processes = processes
+        self.pool = self._pool()
+        self.inflight = {}
+        # app 이 띄운 작업자는 app 프로세스가 끝나면 같이 끝난다
+        self.parent = parent
+
+    def _pool(self):
+        # fork 대신 spawn: 자식은 essay_text 만 쓰고 부모의 DB 연결을 물려받지 않는다
+        return ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit(self, job):
+        path = self.files.path(job.file_path)
+        self.inflight[self.pool.submit(essay_text.analyze, path, job.file_name)] = (job, self.pool)
+
+    def _record(self, jobs, future):
+        job, pool = self.inflight.pop(future)
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            # 파일 하나가 자식 프로세스를 죽였다. 풀은 한 번만 새로 만들고 시도 횟수로 판단한다
+            if pool is self.pool:
+                self.pool = self._pool()
+            jobs.fail(job.id, "작업 프로세스가 비정상 종료됨", job.attempts < MAX_ATTEMPTS, DONE)
+        except Exception as e:
+            jobs.fail(job.id, f"{type(e).__name__}: {e}"[:500], job.attempts < MAX_ATTEMPTS, DONE)
+        else:
+            jobs.finish(job.id, result, DONE)
+
+    def run(self):
+        conn = psycopg2.connect(connection_factory=db.Connection, **self.params)
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute(f"LISTEN {JOBS}")
+        jobs = repository.EssayJobs(cur)
+        try:
+            while self.parent is None or os.getppid() == self.parent:
+                for future in [f for f in self.inflight if f.done()]:
+                    self._record(jobs, future)
+                free = self.processes - len(self.inflight)
+                if free > 0:
+                    for job in jobs.claim(free, STALE):
+                        self._submit(job)
+                if len(self.inflight) >= self.processes:
+                    wait(self.inflight, timeout=POLL, return_when=FIRST_COMPLETED)
+                    continue
+                # 알림이 오거나, 진행 중인 작업이 있으면 짧게, 없으면 POLL 초 기다린다
+                if not conn.notifies:
+                    select.select([conn], [], [], 0.2 if self.inflight else POLL)
+                    conn.poll()
+                conn.notifies.clear()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            # 끝내지 못한 작업은 STALE 을 기다리지 않고 바로 다른 작업자에게
+            try:
+                for job, _ in self.inflight.values():
+                    jobs.fail(job.id, "작업자 종료", True, DONE)
+            except psycopg2.Error:
+                pass
+            conn.close()
+
+
+# ---------------------------
+# app 쪽
+# ---------------------------
+
+def _invalidate(payload):
+    # 모든 프로세스가 이 알림을 받으므로 다시 알리지 않는다
+    cache.expire("essays", "essay_jobs")
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _stop(proc):
+    # SIGTERM 이면 작업자는 진행 중인 작업을 되돌려 놓고 끝난다
+    if proc is None or proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _spawn(config):
+    global _worker
+    with _worker_lock:
+        # st.cache_resource 가 비워져도 이 모듈의 핸들은 남는다. 작업자는 프로세스당 하나
+        _stop(_worker)
+        proc = subprocess.Popen([sys.executable, "-m", "essay_jobs", "--config", "-"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), stdin=subprocess.PIPE)
+        with proc.stdin:
+            proc.stdin.write(json.dumps(config).encode())
+        _worker = proc
+        return proc
+
+
+@st.cache_resource
+def start_worker():
+    # 프로세스당 한 번. 작업자는 시크릿 파일 대신 표준입력으로 설정을 받는다
+    notify.subscribe(DONE, _invalidate)
+    # 작업자 프로세스는 Postgres 에 직접 붙는다. SQLite 백엔드에서는 작업이 대기열에 남는다
+    if not st.secrets.get("essay_worker", True) or db.backend() == "sqlite":
+        return None
+    config = {
+        "db": db.connect_params(),
+        "storage": storage.config(),
+        "processes": int(st.secrets.get("essay_processes", os.cpu_count() or 1)),
+        # 작업자가 뜨기 전에 app 이 끝났어도 알아챌 수 있게 pid 를 넘긴다
+        "parent": os.getpid(),
+    }
+    return _spawn(config)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m essay_jobs")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--config", help="- 이면 표준입력의 JSON 설정 (app 이 띄울 때)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    # 종료 요청에도 Worker.run 의 정리(finally)가 돌도록
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    parent = None
+    if args.config == "-":
+        config = json.load(sys.stdin)
+        parent = config["parent"]
+    else:
+        config = {"db": db.connect_params(), "storage": storage.config(), "processes": os.cpu_count() or 1}
+    processes = args.processes or config["processes"]
+    while True:
+        try:
+            Worker(config["db"], storage.make(config["storage"]), processes, parent).run()
+            return
+        except psycopg2.OperationalError:
+            log.exception("essay worker lost its connection, retrying")
+            time.sleep(POLL)
+
+
+if __name__ == "__main__":
+    main()
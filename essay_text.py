@@ -0,0 +1,94 @@
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+
+# ---------------------------
+# 에세이 텍스트 추출과 통계
+# ---------------------------
+# essay_jobs 작업자의 프로세스 풀에서 실행된다. 파일 경로만 받아 결과 dict 를 돌려주므로
+# streamlit/DB 를 불러오지 않는다. docx 는 zip 안의 word/document.xml 을 직접 읽고,
+# pdf 는 pypdf 가 있어야 읽힌다. 가독성은 영어 기준 Flesch 지표(음절은 모음 묶음으로 어림).
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_WORD = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+_SENTENCE = re.compile(r"[.!?。]+(?=\s|$)")
+_VOWELS = re.compile(r"[aeiouy]+")
+
+
+def kind(file_name, head):
+    # 확장자가 없거나 틀려도 파일 앞부분으로 판단
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK"):
+        return "docx"
+    ext = os.path.splitext(file_name or "")[1].lower()
+    return {".pdf": "pdf", ".docx": "docx"}.get(ext, "txt")
+
+
+def _txt(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+    return data.decode("latin-1")
+
+
+def _docx(path):
+    paragraphs = []
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as f:
+        parts = []
+        for _, el in ElementTree.iterparse(f):
+            if el.tag == _W + "t":
+                parts.append(el.text or "")
+            elif el.tag in (_W + "tab", _W + "br"):
+                parts.append(" ")
+            elif el.tag == _W + "p":
+                paragraphs.append("".join(parts))
+                parts = []
+                el.clear()
+    return "\n".join(paragraphs)
+
+
+def _pdf(path):
+    from pypdf import PdfReader  # PDF 에세이가 있을 때만 필요하다
+    return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+
+
+def extract(path, file_name=None):
+    with open(path, "rb") as f:
+        head = f.read(8)
+    return {"pdf": _pdf, "docx": _docx, "txt": _txt}[kind(file_name or path, head)](path)
+
+
+def _syllables(word):
+    word = word.lower()
+    n = len(_VOWELS.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee")) and n > 1:
+        n -= 1
+    return max(n, 1)
+
+
+def stats(text):
+    words = _WORD.findall(text)
+    sentences = max(len(_SENTENCE.findall(text)), 1 if words else 0)
+    result = {"word_count": len(words), "sentence_count": sentences, "readability": None, "grade_level": None}
+    # Flesch 지표는 영어 글에만 의미가 있다
+    if not words or sum(w.isascii() for w in words) * 2 < len(words):
+        return result
+    syllables = sum(_syllables(w) for w in words)
+    per_sentence = len(words) / sentences
+    per_word = syllables / len(words)
+    return dict(
+        result,
+        # Flesch Reading Ease (높을수록 쉬움), Flesch-Kincaid 학년
+        readability=round(206.835 - 1.015 * per_sentence - 84.6 * per_word, 1),
+        grade_level=round(0.39 * per_sentence + 11.8 * per_word - 15.59, 1),
+    )
+
+
+def analyze(path, file_name=None):
+    return stats(extract(path, file_name))
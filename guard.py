@@ -0,0 +1,123 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ---------------------------
+# 쓰기 보호: 중복 제출 합치기와 속도 제한
+# ---------------------------
+# 폼의 쓰기 경로를 with guard.write("폼", 값...) as ok: 로 감싼다.
+#  - 같은 사람이 같은 폼에 같은 내용을 DEDUP_WINDOW 초 안에 다시 내면 (더블클릭, 새로고침)
+#    쓰지 않고 이미 등록됐다고 알려준다. 키는 (사람, 폼, 내용 해시).
+#  - 사람/폼마다 토큰 버킷(최대 burst 개, 분당 per_minute 개 충전)을 두고 넘치면 거절한다.
+# 상태는 프로세스 공용 dict 에 두고 오래 쓰지 않은 항목은 SWEEP 초마다 지운다.
+# 레플리카가 여럿이면 프로세스마다 따로 센다. 한도는 write_limits 시크릿으로 폼별로 바꾼다.
+#   [write_limits]
+#   chat = [5, 20]
+
+DEDUP_WINDOW = 10.0
+SWEEP = 60.0
+# 폼: (burst, per_minute)
+LIMITS = {
+    "chat": (5, 20),
+}
+DEFAULT_LIMIT = (3, 6)
+
+_lock = threading.Lock()
+_buckets = {}
+_recent = {}
+_counters = {}
+_swept = time.monotonic()
+
+
+def _limit(form):
+    limits = st.secrets.get("write_limits", {})
+    burst, per_minute = limits.get(form, LIMITS.get(form, DEFAULT_LIMIT))
+    return float(burst), float(per_minute) / 60.0
+
+
+def _who():
+    # 게스트는 모두 "게스트" 이름을 쓰므로 브라우저 세션별로 센다
+    name = st.session_state.get("username")
+    if st.session_state.get("logged_in") and name and name != "게스트":
+        return name
+    ctx = get_script_run_ctx()
+    return f"guest:{ctx.session_id if ctx else ''}"
+
+
+def _count(form, name):
+    c = _counters.setdefault(form, {"allowed": 0, "duplicates": 0, "limited": 0})
+    c[name] += 1
+
+
+def _sweep(now):
+    global _swept
+    if now - _swept < SWEEP:
+        return
+    _swept = now
+    for key in [k for k, expires in _recent.items() if expires <= now]:
+        del _recent[key]
+    # 가득 찬 버킷은 지워도 다음에 새로 만든 것과 같다
+    for key in [k for k, (tokens, last, burst, rate) in _buckets.items()
+                if tokens + (now - last) * rate >= burst]:
+        del _buckets[key]
+
+
+def _admit(form, values):
+    # (통과 여부, 중복 키, 거절 사유, 다시 시도까지 초)
+    who = _who()
+    digest = hashlib.sha256(repr(values).encode()).hexdigest()
+    key = (who, form, digest)
+    burst, rate = _limit(form)
+    now = time.monotonic()
+    with _lock:
+        _sweep(now)
+        if _recent.get(key, 0) > now:
+            _count(form, "duplicates")
+            return False, key, "duplicate", 0
+        tokens, last, _, _ = _buckets.get((who, form), (burst, now, burst, rate))
+        tokens = min(burst, tokens + (now - last) * rate)
+        if tokens < 1:
+            _buckets[(who, form)] = (tokens, now, burst, rate)
+            _count(form, "limited")
+            return False, key, "limited", (1 - tokens) / rate if rate else SWEEP
+        _buckets[(who, form)] = (tokens - 1, now, burst, rate)
+        _recent[key] = now + DEDUP_WINDOW
+        _count(form, "allowed")
+        return True, key, None, 0
+
+
+def _forget(key):
+    with _lock:
+        _recent.pop(key, None)
+
+
+@contextmanager
+def write(form, *values):
+    # 통과하면 True. 막힌 경우 안내 메시지는 여기서 띄운다.
+    # 본문에서 오류가 나면 같은 내용을 바로 다시 낼 수 있게 중복 키를 지운다
+    ok, key, reason, wait = _admit(form, values)
+    if not ok:
+        if reason == "duplicate":
+            st.info("방금 같은 내용이 이미 등록되었습니다.")
+        else:
+            st.warning(f"잠시 후 다시 시도해 주세요. ({max(int(wait) + 1, 1)}초 뒤 가능)")
+        yield False
+        return
+    try:
+        yield True
+    except Exception:
+        _forget(key)
+        raise
+
+
+def stats():
+    with _lock:
+        total = {"allowed": 0, "duplicates": 0, "limited": 0}
+        for c in _counters.values():
+            for name, n in c.items():
+                total[name] += n
+        return dict(total, tracked_users=len(_buckets), forms={f: dict(c) for f, c in _counters.items()})
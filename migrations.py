@@ -0,0 +1,458 @@
+import psycopg2
+import psycopg2.errors
+import streamlit as st
+
+import db
+
+# ---------------------------
+# 스키마 마이그레이션
+# ---------------------------
+# 번호 순서대로 한 번씩만 적용하고 schema_version 에 기록한다.
+# 여러 프로세스가 동시에 떠도 advisory lock 으로 한 곳에서만 적용된다.
+# 새 스키마 변경은 init_tables() 를 고치는 대신 MIGRATIONS 끝에 추가한다.
+
+LOCK_KEY = 0x486F6E6F  # "Hono"
+
+MIGRATIONS = [
+    (1, "기본 테이블", """
+    -- 사용자
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username TEXT UNIQUE,
+        password TEXT,
+        role TEXT DEFAULT '학생'
+    );
+    -- 강제탈퇴 기록
+    CREATE TABLE IF NOT EXISTS kicked_users (
+        username TEXT PRIMARY KEY,
+        reason   TEXT NOT NULL,
+        kicked_at TIMESTAMPTZ DEFAULT now()
+    );
+    -- 채팅방
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        id SERIAL PRIMARY KEY,
+        username TEXT,
+        message  TEXT,
+        timestamp TIMESTAMPTZ
+    );
+    -- 과제 공유
+    CREATE TABLE IF NOT EXISTS homeworks (
+        id SERIAL PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        due_date DATE,
+        posted_by TEXT,
+        timestamp TIMESTAMPTZ
+    );
+    -- 현재 도서 & 토론 주제
+    CREATE TABLE IF NOT EXISTS current_book (
+        id SERIAL PRIMARY KEY,
+        book_title TEXT,
+        week_of DATE,
+        debate_topic TEXT,
+        posted_by TEXT,
+        timestamp TIMESTAMPTZ
+    );
+    -- 추천 도구
+    CREATE TABLE IF NOT EXISTS tools (
+        id SERIAL PRIMARY KEY,
+        name TEXT,
+        url TEXT,
+        description TEXT,
+        added_by TEXT,
+        timestamp TIMESTAMPTZ
+    );
+    -- 오늘의 단어
+    CREATE TABLE IF NOT EXISTS word_of_day (
+        id SERIAL PRIMARY KEY,
+        word TEXT,
+        definition TEXT,
+        date DATE UNIQUE
+    );
+    -- 수업 일정
+    CREATE TABLE IF NOT EXISTS schedule (
+        id SERIAL PRIMARY KEY,
+        class_date DATE,
+        content TEXT
+    );
+    -- 학습 자료
+    CREATE TABLE IF NOT EXISTS materials (
+        id SERIAL PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        file_url TEXT,
+        uploaded_by TEXT,
+        timestamp TIMESTAMPTZ
+    );
+    -- 에세이 업로드
+    CREATE TABLE IF NOT EXISTS essays (
+        id SERIAL PRIMARY KEY,
+        title TEXT,
+        file_path TEXT,
+        uploaded_by TEXT,
+        timestamp TIMESTAMPTZ
+    );
+    -- Newbery 도서 평점
+    CREATE TABLE IF NOT EXISTS newbery_books (
+        id SERIAL PRIMARY KEY,
+        title TEXT,
+        rating INTEGER,
+        rated_by TEXT,
+        timestamp TIMESTAMPTZ
+    );
+    -- Newbery 도서별 평점 집계 (평점 등록 시 함께 갱신)
+    CREATE TABLE IF NOT EXISTS newbery_ratings (
+        title TEXT PRIMARY KEY,
+        rating_count INTEGER NOT NULL DEFAULT 0,
+        rating_sum   INTEGER NOT NULL DEFAULT 0,
+        r1 INTEGER NOT NULL DEFAULT 0,
+        r2 INTEGER NOT NULL DEFAULT 0,
+        r3 INTEGER NOT NULL DEFAULT 0,
+        r4 INTEGER NOT NULL DEFAULT 0,
+        r5 INTEGER NOT NULL DEFAULT 0,
+        avg_rating NUMERIC(4,3) GENERATED ALWAYS AS
+            (rating_sum::numeric / NULLIF(rating_count, 0)) STORED,
+        updated_at TIMESTAMPTZ DEFAULT now()
+    );
+    CREATE INDEX IF NOT EXISTS newbery_ratings_rank_idx
+    ON newbery_ratings (avg_rating DESC, rating_count DESC, title DESC);
+    -- 기존 평점으로 집계 채우기 (집계가 비어 있을 때만)
+    INSERT INTO newbery_ratings (title,rating_count,rating_sum,r1,r2,r3,r4,r5)
+    SELECT btrim(title), count(*), sum(rating),
+           count(*) FILTER (WHERE rating=1), count(*) FILTER (WHERE rating=2),
+           count(*) FILTER (WHERE rating=3), count(*) FILTER (WHERE rating=4),
+           count(*) FILTER (WHERE rating=5)
+    FROM newbery_books
+    WHERE btrim(title) <> '' AND rating BETWEEN 1 AND 5
+      AND NOT EXISTS (SELECT 1 FROM newbery_ratings)
+    GROUP BY btrim(title);
+    -- 토론 기사
+    CREATE TABLE IF NOT EXISTS debate_articles (
+        id SERIAL PRIMARY KEY,
+        url TEXT,
+        description TEXT,
+        shared_by TEXT,
+        timestamp TIMESTAMPTZ
+    );
+    -- User logs
+    CREATE TABLE IF NOT EXISTS user_logs (
+        id SERIAL PRIMARY KEY,
+        username TEXT,
+        action TEXT,
+        timestamp TIMESTAMPTZ DEFAULT now()
+    );
+    -- System logs
+    CREATE TABLE IF NOT EXISTS system_logs (
+        id SERIAL PRIMARY KEY,
+        level TEXT,
+        message TEXT,
+        timestamp TIMESTAMPTZ DEFAULT now()
+    );
+    -- Announcements
+    CREATE TABLE IF NOT EXISTS announcements (
+        id SERIAL PRIMARY KEY,
+        content TEXT,
+        posted_by TEXT,
+        timestamp TIMESTAMPTZ DEFAULT now()
+    );
+    -- Site settings
+    CREATE TABLE IF NOT EXISTS site_settings (
+        id SERIAL PRIMARY KEY,
+        setting_key TEXT UNIQUE,
+        setting_value TEXT,
+        updated_at TIMESTAMPTZ DEFAULT now()
+    );
+    -- Add created_at to users table if it doesn't exist
+    ALTER TABLE users 
+    ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ DEFAULT now();
+    """),
+    (2, "조회용 인덱스", """
+    -- 최신순 로그/공지 조회
+    CREATE INDEX IF NOT EXISTS user_logs_timestamp_idx ON user_logs (timestamp DESC);
+    CREATE INDEX IF NOT EXISTS system_logs_timestamp_idx ON system_logs (timestamp DESC);
+    CREATE INDEX IF NOT EXISTS announcements_timestamp_idx ON announcements (timestamp DESC);
+    -- 수업 일정 키셋 페이지 (class_date, id)
+    CREATE INDEX IF NOT EXISTS schedule_class_date_idx ON schedule (class_date, id);
+    -- 사용자별 활동 로그
+    CREATE INDEX IF NOT EXISTS user_logs_username_idx ON user_logs (username, timestamp DESC);
+    -- users.username, kicked_users.username, word_of_day.date 는 UNIQUE/PK 인덱스를 쓴다
+    """),
+    (3, "내용 주소 업로드 저장소", """
+    CREATE TABLE IF NOT EXISTS blobs (
+        sha256 TEXT PRIMARY KEY,
+        size BIGINT NOT NULL,
+        refcount INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMPTZ DEFAULT now()
+    );
+    ALTER TABLE materials ADD COLUMN IF NOT EXISTS file_name TEXT;
+    ALTER TABLE essays ADD COLUMN IF NOT EXISTS file_name TEXT;
+    """),
+    (4, "전문 검색 컬럼과 GIN 인덱스", """
+    -- 한국어 형태소 사전이 없으므로 'simple' 구성으로 토큰화하고 접두어 검색을 쓴다
+    ALTER TABLE homeworks ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED;
+    ALTER TABLE materials ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED;
+    ALTER TABLE debate_articles ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', coalesce(description, ''))) STORED;
+    ALTER TABLE chat_messages ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', coalesce(message, ''))) STORED;
+    CREATE INDEX IF NOT EXISTS homeworks_search_idx ON homeworks USING gin (search_tsv);
+    CREATE INDEX IF NOT EXISTS materials_search_idx ON materials USING gin (search_tsv);
+    CREATE INDEX IF NOT EXISTS debate_articles_search_idx ON debate_articles USING gin (search_tsv);
+    CREATE INDEX IF NOT EXISTS chat_messages_search_idx ON chat_messages USING gin (search_tsv);
+    """),
+    (5, "채팅/로그 테이블 월별 파티션", """
+    -- 월 파티션 하나 만들기 (이미 있으면 이름만 돌려준다). 경계는 UTC 월 기준
+    CREATE OR REPLACE FUNCTION create_month_partition(parent TEXT, month DATE) RETURNS TEXT AS $fn$
+    DECLARE
+        lo DATE := date_trunc('month', month)::date;
+        part TEXT := parent || '_p' || to_char(lo, 'YYYYMM');
+    BEGIN
+        IF to_regclass(part) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                           part, parent, lo::timestamp AT TIME ZONE 'UTC',
+                           (lo + interval '1 month')::timestamp AT TIME ZONE 'UTC');
+        END IF;
+        RETURN part;
+    END
+    $fn$ LANGUAGE plpgsql;
+
+    -- 기존 테이블을 같은 컬럼의 파티션 테이블로 옮긴다. 기본키는 (id, timestamp),
+    -- timestamp 가 비어 있던 행은 1970-01-01 로 DEFAULT 파티션에 들어간다
+    DO $do$
+    DECLARE
+        t TEXT;
+        old TEXT;
+        seq TEXT;
+        cols TEXT;
+        sel TEXT;
+        m DATE;
+    BEGIN
+        FOREACH t IN ARRAY ARRAY['chat_messages', 'user_logs', 'system_logs'] LOOP
+            CONTINUE WHEN EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = t::regclass);
+            old := t || '_unpartitioned';
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', t, old);
+            EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING GENERATED) '
+                           'PARTITION BY RANGE (timestamp)', t, old);
+            EXECUTE format('ALTER TABLE %I ALTER COLUMN timestamp SET DEFAULT now(), '
+                           'ALTER COLUMN timestamp SET NOT NULL, ADD PRIMARY KEY (id, timestamp)', t);
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', t || '_default', t);
+
+            FOR m IN EXECUTE format(
+                'SELECT DISTINCT date_trunc(''month'', timestamp AT TIME ZONE ''UTC'')::date FROM %I '
+                'WHERE timestamp IS NOT NULL', old)
+            LOOP
+                PERFORM create_month_partition(t, m);
+            END LOOP;
+            FOR i IN 0..2 LOOP
+                PERFORM create_month_partition(t, (date_trunc('month', now() AT TIME ZONE 'UTC')
+                                                   + i * interval '1 month')::date);
+            END LOOP;
+
+            SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position),
+                   string_agg(CASE WHEN column_name = 'timestamp' THEN 'coalesce("timestamp", ''epoch'')'
+                                   ELSE quote_ident(column_name) END, ', ' ORDER BY ordinal_position)
+            INTO cols, sel
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = old AND is_generated = 'NEVER';
+            EXECUTE format('INSERT INTO %I (%s) SELECT %s FROM %I', t, cols, sel, old);
+
+            -- id 시퀀스를 새 테이블로 넘기고 옛 테이블을 지운다
+            seq := pg_get_serial_sequence(old, 'id');
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.id', seq, t);
+            EXECUTE format('DROP TABLE %I', old);
+        END LOOP;
+    END
+    $do$;
+
+    CREATE INDEX IF NOT EXISTS user_logs_timestamp_idx ON user_logs (timestamp DESC);
+    CREATE INDEX IF NOT EXISTS user_logs_username_idx ON user_logs (username, timestamp DESC);
+    CREATE INDEX IF NOT EXISTS system_logs_timestamp_idx ON system_logs (timestamp DESC);
+    CREATE INDEX IF NOT EXISTS chat_messages_search_idx ON chat_messages USING gin (search_tsv);
+
+    -- 떼어내 압축 보관한 월 파티션 기록
+    CREATE TABLE IF NOT EXISTS archived_partitions (
+        table_name TEXT NOT NULL,
+        month DATE NOT NULL,
+        path TEXT NOT NULL,
+        rows BIGINT NOT NULL,
+        archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        restored_at TIMESTAMPTZ,
+        PRIMARY KEY (table_name, month)
+    );
+    """),
+    (6, "아이디 앞글자 검색 인덱스", """
+    -- username LIKE 'abc%' 는 기본 collation 의 UNIQUE 인덱스를 쓰지 못한다
+    CREATE INDEX IF NOT EXISTS users_username_prefix_idx ON users (username text_pattern_ops);
+    """),
+    (7, "에세이 분석 작업 큐", """
+    ALTER TABLE essays
+        ADD COLUMN IF NOT EXISTS word_count INTEGER,
+        ADD COLUMN IF NOT EXISTS sentence_count INTEGER,
+        ADD COLUMN IF NOT EXISTS readability REAL,
+        ADD COLUMN IF NOT EXISTS grade_level REAL,
+        ADD COLUMN IF NOT EXISTS processed_at TIMESTAMPTZ;
+    -- status: queued → running → done / failed
+    CREATE TABLE IF NOT EXISTS essay_jobs (
+        id SERIAL PRIMARY KEY,
+        essay_id INTEGER NOT NULL REFERENCES essays (id) ON DELETE CASCADE,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at TIMESTAMPTZ,
+        finished_at TIMESTAMPTZ
+    );
+    -- 작업자가 훑는 것은 아직 끝나지 않은 작업뿐
+    CREATE INDEX IF NOT EXISTS essay_jobs_pending_idx ON essay_jobs (id) WHERE status IN ('queued', 'running');
+    CREATE INDEX IF NOT EXISTS essay_jobs_essay_idx ON essay_jobs (essay_id);
+    -- 이미 올라온 에세이도 분석한다
+    INSERT INTO essay_jobs (essay_id) SELECT id FROM essays WHERE file_path IS NOT NULL;
+    """),
+    (8, "로그인 세션", """
+    -- id 는 토큰의 sha256. 사용자가 지워지거나 강제탈퇴되면 세션도 함께 지워진다
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        id TEXT PRIMARY KEY,
+        username TEXT NOT NULL REFERENCES users (username) ON DELETE CASCADE,
+        role TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        expires_at TIMESTAMPTZ NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS user_sessions_username_idx ON user_sessions (username);
+    CREATE INDEX IF NOT EXISTS user_sessions_expires_idx ON user_sessions (expires_at);
+    """),
+    (9, "일별 활동 집계", """
+    -- 원본 테이블별, 학생별, 하루 단위 작성 수 (activity.py 가 증분으로 채운다)
+    CREATE TABLE IF NOT EXISTS activity_daily (
+        day DATE NOT NULL,
+        source TEXT NOT NULL,
+        username TEXT NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, source, username)
+    );
+    -- last_id 까지 집계했다. horizon 은 horizon_at 에 본 최대 id 로, 충분히 지난 뒤에 처리한다
+    CREATE TABLE IF NOT EXISTS activity_watermarks (
+        source TEXT PRIMARY KEY,
+        last_id BIGINT NOT NULL DEFAULT 0,
+        horizon BIGINT NOT NULL DEFAULT 0,
+        horizon_at TIMESTAMPTZ NOT NULL DEFAULT 'epoch',
+        refreshed_at TIMESTAMPTZ
+    );
+    """),
+    (10, "DEFAULT 파티션에 들어간 행을 새 월 파티션으로 옮기기", """
+    -- DEFAULT 파티션에 그 달의 행이 있으면 PARTITION OF 가 실패한다. 그때는 같은 트랜잭션에서
+    -- DEFAULT 를 떼고, 파티션을 만들고, 행을 옮기고, 다시 붙인다
+    CREATE OR REPLACE FUNCTION create_month_partition(parent TEXT, month DATE) RETURNS TEXT AS $fn$
+    DECLARE
+        lo DATE := date_trunc('month', month)::date;
+        part TEXT := parent || '_p' || to_char(lo, 'YYYYMM');
+        dflt TEXT := parent || '_default';
+        lo_ts TIMESTAMPTZ := lo::timestamp AT TIME ZONE 'UTC';
+        hi_ts TIMESTAMPTZ := (lo + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+        stray BOOLEAN := false;
+        cols TEXT;
+    BEGIN
+        IF to_regclass(part) IS NOT NULL THEN
+            RETURN part;
+        END IF;
+        IF to_regclass(dflt) IS NOT NULL THEN
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE timestamp >= %L AND timestamp < %L)',
+                           dflt, lo_ts, hi_ts) INTO stray;
+        END IF;
+        IF NOT stray THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                           part, parent, lo_ts, hi_ts);
+            RETURN part;
+        END IF;
+        -- 생성 컬럼(search_tsv)은 옮기지 않고 다시 계산되게 한다
+        SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position) INTO cols
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = parent AND is_generated = 'NEVER';
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, dflt);
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       part, parent, lo_ts, hi_ts);
+        EXECUTE format('WITH moved AS (DELETE FROM %I WHERE timestamp >= %L AND timestamp < %L RETURNING *) '
+                       'INSERT INTO %I (%s) SELECT %s FROM moved',
+                       dflt, lo_ts, hi_ts, part, cols, cols);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', parent, dflt);
+        RETURN part;
+    END
+    $fn$ LANGUAGE plpgsql;
+    """),
+    (11, "로그인 세션의 역할은 users 에서 읽기", """
+    -- 세션에 복사해 둔 역할은 역할 변경 뒤에도 남아 있었다
+    ALTER TABLE user_sessions DROP COLUMN IF EXISTS role;
+    """),
+    (12, "마스터 비밀번호로 받은 역할은 세션에 남기기", """
+    -- users 에 없는 역할(마스터 비밀번호 로그인의 제작자). NULL 이면 users.role 을 쓴다
+    ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS granted_role TEXT;
+    """),
+]
+
+
+def latest():
+    return MIGRATIONS[-1][0]
+
+
+def current_version(cur):
+    try:
+        cur.execute("SELECT coalesce(max(version), 0) FROM schema_version")
+    except psycopg2.errors.UndefinedTable:
+        return 0
+    return cur.fetchone()[0]
+
+
+def migrate(conn):
+    conn.autocommit = True
+    cur = conn.cursor()
+    # 대부분의 시작은 이 한 번의 조회로 끝난다
+    if current_version(cur) >= latest():
+        return []
+    applied = []
+    cur.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMPTZ DEFAULT now()
+            )
+        """)
+        # 잠금을 기다리는 동안 다른 프로세스가 적용했을 수 있다
+        done = current_version(cur)
+        for version, description, sql in MIGRATIONS:
+            if version <= done:
+                continue
+            conn.autocommit = False
+            with conn:
+                with conn.cursor() as mcur:
+                    mcur.execute(sql)
+                    mcur.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                        (version, description)
+                    )
+            conn.autocommit = True
+            applied.append(version)
+    finally:
+        conn.autocommit = True
+        cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+    return applied
+
+
+@st.cache_resource
+def ensure_schema():
+    # 프로세스당 한 번. SQLite 백엔드는 마지막 버전의 스키마로 만들어진다 (sqlite_backend.SCHEMA)
+    if db.backend() == "sqlite":
+        return []
+    with db.connection() as conn:
+        return migrate(conn)
+
+
+if __name__ == "__main__":
+    conn = psycopg2.connect(**db.connect_params())
+    try:
+        applied = migrate(conn)
+    finally:
+        conn.close()
+    print("applied:", applied or "none", "- schema version", latest())
@@ -0,0 +1,114 @@
+import logging
+import select
+import threading
+import time
+
+import psycopg2
+import streamlit as st
+
+import db
+
+# ---------------------------
+# Postgres LISTEN/NOTIFY 수신기
+# ---------------------------
+# 프로세스당 전용 연결 하나로 채널을 LISTEN 하고, 알림이 오면 채널별
+# 시퀀스 번호를 올리고 등록된 콜백을 부른다. 세션들은 자기가 마지막으로 본
+# 시퀀스와 비교해 새 데이터가 있을 때만 DB 를 조회한다.
+
+log = logging.getLogger(__name__)
+
+
+class Listener:
+    def __init__(self, params):
+        self._params = params
+        self._lock = threading.Lock()
+        self._channels = set()
+        self._pending = set()
+        self._seq = {}
+        self._callbacks = {}
+        self.alive = False
+        threading.Thread(target=self._run, name="pg-listener", daemon=True).start()
+
+    def subscribe(self, channel, callback=None):
+        with self._lock:
+            if channel not in self._channels:
+                self._channels.add(channel)
+                self._pending.add(channel)
+            if callback and callback not in self._callbacks.get(channel, []):
+                self._callbacks.setdefault(channel, []).append(callback)
+
+    def seq(self, channel):
+        with self._lock:
+            return self._seq.get(channel, 0)
+
+    def _fire(self, channel, payload):
+        with self._lock:
+            self._seq[channel] = self._seq.get(channel, 0) + 1
+            callbacks = list(self._callbacks.get(channel, []))
+        for cb in callbacks:
+            try:
+                cb(payload)
+            except Exception:
+                log.exception("notify callback failed on %s", channel)
+
+    def _run(self):
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**self._params)
+                conn.autocommit = True
+                cur = conn.cursor()
+                with self._lock:
+                    self._pending = set(self._channels)
+                self.alive = True
+                backoff = 1
+                while True:
+                    with self._lock:
+                        pending, self._pending = self._pending, set()
+                    for ch in pending:
+                        cur.execute(f'LISTEN "{ch}"')
+                        # 연결이 끊겨 있던 동안의 알림은 놓쳤을 수 있으니 한 번 깨운다
+                        self._fire(ch, None)
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        n = conn.notifies.pop(0)
+                        self._fire(n.channel, n.payload)
+            except Exception:
+                log.exception("listener connection lost, retrying in %ss", backoff)
+            finally:
+                self.alive = False
+                if conn is not None:
+                    conn.close()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+class Local(Listener):
+    # SQLite 백엔드: 알림은 같은 프로세스의 pg_notify 호출이 바로 전달한다 (publish)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = set()
+        self._pending = set()
+        self._seq = {}
+        self._callbacks = {}
+        self.alive = True
+
+
+@st.cache_resource
+def get_listener():
+    if db.backend() == "sqlite":
+        return Local()
+    return Listener(db.connect_params())
+
+
+def publish(channel, payload):
+    get_listener()._fire(channel, payload)
+
+
+def subscribe(channel, callback=None):
+    listener = get_listener()
+    listener.subscribe(channel, callback)
+    return listener
@@ -0,0 +1,86 @@
+import streamlit as st
+
+import cache
+
+# ---------------------------
+# 키셋(seek) 페이지네이션 목록
+# ---------------------------
+# OFFSET 대신 "마지막으로 본 정렬 키보다 뒤" 조건으로 다음 페이지를 읽어서
+# 테이블이 50행이든 50만 행이든 한 페이지 비용이 같다.
+# order 의 마지막 컬럼은 유일해야 한다(보통 id).
+# fields 가 labels 보다 많으면 남는 컬럼은 표에 보이지 않고 반환값에만 들어간다.
+# where 는 AND 로 묶을 조건 목록, params 는 그 자리표시자($1, $2 ...) 값이다.
+
+PAGE_SIZE = 20
+
+
+def page_size():
+    return int(st.secrets.get("page_size", PAGE_SIZE))
+
+
+def fetch_page(cur, table, fields, order, desc, after, limit, where=(), params=()):
+    op, direction = ("<", "DESC") if desc else (">", "ASC")
+    keys = ", ".join(order)
+    sql = f"SELECT {', '.join(fields)}, {keys} FROM {table}"
+    conds = list(where)
+    params = list(params)
+    if after is not None:
+        conds.append(f"({keys}) {op} ({', '.join(f'${len(params) + i}' for i in range(1, len(order) + 1))})")
+        params.extend(after)
+    if conds:
+        sql += " WHERE " + " AND ".join(conds)
+    params.append(limit)
+    sql += " ORDER BY " + ", ".join(f"{k} {direction}" for k in order) + f" LIMIT ${len(params)}"
+    return cache.query(cur, (table,), sql, params)
+
+
+def _next(state_key, cursor):
+    st.session_state[state_key].append(cursor)
+
+
+def _prev(state_key):
+    if len(st.session_state[state_key]) > 1:
+        st.session_state[state_key].pop()
+
+
+def _first(state_key):
+    st.session_state[state_key] = [None]
+
+
+def keyset_table(cur, key, table, fields, labels, order=("id",), desc=True, size=None,
+                 where=(), params=(), dataframe=False):
+    size = size or page_size()
+    state_key = f"page:{key}"
+    # 방문한 페이지들의 시작 커서 스택 (첫 페이지는 None). 필터가 바뀌면 처음부터
+    signature = (tuple(where), tuple(params))
+    if st.session_state.get(f"{state_key}:filter") != signature:
+        st.session_state[f"{state_key}:filter"] = signature
+        st.session_state[state_key] = [None]
+    stack = st.session_state.setdefault(state_key, [None])
+
+    rows = fetch_page(cur, table, fields, order, desc, stack[-1], size + 1, where, params)
+    has_next = len(rows) > size
+    rows = rows[:size]
+    n = len(order)
+
+    import pandas as pd  # 목록이 있는 페이지에 처음 들어갈 때만 불러온다
+    visible = [r[:-n] for r in rows]
+    df = pd.DataFrame([r[:len(labels)] for r in visible], columns=labels)
+    if dataframe:
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    else:
+        st.table(df)
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        st.button("◀ 이전", key=f"{state_key}:prev", on_click=_prev, args=(state_key,),
+                  disabled=len(stack) == 1)
+    with col2:
+        st.button("다음 ▶", key=f"{state_key}:next", on_click=_next,
+                  args=(state_key, tuple(rows[-1][-n:]) if rows else None),
+                  disabled=not has_next)
+    with col3:
+        if len(stack) > 1:
+            st.button("처음으로", key=f"{state_key}:first", on_click=_first, args=(state_key,))
+            st.caption(f"{len(stack)} 페이지")
+    return visible
@@ -0,0 +1,222 @@
+import gzip
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from datetime import date, datetime, timezone
+
+import streamlit as st
+
+import cache
+import db
+import storage
+
+# ---------------------------
+# 월별 파티션 관리와 오래된 기록 보관
+# ---------------------------
+# chat_messages / user_logs / system_logs 는 timestamp 기준 월 파티션이다 (마이그레이션 5).
+# 백그라운드 스레드가 하루에 한 번 다음 몇 달의 파티션을 미리 만들고,
+# retention_months 보다 오래된 달은 떼어내(DETACH) CSV.gz 로 업로드 저장소(storage 백엔드)의
+#   archive/<table>/YYYYMM-<보관 시각>-<임의값>.csv.gz
+# 에 쓴 뒤 지운다. 그래서 공유 저장소를 쓰면 다른 레플리카에서도 복원할 수 있다.
+# 관리 페이지에서 보관된 달을 다시 붙일(restore) 수 있다.
+# 되살린 달은 restore_keep_days 동안 다시 보관하지 않는다.
+# archived_partitions.path 가 storage 키가 아닌 예전 기록은 로컬 파일 경로로 읽는다.
+
+log = logging.getLogger(__name__)
+
+TABLES = ("chat_messages", "user_logs", "system_logs")
+RETENTION_MONTHS = 12
+RESTORE_KEEP_DAYS = 7
+INTERVAL = 24 * 3600
+AHEAD = 2
+LOCK_KEY = 0x50617274  # "Part"
+
+_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def _settings():
+    return {
+        "retention": int(st.secrets.get("retention_months", RETENTION_MONTHS)),
+        "keep_days": int(st.secrets.get("restore_keep_days", RESTORE_KEEP_DAYS)),
+    }
+
+
+def _add_months(month, n):
+    m = month.month - 1 + n
+    return date(month.year + m // 12, m % 12 + 1, 1)
+
+
+def _this_month():
+    now = datetime.now(timezone.utc)
+    return date(now.year, now.month, 1)
+
+
+def archive_key(table, month):
+    # 같은 달을 복원 후 다시 보관해도 이전 파일을 덮어쓰지 않도록 보관 시각을 붙인다
+    stamp = f"{datetime.now(timezone.utc):%Y%m%d%H%M%S}-{secrets.token_hex(4)}"
+    return f"{storage.ARCHIVE}{table}/{month:%Y%m}-{stamp}.csv.gz"
+
+
+def _open_archive(backend, path):
+    if path.startswith(storage.ARCHIVE):
+        return backend.open(path)
+    return open(path, "rb")
+
+
+def columns(cur, table):
+    # 생성 컬럼(search_tsv)은 COPY 대상에서 뺀다
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+    """, (table,))
+    return [r[0] for r in cur.fetchall()]
+
+
+def partitions(cur, table):
+    # [(월, 파티션 이름, 대략의 행 수)] 오래된 달부터. DEFAULT 파티션은 빠진다
+    cur.execute("""
+        SELECT c.relname, c.reltuples::bigint FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+    """, (table,))
+    out = []
+    for name, rows in cur.fetchall():
+        m = _SUFFIX.search(name)
+        if m:
+            out.append((date(int(m.group(1)), int(m.group(2)), 1), name, max(rows, 0)))
+    return sorted(out)
+
+
+def ensure(cur, ahead=AHEAD):
+    # 이번 달부터 ahead 달 뒤까지 파티션을 만들어 둔다
+    start = _this_month()
+    for table in TABLES:
+        for i in range(ahead + 1):
+            cur.execute("SELECT create_month_partition(%s, %s)", (table, _add_months(start, i)))
+
+
+def _quoted(cols):
+    return ", ".join(f'"{c}"' for c in cols)
+
+
+def archive(conn, table, month, backend):
+    # 한 트랜잭션에서 떼어내기 → 파일 쓰기 → 기록 → 삭제. 중간에 실패하면 파티션은 그대로 남는다
+    part = f"{table}_p{month:%Y%m}"
+    key = archive_key(table, month)
+    fd, tmp = backend.spool()
+    try:
+        with db.transaction(conn) as cur:
+            cols = columns(cur, table)
+            cur.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{part}"')
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                cur.copy_expert(f'COPY "{part}" ({_quoted(cols)}) TO STDOUT WITH (FORMAT csv, HEADER)', f)
+            rows = cur.rowcount
+            # 기록이 커밋되기 전에 파일이 먼저 있어야 한다
+            backend.put(tmp, key)
+            cur.execute("""
+                INSERT INTO archived_partitions (table_name, month, path, rows) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (table_name, month) DO UPDATE
+                SET path = EXCLUDED.path, rows = EXCLUDED.rows, archived_at = now(), restored_at = NULL
+            """, (table, month, key, rows))
+            cur.execute(f'DROP TABLE "{part}"')
+            cache.invalidate(table, cur=cur)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return rows
+
+
+def restore(conn, table, month, backend=None):
+    # 보관 파일을 같은 달 파티션으로 다시 불러온다
+    backend = backend or storage.get_backend()
+    with db.transaction(conn) as cur:
+        cur.execute("""
+            SELECT path FROM archived_partitions
+            WHERE table_name = %s AND month = %s AND restored_at IS NULL FOR UPDATE
+        """, (table, month))
+        row = cur.fetchone()
+        if row is None:
+            raise ValueError(f"{table} {month:%Y-%m} 는 보관된 기록이 없습니다.")
+        cur.execute("SELECT create_month_partition(%s, %s)", (table, month))
+        part = cur.fetchone()[0]
+        with _open_archive(backend, row[0]) as raw, gzip.GzipFile(fileobj=raw, mode="rb") as f:
+            header = f.readline().decode().strip().split(",")
+            cur.copy_expert(f'COPY "{part}" ({_quoted(header)}) FROM STDIN WITH (FORMAT csv)', f)
+        rows = cur.rowcount
+        cur.execute("UPDATE archived_partitions SET restored_at = now() WHERE table_name = %s AND month = %s",
+                    (table, month))
+        cache.invalidate(table, cur=cur)
+    return rows
+
+
+def archived(cur):
+    cur.execute("""
+        SELECT table_name, month, rows, archived_at, restored_at, path FROM archived_partitions
+        ORDER BY month DESC, table_name
+    """)
+    return cur.fetchall()
+
+
+def run(conn, retention, keep_days, backend):
+    # 파티션 준비와 보관을 한 번 수행하고 [(table, month, rows)] 를 돌려준다.
+    # 여러 프로세스가 동시에 돌지 않도록 advisory lock 을 잡지 못하면 건너뛴다
+    cutoff = _add_months(_this_month(), -retention)
+    done = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (LOCK_KEY,))
+        if not cur.fetchone()[0]:
+            return done
+        try:
+            ensure(cur)
+            cur.execute("""
+                SELECT table_name, month FROM archived_partitions
+                WHERE restored_at > now() - make_interval(days => %s)
+            """, (keep_days,))
+            recent = set(cur.fetchall())
+            for table in TABLES:
+                for month, _, _ in partitions(cur, table):
+                    if month >= cutoff or (table, month) in recent:
+                        continue
+                    done.append((table, month, archive(conn, table, month, backend)))
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+    return done
+
+
+class Maintenance:
+    def __init__(self, settings, interval):
+        self._settings = settings
+        self._interval = interval
+        self.last_run = None
+        self.last_result = []
+        self._thread = threading.Thread(target=self._run, name="partition-maint", daemon=True)
+        self._thread.start()
+
+    def run_once(self):
+        import audit  # audit 를 쓰는 쪽에서만 불러온다
+        with db.connection() as conn:
+            result = run(conn, backend=storage.get_backend(), **self._settings)
+        self.last_run = datetime.now(timezone.utc)
+        self.last_result = result
+        for table, month, rows in result:
+            audit.system_event("ARCHIVE", f"{table} {month:%Y-%m} {rows}행 보관")
+        return result
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("partition maintenance failed")
+            time.sleep(self._interval)
+
+
+@st.cache_resource
+def get_maintenance():
+    # 월 파티션은 Postgres 에만 있다
+    if db.backend() == "sqlite":
+        return None
+    return Maintenance(_settings(), float(st.secrets.get("partition_interval", INTERVAL)))
@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+# ---------------------------
+# 쿼리/재실행 성능 기록
+# ---------------------------
+# db.Cursor 가 문장마다 (SQL, 소요 시간, 행 수, 호출 페이지) 를 record 로 넘긴다.
+# 최근 BUFFER 개만 링 버퍼에 두고, 관리 페이지의 "성능" 탭이 여기서 느린 쿼리와
+# 분포를 계산한다. FLUSH_INTERVAL 마다 요약을 system_logs(PERF) 에 남긴다.
+
+log = logging.getLogger(__name__)
+
+BUFFER = 5000
+FLUSH_INTERVAL = 300.0
+SQL_CHARS = 300
+# 히스토그램 구간 상한 (ms)
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+_local = threading.local()
+
+
+def set_page(page):
+    # 이 스레드(세션의 스크립트 스레드)에서 나가는 문장을 page 로 기록한다
+    _local.page = page
+
+
+def current_page():
+    return getattr(_local, "page", None) or "(백그라운드)"
+
+
+def normalize(query):
+    if isinstance(query, bytes):
+        query = query[:SQL_CHARS * 2].decode("utf-8", "replace")
+    elif not isinstance(query, str):
+        query = str(query)
+    return " ".join(query[:SQL_CHARS * 2].split())[:SQL_CHARS]
+
+
+class Profiler:
+    def __init__(self, size=BUFFER):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+        self._recorded = 0
+        self._flushed = 0
+        self._thread = None
+
+    def record(self, sql, seconds, rows):
+        with self._lock:
+            self._samples.append((time.time(), current_page(), sql, seconds, rows))
+            self._recorded += 1
+
+    def samples(self):
+        with self._lock:
+            return list(self._samples)
+
+    def resize(self, size):
+        with self._lock:
+            if size != self._samples.maxlen:
+                self._samples = deque(self._samples, maxlen=size)
+
+    def start(self, interval):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, args=(interval,),
+                                            name="perf-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                log.exception("perf flush failed")
+
+    def flush(self, top=5):
+        # 지난 기록 이후 새로 쌓인 표본의 요약을 시스템 로그로
+        import audit  # audit → db → profiler 순환을 피해 늦게 불러온다
+        with self._lock:
+            fresh = self._recorded - self._flushed
+            self._flushed = self._recorded
+            samples = list(self._samples)[-fresh:] if fresh else []
+        if not samples:
+            return
+        times = sorted(s[3] for s in samples)
+        audit.system_event("PERF", f"{len(samples)} statements, p50 {_ms(_pick(times, 0.5))} ms, "
+                                   f"p95 {_ms(_pick(times, 0.95))} ms, max {_ms(times[-1])} ms")
+        for row in slowest(samples, top):
+            audit.system_event("PERF", f"[{row['page']}] {row['calls']}회 p95 {row['p95_ms']} ms "
+                                       f"max {row['max_ms']} ms: {row['sql']}")
+
+
+def _ms(seconds):
+    return round(1000 * seconds, 1)
+
+
+def _pick(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+def slowest(samples, n=10):
+    # SQL 별로 묶어 p95 가 큰 순서
+    groups = {}
+    for _, page, sql, seconds, rows in samples:
+        g = groups.setdefault(sql, {"times": [], "rows": 0, "pages": {}})
+        g["times"].append(seconds)
+        g["rows"] += max(rows, 0)
+        g["pages"][page] = g["pages"].get(page, 0) + 1
+    out = []
+    for sql, g in groups.items():
+        times = sorted(g["times"])
+        out.append({
+            "sql": sql,
+            "page": max(g["pages"], key=g["pages"].get),
+            "calls": len(times),
+            "avg_ms": _ms(sum(times) / len(times)),
+            "p95_ms": _ms(_pick(times, 0.95)),
+            "max_ms": _ms(times[-1]),
+            "avg_rows": round(g["rows"] / len(times), 1),
+        })
+    out.sort(key=lambda r: (r["p95_ms"], r["calls"]), reverse=True)
+    return out[:n]
+
+
+def histogram(seconds_list):
+    # (구간 이름, 개수) 목록. 마지막 구간은 상한 초과
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for s in seconds_list:
+        ms = 1000 * s
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        counts[i] += 1
+    labels = [f"≤{b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+    return list(zip(labels, counts))
+
+
+_profiler = Profiler()
+
+
+def record(sql, seconds, rows):
+    _profiler.record(sql, seconds, rows)
+
+
+def samples():
+    return _profiler.samples()
+
+
+def start():
+    # 재실행마다 불러도 된다. 버퍼 크기 반영과 기록 스레드 시작은 한 번만 일어난다
+    _profiler.resize(int(st.secrets.get("perf_buffer", BUFFER)))
+    _profiler.start(float(st.secrets.get("perf_flush_interval", FLUSH_INTERVAL)))
+
+
+def flush():
+    _profiler.flush()
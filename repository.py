@@ -0,0 +1,479 @@
+from datetime import datetime
+
+import cache
+import db
+
+# ---------------------------
+# 테이블별 데이터 접근
+# ---------------------------
+# 페이지 코드는 SQL 대신 여기의 메서드를 부른다. 모든 문장은 db.execute 로
+# 연결마다 한 번만 PREPARE 된다. 한 행짜리 결과는 __slots__ 행 객체로,
+# 표로 그릴 결과는 튜플 그대로 돌려준다. 쓰기는 해당 테이블의 캐시를 무효화한다.
+# 여기의 SQL 은 Postgres 용이다. SQLite 백엔드에서 그대로 쓸 수 없는 메서드는
+# sqlite_backend 가 하위 클래스로 다시 구현하고, 같은 클래스 이름으로 만들면 그쪽이 생긴다.
+
+
+class Row:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class User(Row):
+    __slots__ = ("username", "role")
+
+
+class ChatMessage(Row):
+    __slots__ = ("id", "username", "message", "timestamp")
+
+
+class Book(Row):
+    __slots__ = ("week_of", "book_title", "debate_topic", "posted_by")
+
+
+class Word(Row):
+    __slots__ = ("date", "word", "definition")
+
+
+class Announcement(Row):
+    __slots__ = ("content", "posted_by", "timestamp")
+
+
+# 방언별 구현: {방언: {기본 클래스: 그 방언용 하위 클래스}} (sqlite_backend 가 채운다)
+OVERRIDES = {}
+
+
+class Table:
+    name = None
+
+    def __new__(cls, cur):
+        # 커서의 방언에 맞는 구현이 있으면 그것을 만든다
+        impl = OVERRIDES.get(db.dialect(cur), {}).get(cls, cls)
+        return super().__new__(impl)
+
+    def __init__(self, cur):
+        self.cur = cur
+
+    def _run(self, sql, params=()):
+        return db.execute(self.cur, sql, params)
+
+    def _write(self, sql, params=(), *tables):
+        rows = self._run(sql, params)
+        cache.invalidate(self.name, *tables, cur=self.cur)
+        return rows
+
+
+class Users(Table):
+    name = "users"
+
+    def credentials(self, username):
+        # (역할, 저장된 비밀번호, 강제탈퇴 사유). 없는 아이디면 앞의 둘이 None
+        rows = self._run("""
+            SELECT u.role, u.password, k.reason
+            FROM (SELECT $1::text AS username) q
+            LEFT JOIN users u ON u.username = q.username
+            LEFT JOIN kicked_users k ON k.username = q.username
+        """, (username,))
+        return rows[0]
+
+    def create(self, username, password):
+        # 이미 있는 아이디면 False (예외 없이)
+        rows = self._write("""
+            INSERT INTO users (username, password) VALUES ($1, $2) ON CONFLICT (username) DO NOTHING RETURNING 1
+        """, (username, password))
+        return bool(rows)
+
+    def set_password(self, username, password):
+        self._write("UPDATE users SET password = $2 WHERE username = $1", (username, password))
+
+    def set_roles(self, usernames, role):
+        rows = self._write("UPDATE users SET role = $1 WHERE username = ANY($2::text[]) RETURNING username",
+                           (role, list(usernames)))
+        return [r[0] for r in rows]
+
+    def delete_many(self, usernames):
+        rows = self._write("DELETE FROM users WHERE username = ANY($1::text[]) RETURNING username",
+                           (list(usernames),))
+        return [r[0] for r in rows]
+
+
+class KickedUsers(Table):
+    name = "kicked_users"
+
+    def all(self):
+        return dict(self._run("SELECT username, reason FROM kicked_users"))
+
+    def add_many(self, usernames, reason, channel):
+        self._write("""
+            WITH up AS (
+                INSERT INTO kicked_users (username, reason) SELECT unnest($1::text[]), $2
+                ON CONFLICT (username) DO UPDATE SET reason = EXCLUDED.reason, kicked_at = now()
+                RETURNING 1
+            )
+            SELECT pg_notify($3, count(*)::text) FROM up
+        """, (list(usernames), reason, channel))
+
+
+class UserSessions(Table):
+    name = "user_sessions"
+
+    def add(self, session_id, username, days, granted_role=None):
+        # 만료된 세션 정리도 같은 왕복에서 (expires_at 인덱스)
+        self._run("""
+            WITH gone AS (DELETE FROM user_sessions WHERE expires_at < now())
+            INSERT INTO user_sessions (id, username, granted_role, expires_at)
+            VALUES ($1, $2, $3, now() + make_interval(days => $4))
+        """, (session_id, username, granted_role, days))
+
+    # 역할은 세션에 복사하지 않고 매번 users 에서 읽는다 (역할 변경이 바로 반영되도록).
+    # 마스터 비밀번호로 받은 역할(granted_role)만 세션에 남는다
+    LOOKUP = """
+        SELECT u.username, coalesce(s.granted_role, u.role)
+        FROM user_sessions s JOIN users u ON u.username = s.username
+        WHERE s.id = $1 AND s.expires_at > now()
+    """
+
+    def get(self, session_id, days):
+        # 쓰이는 세션은 수명의 절반이 지나면 days 일로 다시 늘린다 (조회와 같은 왕복에서)
+        rows = self._run(f"""
+            WITH touched AS (
+                UPDATE user_sessions SET expires_at = now() + make_interval(days => $2)
+                WHERE id = $1 AND expires_at > now() AND expires_at < now() + make_interval(secs => $2 * 43200)
+            )
+            {self.LOOKUP}
+        """, (session_id, days))
+        return User(*rows[0]) if rows else None
+
+    def rotate(self, old_id, new_id, days, grace):
+        # 같은 사용자로 새 세션을 만들고 이전 세션은 grace 초 뒤 만료시킨다
+        self._run("""
+            WITH old AS (
+                UPDATE user_sessions SET expires_at = least(expires_at, now() + make_interval(secs => $4))
+                WHERE id = $1 AND expires_at > now() RETURNING username, granted_role
+            )
+            INSERT INTO user_sessions (id, username, granted_role, expires_at)
+            SELECT $2, username, granted_role, now() + make_interval(days => $3) FROM old
+        """, (old_id, new_id, days, grace))
+
+    def delete(self, session_id):
+        self._run("DELETE FROM user_sessions WHERE id = $1", (session_id,))
+
+
+class ChatMessages(Table):
+    name = "chat_messages"
+
+    def post(self, username, message, channel):
+        # INSERT 와 NOTIFY 를 한 번의 왕복으로
+        self._run("""
+            WITH ins AS (
+                INSERT INTO chat_messages (username, message, timestamp) VALUES ($1, $2, $3) RETURNING id
+            )
+            SELECT pg_notify($4, id::text) FROM ins
+        """, (username, message, datetime.utcnow(), channel))
+
+    def newest_after(self, last_id, limit):
+        rows = self._run("""
+            SELECT id, username, message, timestamp FROM chat_messages
+            WHERE id > $1 ORDER BY id DESC LIMIT $2
+        """, (last_id, limit))
+        return [ChatMessage(*r) for r in reversed(rows)]
+
+
+class Content(Table):
+    # 콘텐츠 관리 화면에서 쓰는 컬럼 정보
+    author = None
+    text = ()
+    file = None
+
+    def delete_many(self, ids):
+        # 지운 행의 첨부파일 키 목록을 돌려준다
+        rows = self._write(f"DELETE FROM {self.name} WHERE id = ANY($1::int[]) RETURNING {self.file or 'NULL'}",
+                           (list(ids),))
+        return [r[0] for r in rows if r[0]]
+
+
+class Homeworks(Content):
+    name = "homeworks"
+    author = "posted_by"
+    text = ("title", "description")
+
+    def add(self, title, description, due_date, posted_by):
+        self._write("""
+            INSERT INTO homeworks (title, description, due_date, posted_by, timestamp)
+            VALUES ($1, $2, $3, $4, $5)
+        """, (title, description, due_date, posted_by, datetime.utcnow()))
+
+
+class CurrentBook(Table):
+    name = "current_book"
+
+    def add(self, book_title, week_of, debate_topic, posted_by):
+        self._write("""
+            INSERT INTO current_book (book_title, week_of, debate_topic, posted_by, timestamp)
+            VALUES ($1, $2, $3, $4, $5)
+        """, (book_title, week_of, debate_topic, posted_by, datetime.utcnow()))
+
+    def latest(self):
+        rows = cache.query(self.cur, (self.name,), """
+            SELECT week_of, book_title, debate_topic, posted_by FROM current_book ORDER BY id DESC LIMIT 1
+        """)
+        return Book(*rows[0]) if rows else None
+
+
+class Tools(Table):
+    name = "tools"
+
+    def add(self, name, url, description, added_by):
+        self._write("""
+            INSERT INTO tools (name, url, description, added_by, timestamp) VALUES ($1, $2, $3, $4, $5)
+        """, (name, url, description, added_by, datetime.utcnow()))
+
+
+class WordOfDay(Table):
+    name = "word_of_day"
+
+    def add(self, word, definition, day):
+        self._write("""
+            INSERT INTO word_of_day (word, definition, date) VALUES ($1, $2, $3) ON CONFLICT (date) DO NOTHING
+        """, (word, definition, day))
+
+    def between(self, start, end):
+        # word_of_day.date UNIQUE 인덱스 범위 조회
+        return cache.query(self.cur, (self.name,), """
+            SELECT date, word, definition FROM word_of_day WHERE date BETWEEN $1 AND $2 ORDER BY date
+        """, (start, end))
+
+    def on(self, day, ttl=None):
+        rows = cache.query(self.cur, (self.name,), """
+            SELECT date, word, definition FROM word_of_day WHERE date = $1
+        """, (day,), ttl=ttl)
+        return Word(*rows[0]) if rows else None
+
+
+class Schedule(Table):
+    name = "schedule"
+
+    def add(self, class_date, content):
+        self._write("INSERT INTO schedule (class_date, content) VALUES ($1, $2)", (class_date, content))
+
+    def between(self, start, end):
+        # (class_date, id) 인덱스 범위 조회
+        return cache.query(self.cur, (self.name,), """
+            SELECT class_date, content FROM schedule WHERE class_date BETWEEN $1 AND $2 ORDER BY class_date, id
+        """, (start, end))
+
+
+class Materials(Content):
+    name = "materials"
+    author = "uploaded_by"
+    text = ("title", "description")
+    file = "file_url"
+
+    def add(self, title, description, file_url, file_name, uploaded_by):
+        self._write("""
+            INSERT INTO materials (title, description, file_url, file_name, uploaded_by, timestamp)
+            VALUES ($1, $2, $3, $4, $5, $6)
+        """, (title, description, file_url, file_name, uploaded_by, datetime.utcnow()))
+
+
+class Essays(Content):
+    name = "essays"
+    author = "uploaded_by"
+    text = ("title",)
+    file = "file_path"
+
+    def add(self, title, file_path, file_name, uploaded_by, channel):
+        # 에세이와 분석 작업을 함께 넣고 작업자를 깨운다 (분석은 기다리지 않는다)
+        self._write("""
+            WITH e AS (
+                INSERT INTO essays (title, file_path, file_name, uploaded_by, timestamp)
+                VALUES ($1, $2, $3, $4, $5) RETURNING id
+            ), j AS (
+                INSERT INTO essay_jobs (essay_id) SELECT id FROM e RETURNING id
+            )
+            SELECT pg_notify($6, id::text) FROM j
+        """, (title, file_path, file_name, uploaded_by, datetime.utcnow(), channel), "essay_jobs")
+
+
+class EssayJob(Row):
+    __slots__ = ("id", "essay_id", "file_path", "file_name", "attempts")
+
+
+class EssayJobs(Table):
+    name = "essay_jobs"
+
+    def claim(self, limit, stale_seconds):
+        # 대기 중인 작업(또는 작업자가 죽어 오래 running 인 작업)을 다른 작업자와 겹치지 않게 가져온다
+        rows = self._run("""
+            UPDATE essay_jobs j SET status = 'running', attempts = j.attempts + 1, started_at = now()
+            FROM essays e
+            WHERE e.id = j.essay_id AND j.id IN (
+                SELECT id FROM essay_jobs
+                WHERE status = 'queued'
+                   OR (status = 'running' AND started_at < now() - make_interval(secs => $2))
+                ORDER BY id LIMIT $1 FOR UPDATE SKIP LOCKED
+            )
+            RETURNING j.id, j.essay_id, e.file_path, e.file_name, j.attempts
+        """, (limit, stale_seconds))
+        return [EssayJob(*r) for r in rows]
+
+    def finish(self, job_id, result, channel):
+        self._write("""
+            WITH j AS (
+                UPDATE essay_jobs SET status = 'done', error = NULL, finished_at = now()
+                WHERE id = $1 RETURNING essay_id
+            ), e AS (
+                UPDATE essays SET word_count = $2, sentence_count = $3, readability = $4, grade_level = $5,
+                                  processed_at = now()
+                WHERE id IN (SELECT essay_id FROM j) RETURNING id
+            )
+            SELECT pg_notify($6, id::text) FROM e
+        """, (job_id, result["word_count"], result["sentence_count"], result["readability"],
+              result["grade_level"], channel), "essays")
+
+    def fail(self, job_id, error, retry, channel):
+        self._write("""
+            WITH j AS (
+                UPDATE essay_jobs SET status = $2, error = $3, finished_at = now()
+                WHERE id = $1 RETURNING essay_id
+            )
+            SELECT pg_notify($4, essay_id::text) FROM j
+        """, (job_id, "queued" if retry else "failed", error, channel))
+
+
+class NewberyBooks(Table):
+    name = "newbery_books"
+
+    def rate(self, title, rating, rated_by):
+        # 원본 평점 저장과 도서별 집계(newbery_ratings) 갱신을 한 문장으로
+        self._write("""
+            WITH ins AS (
+                INSERT INTO newbery_books (title, rating, rated_by, timestamp) VALUES ($1, $2, $3, $4)
+                RETURNING title, rating
+            )
+            INSERT INTO newbery_ratings AS r (title, rating_count, rating_sum, r1, r2, r3, r4, r5)
+            SELECT title, 1, rating, (rating = 1)::int, (rating = 2)::int, (rating = 3)::int,
+                   (rating = 4)::int, (rating = 5)::int
+            FROM ins
+            ON CONFLICT (title) DO UPDATE SET
+                rating_count = r.rating_count + 1,
+                rating_sum   = r.rating_sum + EXCLUDED.rating_sum,
+                r1 = r.r1 + EXCLUDED.r1, r2 = r.r2 + EXCLUDED.r2, r3 = r.r3 + EXCLUDED.r3,
+                r4 = r.r4 + EXCLUDED.r4, r5 = r.r5 + EXCLUDED.r5,
+                updated_at   = now()
+        """, (title, rating, rated_by, datetime.utcnow()), "newbery_ratings")
+
+
+class DebateArticles(Content):
+    name = "debate_articles"
+    author = "shared_by"
+    text = ("url", "description")
+
+    def add(self, url, description, shared_by):
+        self._write("""
+            INSERT INTO debate_articles (url, description, shared_by, timestamp) VALUES ($1, $2, $3, $4)
+        """, (url, description, shared_by, datetime.utcnow()))
+
+
+class Announcements(Table):
+    name = "announcements"
+
+    def add(self, content, posted_by, channel):
+        self._write("""
+            WITH ins AS (
+                INSERT INTO announcements (content, posted_by, timestamp) VALUES ($1, $2, $3) RETURNING id
+            )
+            SELECT pg_notify($4, id::text) FROM ins
+        """, (content, posted_by, datetime.utcnow(), channel))
+
+    def recent(self, limit=5):
+        rows = self._run("SELECT content, posted_by, timestamp FROM announcements ORDER BY timestamp DESC LIMIT $1",
+                         (limit,))
+        return [Announcement(*r) for r in rows]
+
+
+class SiteSettings(Table):
+    name = "site_settings"
+
+    def all(self):
+        return dict(self._run("SELECT setting_key, setting_value FROM site_settings"))
+
+    def save(self, values, channel):
+        # 여러 키를 한 문장으로 upsert 하고 같은 왕복에서 알린다
+        self._write("""
+            WITH up AS (
+                INSERT INTO site_settings (setting_key, setting_value, updated_at)
+                SELECT k, v, now() FROM unnest($1::text[], $2::text[]) AS s (k, v)
+                ON CONFLICT (setting_key) DO UPDATE
+                SET setting_value = EXCLUDED.setting_value, updated_at = EXCLUDED.updated_at
+                RETURNING 1
+            )
+            SELECT pg_notify($3, count(*)::text) FROM up
+        """, (list(values), list(values.values()), channel))
+
+
+class UserLogs(Table):
+    name = "user_logs"
+
+    def recent(self, limit=100):
+        return self._run("SELECT username, action, timestamp FROM user_logs ORDER BY timestamp DESC LIMIT $1",
+                         (limit,))
+
+
+class SystemLogs(Table):
+    name = "system_logs"
+
+    def recent(self, limit=100):
+        return self._run("SELECT timestamp, level, message FROM system_logs ORDER BY timestamp DESC LIMIT $1",
+                         (limit,))
+
+
+class ActivityDaily(Table):
+    name = "activity_daily"
+
+    # 기간의 날짜 수 x 학생 수 만큼만 읽는다 (PK 의 day 범위)
+    def by_day(self, start):
+        return cache.query(self.cur, (self.name,), """
+            SELECT day, source, sum(n)::int FROM activity_daily WHERE day >= $1 GROUP BY day, source ORDER BY day
+        """, (start,))
+
+    def by_user(self, start):
+        return cache.query(self.cur, (self.name,), """
+            SELECT username, source, sum(n)::int FROM activity_daily WHERE day >= $1 GROUP BY username, source
+        """, (start,))
+
+    def watermarks(self):
+        return self._run("SELECT source, last_id, horizon, refreshed_at FROM activity_watermarks ORDER BY source")
+
+
+class Repository:
+    # 재실행마다 커서 하나로 묶어 쓰는 진입점
+    def __init__(self, cur):
+        self.users = Users(cur)
+        self.kicked_users = KickedUsers(cur)
+        self.user_sessions = UserSessions(cur)
+        self.chat_messages = ChatMessages(cur)
+        self.homeworks = Homeworks(cur)
+        self.current_book = CurrentBook(cur)
+        self.tools = Tools(cur)
+        self.word_of_day = WordOfDay(cur)
+        self.schedule = Schedule(cur)
+        self.materials = Materials(cur)
+        self.essays = Essays(cur)
+        self.essay_jobs = EssayJobs(cur)
+        self.newbery_books = NewberyBooks(cur)
+        self.debate_articles = DebateArticles(cur)
+        self.announcements = Announcements(cur)
+        self.site_settings = SiteSettings(cur)
+        self.user_logs = UserLogs(cur)
+        self.system_logs = SystemLogs(cur)
+        self.activity_daily = ActivityDaily(cur)
@@ -0,0 +1,72 @@
+import re
+
+import db
+
+# ---------------------------
+# 전체 검색
+# ---------------------------
+# 테이블마다 search_tsv(GIN) 로 순위를 매긴 상위 결과를 UNION ALL 로 묶어 한 문장으로
+# 조회하고 점수 순으로 합친다. 재실행이 이미 쥔 커서를 쓰므로 연결을 더 빌리지 않는다.
+# 검색어 각 단어는 접두어로 맞춘다 ("hol" → "holes").
+# SQLite 백엔드에는 search_tsv 가 없어서 모든 단어를 LIKE 로 찾고 점수 없이 최신 순으로 돌려준다.
+
+LIMIT = 30
+
+# 구분: (테이블, 제목, 본문, 작성자, 시간)
+SOURCES = {
+    "과제": ("homeworks", "title", "description", "posted_by", "timestamp"),
+    "학습 자료": ("materials", "title", "description", "uploaded_by", "timestamp"),
+    "토론 기사": ("debate_articles", "url", "description", "shared_by", "timestamp"),
+    "채팅": ("chat_messages", "NULL", "message", "username", "timestamp"),
+}
+
+
+def to_tsquery(text):
+    terms = re.findall(r"\w+", text.lower())
+    return " & ".join(f"{t}:*" for t in terms)
+
+
+def _branch(kind, limit):
+    # Postgres: $1 = tsquery
+    table, title, body, author, ts = SOURCES[kind]
+    return f"""
+        SELECT '{kind}' AS kind, {title} AS title, left({body}, 200) AS body, {author} AS author, {ts} AS ts,
+               ts_rank(search_tsv, q) AS rank
+        FROM {table}, to_tsquery('simple', $1) q
+        WHERE search_tsv @@ q
+        ORDER BY rank DESC, id DESC
+        LIMIT {limit}
+    """
+
+
+def _like_branch(kind, n_terms, limit):
+    # SQLite: $1..$n = '%단어%'
+    table, title, body, author, ts = SOURCES[kind]
+    text = f"lower(coalesce({title}, '') || ' ' || coalesce({body}, ''))"
+    where = " AND ".join(f"{text} LIKE ${i}" for i in range(1, n_terms + 1))
+    return f"""
+        SELECT '{kind}' AS kind, {title} AS title, substr({body}, 1, 200) AS body, {author} AS author, {ts} AS ts,
+               0.0 AS rank
+        FROM {table}
+        WHERE {where}
+        ORDER BY id DESC
+        LIMIT {limit}
+    """
+
+
+def search(cur, text, kinds=None, limit=LIMIT):
+    tsquery = to_tsquery(text)
+    if not tsquery:
+        return []
+    kinds = [k for k in SOURCES if k in (kinds or SOURCES)]
+    limit = int(limit)
+    if db.dialect(cur) == "sqlite":
+        params = [f"%{t}%" for t in re.findall(r"(\w+):\*", tsquery)]
+        branches = [_like_branch(k, len(params), limit) for k in kinds]
+    else:
+        params = [tsquery]
+        branches = [_branch(k, limit) for k in kinds]
+    # 괄호 대신 하위 쿼리로 감싸야 SQLite 에서도 가지마다 ORDER BY/LIMIT 를 쓸 수 있다
+    union = " UNION ALL ".join(f"SELECT * FROM ({b}) s{i}" for i, b in enumerate(branches))
+    rows = db.execute(cur, f"{union} ORDER BY rank DESC, ts DESC LIMIT {limit}", params)
+    return [tuple(r) for r in rows]
@@ -0,0 +1,165 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+import db
+
+# ---------------------------
+# 로그인 세션 토큰
+# ---------------------------
+# 로그인하면 "<id>.<서명>" 토큰을 URL 의 ?session= 에 두고 user_sessions 에는 id 의 sha256 만
+# 저장한다. 웹소켓이 다시 연결되거나 새로고침으로 st.session_state 가 비어도, 다른 프로세스
+# (레플리카)로 붙어도 같은 토큰으로 로그인이 이어진다. 서명이 틀린 토큰은 DB 에 가지 않고
+# 버리고, 조회 결과는 프로세스 안에 CACHE_TTL 초 보관한다. 그래서 로그아웃/강제탈퇴/역할
+# 변경이 다른 프로세스에 보이기까지 최대 CACHE_TTL 초 걸린다. 역할은 세션에 저장하지 않고
+# 조회할 때 users 에서 읽는다. 마스터 비밀번호로 받은 역할만 세션의 granted_role 에 남긴다.
+#
+# URL 에 있는 토큰은 브라우저 기록, 공유한 링크, Referer 로 새어 나갈 수 있다. 그래서
+#   - 토큰으로 로그인을 되살릴 때마다 새 토큰으로 바꾸고 이전 토큰은 GRACE 초 뒤 만료시킨다
+#     (같은 주소로 동시에 다시 붙은 탭이 로그아웃되지 않을 만큼만 남긴다)
+#   - 쓰지 않은 채 session_days(기본 DAYS) 가 지나면 만료된다. 쓰는 동안에는 DB 에서 다시 조회할
+#     때 (CACHE_TTL 마다) 수명의 절반이 지났으면 session_days 로 다시 늘린다
+#   - 서명 키 session_secret 은 Postgres 백엔드에서 반드시 시크릿으로 정해야 한다
+#     (모든 레플리카가 같은 값. 없으면 시작하지 않는다)
+
+PARAM = "session"
+DAYS = 1
+GRACE = 60
+CACHE_TTL = 30.0
+CACHE_SIZE = 10000
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+# SQLite 백엔드는 세션도 이 프로세스 안에만 있으므로 프로세스마다 정한 키로 충분하다
+_LOCAL_SECRET = secrets.token_hex(32)
+
+
+def _key():
+    secret = st.secrets.get("session_secret")
+    if not secret and db.backend() == "sqlite":
+        secret = _LOCAL_SECRET
+    elif not secret:
+        raise RuntimeError("session_secret 시크릿이 없습니다. 모든 레플리카에 같은 임의의 값을 설정하세요.")
+    return hashlib.sha256(str(secret).encode()).digest()
+
+
+def check():
+    # 시작할 때 한 번. 첫 로그인 때가 아니라 배포 직후에 알 수 있게
+    _key()
+
+
+def _sign(session_id):
+    mac = hmac.new(_key(), session_id.encode(), hashlib.sha256).digest()[:18]
+    return base64.urlsafe_b64encode(mac).decode()
+
+
+def _digest(session_id):
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+
+def _verify(token):
+    session_id, _, signature = (token or "").partition(".")
+    if session_id and hmac.compare_digest(signature, _sign(session_id)):
+        return _digest(session_id)
+    return None
+
+
+def _cached(digest):
+    with _lock:
+        entry = _cache.get(digest)
+        if entry and entry[0] > time.monotonic():
+            return entry
+    return None
+
+
+def _remember(digest, user):
+    ttl = float(st.secrets.get("session_cache_ttl", CACHE_TTL))
+    with _lock:
+        _cache[digest] = (time.monotonic() + ttl, user)
+        _cache.move_to_end(digest)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def forget(usernames):
+    # 역할 변경/삭제 직후 이 프로세스의 조회 결과부터 버린다 (다른 프로세스는 CACHE_TTL 안에)
+    usernames = set(usernames)
+    with _lock:
+        for digest in [d for d, (_, user) in _cache.items() if user and user[0] in usernames]:
+            del _cache[digest]
+
+
+def _set_state(username, role):
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.role = role
+
+
+def _days():
+    return int(st.secrets.get("session_days", DAYS))
+
+
+def _token(session_id):
+    return f"{session_id}.{_sign(session_id)}"
+
+
+def issue(repo, username, role, granted=None):
+    # 로그인 직후. 토큰을 URL 에 남긴다. granted: users 에 없는 역할 (마스터 비밀번호)
+    session_id = secrets.token_urlsafe(24)
+    digest = _digest(session_id)
+    repo.user_sessions.add(digest, username, _days(), granted)
+    _remember(digest, (username, role))
+    st.query_params[PARAM] = _token(session_id)
+
+
+def _rotate(repo, digest, user):
+    session_id = secrets.token_urlsafe(24)
+    new = _digest(session_id)
+    repo.user_sessions.rotate(digest, new, _days(), GRACE)
+    _remember(new, user)
+    st.query_params[PARAM] = _token(session_id)
+
+
+def revoke(repo):
+    digest = _verify(st.query_params.get(PARAM))
+    if digest:
+        repo.user_sessions.delete(digest)
+        _remember(digest, None)
+    st.query_params.pop(PARAM, None)
+
+
+def restore(repo):
+    # 재실행마다 부른다. URL 의 토큰으로 로그인 상태를 되살리고, 세션이 지워졌으면 로그아웃
+    token = st.query_params.get(PARAM)
+    if not token:
+        return
+    digest = _verify(token)
+    if digest is None:
+        st.query_params.pop(PARAM, None)
+        return
+    entry = _cached(digest)
+    if entry is None:
+        found = repo.user_sessions.get(digest, _days())
+        user = (found.username, found.role) if found else None
+        _remember(digest, user)
+    else:
+        user = entry[1]
+    if user is None:
+        st.query_params.pop(PARAM, None)
+        if st.session_state.get("logged_in"):
+            st.session_state.logged_in = False
+            st.session_state.username = "게스트"
+            st.session_state.role = "학생"
+    elif not st.session_state.get("logged_in"):
+        # 새 브라우저 세션에서 토큰을 썼다. 기록/링크에 남은 토큰은 곧 못 쓰게 바꾼다
+        _set_state(*user)
+        _rotate(repo, digest, user)
+    elif (st.session_state.username, st.session_state.role) != user:
+        # 로그인 중에 역할이 바뀌었다
+        _set_state(*user)
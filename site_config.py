@@ -0,0 +1,72 @@
+import threading
+import time
+
+import streamlit as st
+
+import db
+import notify
+import repository
+
+# ---------------------------
+# 사이트 설정/공지 스냅샷
+# ---------------------------
+# site_settings 와 최근 공지를 프로세스마다 한 번 읽어 두고 모든 세션이 같이 쓴다.
+# 저장/게시는 같은 문장에서 NOTIFY 를 보내므로, 수신기의 시퀀스가 바뀐 뒤 처음 보는
+# 재실행이 다시 읽는다. 수신기가 끊겨 알림을 놓쳐도 TTL 이 지나면 다시 읽는다.
+
+CHANNEL = "site_config"
+ANNOUNCEMENTS = 5
+TTL = 300.0
+DEFAULTS = {
+    "site_title": "Honority English Academy",
+    "site_description": "영어 독서·토론을 통한 학습 커뮤니티입니다.",
+}
+
+
+class Snapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = None
+        self._loaded = 0.0
+        self.current = (dict(DEFAULTS), [])
+
+    def _stale(self, seq, ttl):
+        return seq != self._seq or time.monotonic() - self._loaded > ttl
+
+    def get(self, ttl):
+        seq = notify.subscribe(CHANNEL).seq(CHANNEL)
+        if self._stale(seq, ttl):
+            with self._lock:
+                # 기다리는 동안 다른 세션이 이미 읽었을 수 있다
+                if self._stale(seq, ttl):
+                    with db.connection() as conn, conn.cursor() as cur:
+                        settings = dict(DEFAULTS, **repository.SiteSettings(cur).all())
+                        notices = repository.Announcements(cur).recent(ANNOUNCEMENTS)
+                    self.current = (settings, notices)
+                    self._seq = seq
+                    self._loaded = time.monotonic()
+        return self.current
+
+    def expire(self):
+        # 이 프로세스에서 쓴 변경은 알림을 기다리지 않고 다음 조회에서 바로 반영
+        self._seq = None
+
+
+@st.cache_resource
+def get_snapshot():
+    return Snapshot()
+
+
+def current():
+    # (설정 dict, 최근 공지 목록)
+    return get_snapshot().get(float(st.secrets.get("settings_ttl", TTL)))
+
+
+def save(repo, values):
+    repo.site_settings.save(values, CHANNEL)
+    get_snapshot().expire()
+
+
+def announce(repo, content, posted_by):
+    repo.announcements.add(content, posted_by, CHANNEL)
+    get_snapshot().expire()
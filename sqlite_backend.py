@@ -0,0 +1,588 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import cache
+import db
+import notify
+import repository
+
+# ---------------------------
+# 내장 SQLite 백엔드 (테스트/벤치마크용)
+# ---------------------------
+# db_backend = "sqlite" 이면 Postgres 대신 프로세스 안의 메모리 DB 를 쓴다. 페이지 테스트와
+# 벤치마크를 외부 서버 없이 돌리기 위한 것으로, 데이터는 프로세스가 끝나면 사라진다.
+#  - 스키마는 마지막 마이그레이션 상태를 SQLite 로 옮긴 SCHEMA (파티션/전문 검색 컬럼 제외)
+#  - 연결은 하나를 모든 스레드가 나눠 쓰고, 문장(트랜잭션이면 트랜잭션 전체)마다 잠금을 잡는다
+#  - $1/%s 자리표시자, ::캐스트, = ANY(목록), ILIKE 는 여기서 SQLite 문법으로 바꾼다
+#  - 데이터 변경 CTE 처럼 옮길 수 없는 문장은 아래 테이블 클래스가 SQLite 용으로 다시 구현한다
+#  - pg_notify 는 같은 프로세스의 notify 수신기로 바로 전달된다
+# 월 파티션 보관, 에세이 분석 작업자, 활동 집계, COPY 일괄 가져오기는 Postgres 에서만 동작한다.
+
+DIALECT = "sqlite"
+_TS = "%Y-%m-%d %H:%M:%S.%f"
+# 기본값도 _TS 와 같은 모양으로 (%f 는 밀리초까지라 뒤를 채운다)
+_NOW = "(strftime('%Y-%m-%d %H:%M:%f', 'now') || '000')"
+
+SCHEMA = f"""
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY,
+    username TEXT UNIQUE,
+    password TEXT,
+    role TEXT DEFAULT '학생',
+    created_at TIMESTAMPTZ DEFAULT {_NOW}
+);
+CREATE TABLE kicked_users (
+    username TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    kicked_at TIMESTAMPTZ DEFAULT {_NOW}
+);
+CREATE TABLE user_sessions (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL REFERENCES users (username) ON DELETE CASCADE,
+    granted_role TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT {_NOW},
+    expires_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX user_sessions_expires_idx ON user_sessions (expires_at);
+CREATE TABLE chat_messages (
+    id INTEGER PRIMARY KEY,
+    username TEXT,
+    message TEXT,
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT {_NOW}
+);
+CREATE TABLE homeworks (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    due_date DATE,
+    posted_by TEXT,
+    timestamp TIMESTAMPTZ
+);
+CREATE TABLE current_book (
+    id INTEGER PRIMARY KEY,
+    book_title TEXT,
+    week_of DATE,
+    debate_topic TEXT,
+    posted_by TEXT,
+    timestamp TIMESTAMPTZ
+);
+CREATE TABLE tools (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    url TEXT,
+    description TEXT,
+    added_by TEXT,
+    timestamp TIMESTAMPTZ
+);
+CREATE TABLE word_of_day (
+    id INTEGER PRIMARY KEY,
+    word TEXT,
+    definition TEXT,
+    date DATE UNIQUE
+);
+CREATE TABLE schedule (
+    id INTEGER PRIMARY KEY,
+    class_date DATE,
+    content TEXT
+);
+CREATE INDEX schedule_class_date_idx ON schedule (class_date, id);
+CREATE TABLE materials (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    file_url TEXT,
+    file_name TEXT,
+    uploaded_by TEXT,
+    timestamp TIMESTAMPTZ
+);
+CREATE TABLE essays (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    file_path TEXT,
+    file_name TEXT,
+    uploaded_by TEXT,
+    timestamp TIMESTAMPTZ,
+    word_count INTEGER,
+    sentence_count INTEGER,
+    readability REAL,
+    grade_level REAL,
+    processed_at TIMESTAMPTZ
+);
+CREATE TABLE essay_jobs (
+    id INTEGER PRIMARY KEY,
+    essay_id INTEGER NOT NULL REFERENCES essays (id) ON DELETE CASCADE,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT {_NOW},
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+CREATE INDEX essay_jobs_essay_idx ON essay_jobs (essay_id);
+CREATE TABLE newbery_books (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    rating INTEGER,
+    rated_by TEXT,
+    timestamp TIMESTAMPTZ
+);
+CREATE TABLE newbery_ratings (
+    title TEXT PRIMARY KEY,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    r1 INTEGER NOT NULL DEFAULT 0,
+    r2 INTEGER NOT NULL DEFAULT 0,
+    r3 INTEGER NOT NULL DEFAULT 0,
+    r4 INTEGER NOT NULL DEFAULT 0,
+    r5 INTEGER NOT NULL DEFAULT 0,
+    avg_rating REAL GENERATED ALWAYS AS (round(CAST(rating_sum AS REAL) / NULLIF(rating_count, 0), 3)) STORED,
+    updated_at TIMESTAMPTZ DEFAULT {_NOW}
+);
+CREATE INDEX newbery_ratings_rank_idx ON newbery_ratings (avg_rating DESC, rating_count DESC, title DESC);
+CREATE TABLE debate_articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT,
+    description TEXT,
+    shared_by TEXT,
+    timestamp TIMESTAMPTZ
+);
+CREATE TABLE user_logs (
+    id INTEGER PRIMARY KEY,
+    username TEXT,
+    action TEXT,
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT {_NOW}
+);
+CREATE INDEX user_logs_timestamp_idx ON user_logs (timestamp DESC);
+CREATE INDEX user_logs_username_idx ON user_logs (username, timestamp DESC);
+CREATE TABLE system_logs (
+    id INTEGER PRIMARY KEY,
+    level TEXT,
+    message TEXT,
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT {_NOW}
+);
+CREATE INDEX system_logs_timestamp_idx ON system_logs (timestamp DESC);
+CREATE TABLE announcements (
+    id INTEGER PRIMARY KEY,
+    content TEXT,
+    posted_by TEXT,
+    timestamp TIMESTAMPTZ DEFAULT {_NOW}
+);
+CREATE INDEX announcements_timestamp_idx ON announcements (timestamp DESC);
+CREATE TABLE site_settings (
+    id INTEGER PRIMARY KEY,
+    setting_key TEXT UNIQUE,
+    setting_value TEXT,
+    updated_at TIMESTAMPTZ DEFAULT {_NOW}
+);
+CREATE TABLE blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT {_NOW}
+);
+CREATE TABLE archived_partitions (
+    table_name TEXT NOT NULL,
+    month DATE NOT NULL,
+    path TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT {_NOW},
+    restored_at TIMESTAMPTZ,
+    PRIMARY KEY (table_name, month)
+);
+CREATE TABLE activity_daily (
+    day DATE NOT NULL,
+    source TEXT NOT NULL,
+    username TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, source, username)
+);
+CREATE TABLE activity_watermarks (
+    source TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    horizon INTEGER NOT NULL DEFAULT 0,
+    horizon_at TIMESTAMPTZ NOT NULL DEFAULT '1970-01-01 00:00:00.000000',
+    refreshed_at TIMESTAMPTZ
+);
+"""
+
+
+# ---------------------------
+# 값 변환: 시각은 UTC naive 문자열로 저장한다 (문자열 비교가 시간 순서와 같도록)
+# ---------------------------
+
+def _adapt_datetime(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime(_TS)
+
+
+def _convert_datetime(raw):
+    value = datetime.fromisoformat(raw.decode())
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_converter("TIMESTAMPTZ", _convert_datetime)
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+
+
+# ---------------------------
+# Postgres 문법 → SQLite
+# ---------------------------
+
+_CAST = re.compile(r"::\w+(\[\])?")
+_ANY = re.compile(r"=\s*ANY\((\?|:\w+)\)", re.I)
+_FOR_UPDATE = re.compile(r"\s+FOR UPDATE( SKIP LOCKED)?", re.I)
+_REWRITES = [
+    (re.compile(r"\bILIKE\b", re.I), "LIKE"),
+    (re.compile(r"~>=~"), ">="),
+    (re.compile(r"~<~"), "<"),
+    (re.compile(r"\bchr\("), "char("),
+]
+_translated = {}
+
+
+def translate(query, named):
+    # named: None 이면 파라미터 없음 (psycopg2 처럼 % 를 그대로 둔다)
+    key = (query, named)
+    sql = _translated.get(key)
+    if sql is None:
+        sql = query
+        if named is not None:
+            sql = re.sub(r"%\((\w+)\)s", r":\1", sql) if named else sql.replace("%s", "?")
+            sql = sql.replace("%%", "%")
+        sql = _ANY.sub(r"IN (SELECT value FROM json_each(\1))", _CAST.sub("", sql))
+        sql = _FOR_UPDATE.sub("", sql)
+        for pattern, repl in _REWRITES:
+            sql = pattern.sub(repl, sql)
+        _translated[key] = sql
+    return sql
+
+
+def _param(value):
+    # 배열 파라미터는 JSON 으로 넘겨 json_each 로 푼다
+    return json.dumps(list(value)) if isinstance(value, (list, tuple)) else value
+
+
+def _params(vars):
+    if vars is None:
+        return None, ()
+    if isinstance(vars, dict):
+        return True, {k: _param(v) for k, v in vars.items()}
+    return False, tuple(_param(v) for v in vars)
+
+
+def _now():
+    return datetime.utcnow().strftime(_TS)
+
+
+def _notify(channel, payload):
+    notify.publish(channel, payload)
+
+
+def _hashtext(text):
+    return int.from_bytes(hashlib.md5(str(text).encode()).digest()[:4], "big", signed=True)
+
+
+# ---------------------------
+# 연결 (psycopg2 연결/커서에서 이 앱이 쓰는 부분만)
+# ---------------------------
+
+class Cursor:
+    dialect = DIALECT
+
+    def __init__(self, conn):
+        self.connection = conn
+        self.description = None
+        self.rowcount = -1
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._rows = []
+
+    def execute(self, query, vars=None):
+        named, params = _params(vars)
+        sql = translate(query, named)
+        t0 = time.perf_counter()
+        with self.connection.statement() as raw:
+            cur = raw.execute(sql, params)
+            self.description = cur.description
+            # 잠금을 놓기 전에 결과를 모두 읽는다
+            self._rows = cur.fetchall() if cur.description else []
+            self.rowcount = len(self._rows) if cur.description else cur.rowcount
+        db.record(query, time.perf_counter() - t0, self.rowcount)
+
+    def executemany(self, query, seq):
+        seq = [_params(v)[1] for v in seq]
+        sql = translate(query, bool(seq) and isinstance(seq[0], dict))
+        t0 = time.perf_counter()
+        with self.connection.statement() as raw:
+            self.rowcount = raw.executemany(sql, seq).rowcount
+            self.description = None
+            self._rows = []
+        db.record(query, time.perf_counter() - t0, self.rowcount)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+
+class Connection:
+    # 공유 SQLite 연결 위의 얇은 핸들. autocommit 을 끄면 트랜잭션이 끝날 때까지 잠금을 쥔다
+    dialect = DIALECT
+    prepared = None
+    closed = False
+
+    def __init__(self, shared):
+        self._shared = shared
+        self._autocommit = True
+        self._in_tx = False
+        self.after_commit = []
+
+    @property
+    def autocommit(self):
+        return self._autocommit
+
+    @autocommit.setter
+    def autocommit(self, value):
+        if value == self._autocommit:
+            return
+        if value:
+            if self._in_tx:
+                self.commit()
+            self._autocommit = True
+            self._shared.lock.release()
+        else:
+            self._shared.lock.acquire()
+            self._autocommit = False
+
+    @contextmanager
+    def statement(self):
+        with self._shared.lock:
+            if not self._autocommit and not self._in_tx:
+                self._shared.raw.execute("BEGIN")
+                self._in_tx = True
+            yield self._shared.raw
+
+    @contextmanager
+    def atomic(self):
+        # 여러 문장을 한 번에. 이미 트랜잭션 안이면 그 트랜잭션에 합친다
+        if not self._autocommit:
+            yield
+            return
+        self.autocommit = False
+        committed = False
+        try:
+            with self:
+                yield
+            committed = True
+        finally:
+            self.autocommit = True
+            db.finish(self, committed)
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        if self._in_tx:
+            self._in_tx = False
+            self._shared.raw.execute("COMMIT")
+
+    def rollback(self):
+        if self._in_tx:
+            self._in_tx = False
+            self._shared.raw.execute("ROLLBACK")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def close(self):
+        pass
+
+
+class Database:
+    # 프로세스에 하나 (database()). st.cache_resource 가 비워져도 데이터는 남는다
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.raw = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False,
+                                   detect_types=sqlite3.PARSE_DECLTYPES)
+        self.raw.execute("PRAGMA foreign_keys = ON")
+        for name, n, fn in [("now", 0, _now), ("pg_notify", 2, _notify), ("hashtext", 1, _hashtext),
+                            ("pg_advisory_xact_lock", 1, lambda key: None),
+                            ("pg_try_advisory_lock", 1, lambda key: 1),
+                            ("pg_advisory_unlock", 1, lambda key: 1),
+                            ("greatest", 2, max)]:
+            self.raw.create_function(name, n, fn)
+        self.raw.executescript(SCHEMA)
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def database():
+    global _database
+    with _database_lock:
+        if _database is None:
+            _database = Database()
+        return _database
+
+
+class Pool:
+    # db.ConnectionPool 과 같은 모양. 핸들은 가볍고 수 제한이 없다
+    def __init__(self):
+        self.database = database()
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.checkouts = 0
+
+    def getconn(self):
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+        return Connection(self.database)
+
+    def putconn(self, conn):
+        # 트랜잭션을 끝내지 않고 돌려준 핸들은 되돌리고 잠금을 푼다
+        if not conn.autocommit:
+            conn.rollback()
+            conn.autocommit = True
+        db.finish(conn, False)
+        with self._lock:
+            self.in_use -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"backend": DIALECT, "in_use": self.in_use, "checkouts": self.checkouts}
+
+
+# ---------------------------
+# 데이터 변경 CTE 를 쓰는 테이블 메서드의 SQLite 구현
+# ---------------------------
+
+class KickedUsers(repository.KickedUsers):
+    def add_many(self, usernames, reason, channel):
+        with self.cur.connection.atomic():
+            self._run("""
+                INSERT INTO kicked_users (username, reason) SELECT value, $2 FROM json_each($1) WHERE true
+                ON CONFLICT (username) DO UPDATE SET reason = EXCLUDED.reason, kicked_at = now()
+            """, (list(usernames), reason))
+            self._run("SELECT pg_notify($1, $2)", (channel, str(len(usernames))))
+        cache.invalidate(self.name, cur=self.cur)
+
+
+class UserSessions(repository.UserSessions):
+    def add(self, session_id, username, days, granted_role=None):
+        with self.cur.connection.atomic():
+            self._run("DELETE FROM user_sessions WHERE expires_at < now()")
+            self._run("INSERT INTO user_sessions (id, username, granted_role, expires_at) VALUES ($1, $2, $3, $4)",
+                      (session_id, username, granted_role, datetime.utcnow() + timedelta(days=days)))
+
+    def get(self, session_id, days):
+        now = datetime.utcnow()
+        with self.cur.connection.atomic():
+            self._run("UPDATE user_sessions SET expires_at = $2 WHERE id = $1 AND expires_at > now() AND expires_at < $3",
+                      (session_id, now + timedelta(days=days), now + timedelta(days=days) / 2))
+            rows = self._run(self.LOOKUP, (session_id,))
+        return repository.User(*rows[0]) if rows else None
+
+    def rotate(self, old_id, new_id, days, grace):
+        now = datetime.utcnow()
+        with self.cur.connection.atomic():
+            rows = self._run("""
+                UPDATE user_sessions SET expires_at = min(expires_at, $2)
+                WHERE id = $1 AND expires_at > now() RETURNING username, granted_role
+            """, (old_id, now + timedelta(seconds=grace)))
+            if rows:
+                self._run("INSERT INTO user_sessions (id, username, granted_role, expires_at) VALUES ($1, $2, $3, $4)",
+                          (new_id, rows[0][0], rows[0][1], now + timedelta(days=days)))
+
+
+class ChatMessages(repository.ChatMessages):
+    def post(self, username, message, channel):
+        rows = self._run("INSERT INTO chat_messages (username, message, timestamp) VALUES ($1, $2, $3) RETURNING id",
+                         (username, message, datetime.utcnow()))
+        self._run("SELECT pg_notify($1, $2)", (channel, str(rows[0][0])))
+
+
+class Essays(repository.Essays):
+    def add(self, title, file_path, file_name, uploaded_by, channel):
+        with self.cur.connection.atomic():
+            rows = self._run("""
+                INSERT INTO essays (title, file_path, file_name, uploaded_by, timestamp)
+                VALUES ($1, $2, $3, $4, $5) RETURNING id
+            """, (title, file_path, file_name, uploaded_by, datetime.utcnow()))
+            jobs = self._run("INSERT INTO essay_jobs (essay_id) VALUES ($1) RETURNING id", (rows[0][0],))
+            self._run("SELECT pg_notify($1, $2)", (channel, str(jobs[0][0])))
+        cache.invalidate(self.name, "essay_jobs", cur=self.cur)
+
+
+class NewberyBooks(repository.NewberyBooks):
+    def rate(self, title, rating, rated_by):
+        with self.cur.connection.atomic():
+            self._run("INSERT INTO newbery_books (title, rating, rated_by, timestamp) VALUES ($1, $2, $3, $4)",
+                      (title, rating, rated_by, datetime.utcnow()))
+            self._run("""
+                INSERT INTO newbery_ratings AS r (title, rating_count, rating_sum, r1, r2, r3, r4, r5)
+                VALUES ($1, 1, $2, $2 = 1, $2 = 2, $2 = 3, $2 = 4, $2 = 5)
+                ON CONFLICT (title) DO UPDATE SET
+                    rating_count = r.rating_count + 1,
+                    rating_sum   = r.rating_sum + EXCLUDED.rating_sum,
+                    r1 = r.r1 + EXCLUDED.r1, r2 = r.r2 + EXCLUDED.r2, r3 = r.r3 + EXCLUDED.r3,
+                    r4 = r.r4 + EXCLUDED.r4, r5 = r.r5 + EXCLUDED.r5,
+                    updated_at   = now()
+            """, (title, rating))
+        cache.invalidate(self.name, "newbery_ratings", cur=self.cur)
+
+
+class Announcements(repository.Announcements):
+    def add(self, content, posted_by, channel):
+        rows = self._run("INSERT INTO announcements (content, posted_by, timestamp) VALUES ($1, $2, $3) RETURNING id",
+                         (content, posted_by, datetime.utcnow()))
+        self._run("SELECT pg_notify($1, $2)", (channel, str(rows[0][0])))
+        cache.invalidate(self.name, cur=self.cur)
+
+
+class SiteSettings(repository.SiteSettings):
+    def save(self, values, channel):
+        with self.cur.connection.atomic():
+            for key, value in values.items():
+                self._run("""
+                    INSERT INTO site_settings (setting_key, setting_value, updated_at) VALUES ($1, $2, now())
+                    ON CONFLICT (setting_key) DO UPDATE
+                    SET setting_value = EXCLUDED.setting_value, updated_at = EXCLUDED.updated_at
+                """, (key, value))
+            self._run("SELECT pg_notify($1, $2)", (channel, str(len(values))))
+        cache.invalidate(self.name, cur=self.cur)
+
+
+repository.OVERRIDES[DIALECT] = {
+    base: impl
+    for impl in (KickedUsers, UserSessions, ChatMessages, Essays, NewberyBooks, Announcements, SiteSettings)
+    for base in impl.__bases__
+}
@@ -0,0 +1,271 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from functools import partial
+
+import streamlit as st
+
+import db
+
+# ---------------------------
+# 업로드 파일 저장소 (내용 주소 기반)
+# ---------------------------
+# 파일을 청크 단위로 디스크에 쓰면서 sha256 을 계산하고, 같은 내용은 한 번만
+# 저장한다. blobs.refcount 로 참조 수를 세어 마지막 참조가 지워질 때 파일도
+# 지운다. DB 에는 "sha256:<hex>" 키를 저장한다.
+# 참조 수 변경은 참조하는 행의 INSERT/DELETE 와 같은 트랜잭션에서 한다 (storage.transaction).
+# 파일은 커밋/롤백이 끝난 뒤 digest 잠금을 다시 잡고 blobs 행이 없을 때만 지운다
+# (롤백된 업로드가 남긴 파일도 이때 치운다).
+#   <upload_dir>/ab/cd/abcd....
+# 실제 파일 위치는 storage_backend 시크릿으로 고르는 백엔드가 정한다.
+#   local  : 이 호스트의 디렉터리 (기본)
+#   shared : 여러 레플리카가 같이 마운트한 디렉터리. 다 쓴 파일만 보이도록 fsync 후 rename
+# 예전 uploads_mat/, uploads_essay/ 경로 키는 legacy_upload_dir 기준으로 찾는다.
+# "archive/..." 키는 보관한 월 파티션 파일로, 내용 주소가 아니라 이름으로 저장한다.
+
+CHUNK = 1024 * 1024
+# 이보다 큰 로컬 파일은 다운로드할 때 통째로 읽지 않고 mmap 스트림으로 넘긴다
+MAP_MIN = 4 * CHUNK
+PREFIX = "sha256:"
+ARCHIVE = "archive/"
+
+
+class LocalDirectory:
+    def __init__(self, root, legacy_root="."):
+        self.root = root
+        self.legacy_root = legacy_root
+
+    def path(self, key):
+        if key.startswith(ARCHIVE):
+            return os.path.join(self.root, *key.split("/"))
+        if not is_blob(key):
+            return os.path.join(self.legacy_root, key)
+        digest = key[len(PREFIX):]
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def spool(self):
+        # 같은 파일시스템에 임시 파일을 만들어야 put 의 rename 이 원자적이다
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkstemp(dir=self.root, prefix=".upload-")
+
+    def put(self, tmp, key):
+        dest = self.path(key)
+        if not os.path.exists(dest):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(tmp, dest)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def open(self, key):
+        return open(self.path(key), "rb")
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+class SharedDirectory(LocalDirectory):
+    def put(self, tmp, key):
+        # 다른 호스트가 반쯤 쓴 파일을 읽지 않도록 내용과 디렉터리 항목을 모두 내려쓴다
+        dest = self.path(key)
+        if os.path.exists(dest):
+            return
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(tmp, dest)
+        fd = os.open(os.path.dirname(dest), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+BACKENDS = {"local": LocalDirectory, "shared": SharedDirectory}
+
+
+def config():
+    # 에세이 작업자처럼 시크릿을 읽지 못하는 프로세스에는 이 dict 를 넘긴다
+    return {
+        "backend": st.secrets.get("storage_backend", "local"),
+        "root": st.secrets.get("upload_dir", "uploads"),
+        "legacy_root": st.secrets.get("legacy_upload_dir", "."),
+    }
+
+
+def make(cfg):
+    return BACKENDS[cfg["backend"]](cfg["root"], cfg["legacy_root"])
+
+
+@st.cache_resource
+def get_backend():
+    return make(config())
+
+
+def is_blob(key):
+    return bool(key) and key.startswith(PREFIX)
+
+
+def path(key):
+    return get_backend().path(key)
+
+
+def _spool(backend, file):
+    # 청크로 임시 파일에 쓰며 해시 계산 (메모리는 CHUNK 만큼만 사용)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp = backend.spool()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            file.seek(0)
+            while chunk := file.read(CHUNK):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp, h.hexdigest(), size
+
+
+def _lock(cur, digest):
+    # 같은 내용의 저장/삭제가 프로세스 사이에서 겹치지 않게
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (digest,))
+
+
+class Files:
+    # 한 트랜잭션 안의 첨부파일 참조 변경. transaction() 으로 만든다
+    def __init__(self, cur, backend):
+        self.cur = cur
+        self.backend = backend
+        self.touched = set()
+
+    def save(self, file):
+        tmp, digest, size = _spool(self.backend, file)
+        key = PREFIX + digest
+        try:
+            _lock(self.cur, digest)
+            self.cur.execute("""
+                INSERT INTO blobs (sha256, size, refcount) VALUES (%s, %s, 1)
+                ON CONFLICT (sha256) DO UPDATE SET refcount = blobs.refcount + 1
+            """, (digest, size))
+            # 행이 커밋되기 전에 파일이 먼저 있어야 한다
+            self.backend.put(tmp, key)
+        finally:
+            self.touched.add(digest)
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return key
+
+    def release(self, key):
+        if not is_blob(key):
+            return
+        digest = key[len(PREFIX):]
+        _lock(self.cur, digest)
+        self.cur.execute("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = %s RETURNING refcount",
+                         (digest,))
+        row = self.cur.fetchone()
+        if row and row[0] <= 0:
+            self.cur.execute("DELETE FROM blobs WHERE sha256 = %s", (digest,))
+        self.touched.add(digest)
+
+
+def _collect(conn, backend, digests):
+    # 참조가 없는 파일을 지운다. 잠금 안에서 확인하므로 같은 내용을 동시에 올리는 쪽과 겹치지 않는다
+    for digest in digests:
+        with db.transaction(conn) as cur:
+            _lock(cur, digest)
+            cur.execute("SELECT 1 FROM blobs WHERE sha256 = %s", (digest,))
+            if cur.fetchone() is None:
+                backend.delete(PREFIX + digest)
+
+
+@contextmanager
+def transaction(conn):
+    # with storage.transaction(conn) as files:
+    #     key = files.save(upload)
+    #     repository.Materials(files.cur).add(..., key, ...)
+    backend = get_backend()
+    files = None
+    try:
+        with db.transaction(conn) as cur:
+            files = Files(cur, backend)
+            yield files
+    finally:
+        if files is not None and files.touched:
+            _collect(conn, backend, files.touched)
+
+
+class _Mapped(io.RawIOBase):
+    # 로컬 파일의 읽기 전용 mmap 스트림. Streamlit 이 seek(0) 후 read() 로 한 번 가져가면
+    # 매핑을 바로 닫는다 (파일 디스크립터는 매핑을 만든 뒤 곧바로 닫는다)
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        self._map.seek(pos, whence)
+        return self._map.tell()
+
+    def tell(self):
+        return self._map.tell()
+
+    def readinto(self, b):
+        data = self._map.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def read(self, size=-1):
+        data = self._map.read(None if size is None or size < 0 else size)
+        if self._map.tell() >= len(self._map):
+            self.close()
+        return data
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+        super().close()
+
+
+def _read(key, backend=None):
+    # 클릭했을 때만 부른다. 큰 로컬 파일은 이쪽에서 읽지 않고 mmap 스트림을 넘기고,
+    # 작은 파일만 그냥 읽는다
+    backend = backend or get_backend()
+    if isinstance(backend, LocalDirectory):
+        path = backend.path(key)
+        if os.path.getsize(path) >= MAP_MIN:
+            return _Mapped(path)
+    with backend.open(key) as f:
+        return f.read()
+
+
+def download_button(key, file_name, label="다운로드", widget_key=None):
+    # 클릭했을 때만 파일을 읽는다 (재실행마다 파일 내용을 메모리에 올리지 않음)
+    if not key or not get_backend().exists(key):
+        st.caption("파일 없음")
+        return
+    st.download_button(label, data=partial(_read, key),
+                       file_name=file_name or os.path.basename(path(key)),
+                       key=widget_key)
+
+
+def download_picker(widget_key, items):
+    # items: (표시 이름, 저장 키, 파일명) — 현재 페이지에 보이는 파일만
+    items = [it for it in items if it[1]]
+    if not items:
+        return
+    i = st.selectbox("파일 다운로드", range(len(items)), key=f"{widget_key}:pick",
+                     format_func=lambda i: f"{items[i][0]} ({items[i][2] or os.path.basename(path(items[i][1]))})")
+    download_button(items[i][1], items[i][2], widget_key=f"{widget_key}:dl")
@@ -0,0 +1,132 @@
+import os
+import secrets
+import sys
+
+import pytest
+import streamlit as st
+from streamlit.runtime.secrets import Secrets
+from streamlit.testing.v1 import AppTest
+
+# ---------------------------
+# 공용 픽스처
+# ---------------------------
+# 페이지 테스트는 내장 SQLite 백엔드(db_backend = "sqlite")로 외부 서버 없이 돈다.
+# 메모리 DB 는 프로세스에 하나라 테스트끼리 나눠 쓰므로, 각 테스트는 new_user() 로 만든
+# 겹치지 않는 아이디와 내용만 쓴다.
+# Postgres 에서만 동작하는 부분(PREPARE, 파티션, 집계, 마이그레이션)은 TEST_PG_HOST 가 있을 때
+# 임시 데이터베이스를 만들어 돌리고, 없으면 건너뛴다.
+#   TEST_PG_HOST=/tmp/pg/data TEST_PG_USER=postgres python -m pytest -q
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# app.py 는 저장소 루트에서 실행된다고 가정한다 (assets/, uploads/)
+os.chdir(ROOT)
+
+import auth  # noqa: E402
+import db  # noqa: E402
+import repository  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+# 해시 반복 수는 테스트 속도를 위해 줄인다
+SECRETS = {"db_backend": "sqlite", "essay_worker": False, "password_iterations": 1000}
+MENU = "메뉴"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def sqlite_secrets():
+    # 앱 밖(테스트 본문)에서 쓰는 repository/db 호출도 같은 메모리 DB 를 보게 한다
+    shared = Secrets()
+    shared._secrets = dict(SECRETS)
+    saved, st.secrets = st.secrets, shared
+    yield shared
+    st.secrets = saved
+
+
+@pytest.fixture
+def cur():
+    with db.connection() as conn, conn.cursor() as c:
+        yield c
+
+
+@pytest.fixture
+def new_user(cur):
+    # new_user(role="선생님", password="pw") → 처음 보는 아이디
+    def make(role="학생", password="pw"):
+        username = f"t_{secrets.token_hex(4)}"
+        assert auth.signup(repository.Repository(cur), username, password)
+        if role != "학생":
+            repository.Users(cur).set_roles([username], role)
+        return username
+    return make
+
+
+def app(username=None, role=None, session=None, **extra):
+    # username 을 주면 이미 로그인한 세션으로, session 을 주면 그 토큰을 URL 에 단 채로 시작한다
+    at = AppTest.from_file(APP, default_timeout=60)
+    for k, v in dict(SECRETS, **extra).items():
+        at.secrets[k] = v
+    if username:
+        at.session_state["logged_in"] = True
+        at.session_state["username"] = username
+        at.session_state["role"] = role
+    if session:
+        at.query_params["session"] = session
+    return at
+
+
+def goto(at, page):
+    next(r for r in at.sidebar.radio if r.label == MENU).set_value(page).run()
+    assert not at.exception, at.exception
+    return at
+
+
+def token(at):
+    value = at.query_params.get("session")
+    return value[0] if isinstance(value, list) else value
+
+
+def login(at, username, password="pw"):
+    next(r for r in at.sidebar.radio if r.label == "옵션 선택").set_value("로그인").run()
+    at.sidebar.text_input[0].set_value(username)
+    at.sidebar.text_input[1].set_value(password)
+    at.sidebar.button[0].click().run()
+    assert not at.exception, at.exception
+    return at
+
+
+@pytest.fixture(scope="session")
+def pg_params():
+    # 임시 데이터베이스에 모든 마이그레이션을 적용해 두고 끝나면 지운다
+    host = os.environ.get("TEST_PG_HOST")
+    if not host:
+        pytest.skip("TEST_PG_HOST 가 없어 Postgres 테스트를 건너뜁니다")
+    import psycopg2
+    import migrations
+    base = {"host": host, "port": int(os.environ.get("TEST_PG_PORT", 5432)),
+            "user": os.environ.get("TEST_PG_USER", "postgres"),
+            "password": os.environ.get("TEST_PG_PASSWORD", "")}
+    name = f"honority_test_{secrets.token_hex(4)}"
+    admin = psycopg2.connect(dbname=os.environ.get("TEST_PG_DBNAME", "postgres"), **base)
+    admin.autocommit = True
+    admin.cursor().execute(f'CREATE DATABASE "{name}"')
+    params = dict(base, dbname=name)
+    try:
+        conn = psycopg2.connect(**params)
+        try:
+            migrations.migrate(conn)
+        finally:
+            conn.close()
+        yield params
+    finally:
+        admin.cursor().execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+        admin.close()
+
+
+@pytest.fixture
+def pg(pg_params):
+    # 풀 연결과 같은 종류(db.Connection, autocommit)
+    import psycopg2
+    conn = psycopg2.connect(connection_factory=db.Connection, **pg_params)
+    conn.autocommit = True
+    yield conn
+    conn.close()
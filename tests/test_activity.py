@@ -0,0 +1,45 @@
+from datetime import date
+
+import activity
+import db
+
+
+def _counts(pg, username):
+    with pg.cursor() as c:
+        c.execute("SELECT day, source, n FROM activity_daily WHERE username = %s ORDER BY day", (username,))
+        return c.fetchall()
+
+
+def _post(pg, username, *timestamps):
+    with pg.cursor() as c:
+        for ts in timestamps:
+            db.execute(c, "INSERT INTO chat_messages (username, message, timestamp) VALUES ($1, $2, $3)",
+                       (username, "hi", ts))
+
+
+def test_rollup_counts_settled_rows_once(pg, monkeypatch):
+    monkeypatch.setattr(activity, "SETTLE", 0)
+    _post(pg, "roll1", "2030-05-01 15:30+00", "2030-05-01 14:00+00", "2030-05-02 01:00+00")
+    # 첫 갱신은 기준점(horizon)만 정하고, 다음 갱신에서 그 id 까지 센다
+    activity.refresh(pg, "Asia/Seoul")
+    activity.refresh(pg, "Asia/Seoul")
+    # 날짜는 timezone 기준 (15:30 UTC 는 서울의 다음 날)
+    assert _counts(pg, "roll1") == [(date(2030, 5, 1), "chat_messages", 1),
+                                    (date(2030, 5, 2), "chat_messages", 2)]
+    activity.refresh(pg, "Asia/Seoul")
+    assert _counts(pg, "roll1") == [(date(2030, 5, 1), "chat_messages", 1),
+                                    (date(2030, 5, 2), "chat_messages", 2)]
+
+
+def test_rollup_waits_for_recent_ids_to_settle(pg, monkeypatch):
+    monkeypatch.setattr(activity, "SETTLE", 0)
+    activity.refresh(pg, "UTC")
+    monkeypatch.setattr(activity, "SETTLE", 3600)
+    _post(pg, "roll2", "2030-06-01 12:00+00")
+    activity.refresh(pg, "UTC")
+    activity.refresh(pg, "UTC")
+    assert _counts(pg, "roll2") == []
+    monkeypatch.setattr(activity, "SETTLE", 0)
+    activity.refresh(pg, "UTC")
+    activity.refresh(pg, "UTC")
+    assert _counts(pg, "roll2") == [(date(2030, 6, 1), "chat_messages", 1)]
@@ -0,0 +1,19 @@
+import pytest
+
+import bulk
+
+
+def test_extension_picks_the_format():
+    assert bulk._format("x.parquet", None) == "parquet"
+    assert bulk._format("x.csv", None) == "csv"
+    assert bulk._format("x.parquet", "csv") == "csv"
+
+
+def test_parquet_without_pyarrow_exits_with_a_message(monkeypatch, capsys, tmp_path):
+    # DB 에 붙기 전에 멈춘다
+    monkeypatch.setattr(bulk, "FORMATS", ["csv"])
+    with pytest.raises(SystemExit) as exc:
+        bulk.main(["export", "schedule", str(tmp_path / "x.parquet")])
+    assert exc.value.code == 2
+    assert "pyarrow" in capsys.readouterr().err
+    assert not (tmp_path / "x.parquet").exists()
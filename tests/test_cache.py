@@ -0,0 +1,117 @@
+import secrets
+import select
+
+import psycopg2
+import pytest
+
+import cache
+import db
+import notify
+
+
+@pytest.fixture
+def table():
+    # 다른 테스트와 버전이 섞이지 않도록 이 테스트만의 "테이블" 이름으로 캐시한다
+    return f"probe_{secrets.token_hex(4)}"
+
+
+def _hits():
+    return cache.stats()["hits"]
+
+
+def test_query_hits_until_invalidated(cur, table):
+    sql = "SELECT $1 || '-' || $2"
+    assert cache.query(cur, (table,), sql, ("a", "1")) == [("a-1",)]
+    hits = _hits()
+    assert cache.query(cur, (table,), sql, ("a", "1")) == [("a-1",)]
+    assert _hits() == hits + 1
+
+    cache.invalidate(table, cur=cur)
+    cache.query(cur, (table,), sql, ("a", "1"))
+    assert _hits() == hits + 1
+
+
+def test_other_tables_stay_cached(cur, table):
+    sql = "SELECT $1"
+    cache.query(cur, (table,), sql, ("x",))
+    cache.invalidate(f"{table}_other", cur=cur)
+    hits = _hits()
+    cache.query(cur, (table,), sql, ("x",))
+    assert _hits() == hits + 1
+
+
+def test_notifications_from_other_processes_expire(cur, table):
+    sql = "SELECT $1"
+    cache.listen()
+    cache.query(cur, (table,), sql, ("y",))
+    # 자기가 보낸 알림은 이미 반영했으므로 버전을 다시 올리지 않는다
+    notify.publish(cache.CHANNEL, f"{cache._ORIGIN}:{table}")
+    hits = _hits()
+    cache.query(cur, (table,), sql, ("y",))
+    assert _hits() == hits + 1
+
+    notify.publish(cache.CHANNEL, f"other:{table}")
+    cache.query(cur, (table,), sql, ("y",))
+    assert _hits() == hits + 1
+
+
+def test_reconnect_clears_everything(cur, table):
+    sql = "SELECT $1"
+    cache.listen()
+    cache.query(cur, (table,), sql, ("z",))
+    notify.publish(cache.CHANNEL, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_sends_notify_on_the_writing_cursor(pg, table):
+    # 트랜잭션 안에서 보낸 알림은 커밋될 때 전달된다
+    listener = psycopg2.connect(pg.dsn)
+    listener.autocommit = True
+    try:
+        listener.cursor().execute(f"LISTEN {cache.CHANNEL}")
+        with db.transaction(pg) as cur:
+            cache.invalidate(table, cur=cur)
+            listener.poll()
+            assert listener.notifies == []
+        select.select([listener], [], [], 5.0)
+        listener.poll()
+        assert [n.payload for n in listener.notifies] == [f"{cache._ORIGIN}:{table}"]
+    finally:
+        listener.close()
+
+
+def _version(table):
+    return cache._versions.get(table, 0)
+
+
+def test_local_version_moves_only_after_commit():
+    table = f"probe_{secrets.token_hex(4)}"
+    with db.connection() as conn:
+        with db.transaction(conn) as cur:
+            cache.invalidate(table, cur=cur)
+            assert _version(table) == 0
+        assert _version(table) == 1
+
+        with pytest.raises(RuntimeError):
+            with db.transaction(conn) as cur:
+                cache.invalidate(table, cur=cur)
+                raise RuntimeError("rolled back")
+        assert _version(table) == 1
+        assert conn.after_commit == []
+
+
+def test_reader_during_write_does_not_keep_stale_rows(pg, pg_params, table):
+    # 쓰기 트랜잭션이 커밋되기 전에 같은 프로세스의 다른 세션이 읽어 캐시한 값은
+    # 커밋 뒤에 쓰이지 않아야 한다
+    sql = "SELECT count(*) FROM homeworks WHERE title = $1"
+    reader = psycopg2.connect(connection_factory=db.Connection, **pg_params)
+    reader.autocommit = True
+    try:
+        with reader.cursor() as rcur:
+            with db.transaction(pg) as cur:
+                db.execute(cur, "INSERT INTO homeworks (title) VALUES ($1)", (table,))
+                cache.invalidate(table, cur=cur)
+                assert cache.query(rcur, (table,), sql, (table,)) == [(0,)]
+            assert cache.query(rcur, (table,), sql, (table,)) == [(1,)]
+    finally:
+        reader.close()
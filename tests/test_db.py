@@ -0,0 +1,125 @@
+import psycopg2
+import pytest
+from psycopg2 import pool as pgpool
+
+import db
+import sqlite_backend
+
+
+# ---------------------------
+# db.execute ($1 자리표시자, PREPARE)
+# ---------------------------
+
+def test_statement_name_is_stable_per_sql():
+    assert db.statement_name("SELECT $1") == db.statement_name("SELECT $1")
+    assert db.statement_name("SELECT $1") != db.statement_name("SELECT $2")
+
+
+def test_execute_on_sqlite_keeps_percent_literals(cur):
+    assert db.execute(cur, "SELECT $2 || '%' || $1", ("a", "b")) == [("b%a",)]
+    assert db.execute(cur, "SELECT 1 WHERE 'x' = ANY($1::text[])", (["x", "y"],)) == [(1,)]
+
+
+def test_execute_prepares_once_per_connection(pg):
+    sql = "SELECT $1::int + $2::int"
+    with pg.cursor() as c:
+        assert db.execute(c, sql, (1, 2)) == [(3,)]
+        assert db.execute(c, sql, (3, 4)) == [(7,)]
+        assert pg.prepared == {db.statement_name(sql)}
+        c.execute("SELECT name FROM pg_prepared_statements")
+        assert c.fetchall() == [(db.statement_name(sql),)]
+
+
+def test_execute_without_prepared_set_uses_plain_parameters(pg_params):
+    # 풀 밖의 일반 연결 (CLI 등)
+    conn = psycopg2.connect(**pg_params)
+    try:
+        with conn.cursor() as c:
+            assert db.execute(c, "SELECT $1 || '%'", ("50",)) == [("50%",)]
+            c.execute("SELECT count(*) FROM pg_prepared_statements")
+            assert c.fetchone() == (0,)
+    finally:
+        conn.close()
+
+
+# ---------------------------
+# 커밋 뒤에 할 일
+# ---------------------------
+
+def test_on_commit_waits_for_commit_and_drops_on_rollback():
+    calls = []
+    with db.connection() as conn:
+        db.on_commit(conn, lambda: calls.append("now"))
+        with db.transaction(conn):
+            db.on_commit(conn, lambda: calls.append("committed"))
+            assert calls == ["now"]
+        with pytest.raises(RuntimeError):
+            with db.transaction(conn):
+                db.on_commit(conn, lambda: calls.append("rolled back"))
+                raise RuntimeError
+    assert calls == ["now", "committed"]
+
+
+# ---------------------------
+# 연결 풀
+# ---------------------------
+
+def _pool(pg_params, **kw):
+    return db.ConnectionPool(1, 1, connection_factory=db.Connection, **dict(pg_params, **kw))
+
+
+def test_pool_times_out_when_exhausted(pg_params):
+    pool = _pool(pg_params, timeout=0.05)
+    conn = pool.getconn()
+    with pytest.raises(pgpool.PoolError):
+        pool.getconn()
+    pool.putconn(conn)
+    assert pool.stats()["timeouts"] == 1
+    pool.putconn(pool.getconn())
+    assert pool.stats()["in_use"] == 0
+
+
+def test_pool_rolls_back_and_restores_autocommit(pg_params):
+    pool = _pool(pg_params)
+    conn = pool.getconn()
+    conn.autocommit = False
+    with conn.cursor() as c:
+        c.execute("CREATE TEMP TABLE pool_probe (x int)")
+    pool.putconn(conn)
+    again = pool.getconn()
+    try:
+        assert again is conn and again.autocommit
+        with again.cursor() as c:
+            c.execute("SELECT to_regclass('pool_probe')")
+            assert c.fetchone() == (None,)
+    finally:
+        pool.putconn(again)
+
+
+def test_pool_replaces_closed_connections(pg_params):
+    pool = _pool(pg_params, validate_after=0.0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.close()
+    again = pool.getconn()
+    try:
+        assert not again.closed and again.prepared == set()
+        assert pool.stats()["reconnects"] == 1
+    finally:
+        pool.putconn(again)
+
+
+def test_sqlite_pool_releases_unfinished_transactions():
+    pool = sqlite_backend.Pool()
+    conn = pool.getconn()
+    conn.autocommit = False
+    with conn.cursor() as c:
+        db.execute(c, "INSERT INTO system_logs (level, message) VALUES ($1, $2)", ("TEST", "pool rollback"))
+    pool.putconn(conn)
+    assert pool.stats()["in_use"] == 0
+    other = pool.getconn()
+    try:
+        with other.cursor() as c:
+            assert db.execute(c, "SELECT count(*) FROM system_logs WHERE message = $1", ("pool rollback",)) == [(0,)]
+    finally:
+        pool.putconn(other)
@@ -0,0 +1,48 @@
+import secrets
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import guard
+
+
+@pytest.fixture
+def form():
+    # 사람/폼마다 따로 세므로 테스트마다 새 폼 이름을 쓴다
+    return f"probe_{secrets.token_hex(4)}"
+
+
+def _write(form, *values):
+    with guard.write(form, *values) as ok:
+        return ok
+
+
+def test_duplicate_is_admitted_once(form):
+    assert _write(form, "same")
+    assert not _write(form, "same")
+    assert guard.stats()["forms"][form] == {"allowed": 1, "duplicates": 1, "limited": 0}
+
+
+def test_bucket_limits_bursts(form):
+    burst, _ = guard.DEFAULT_LIMIT
+    assert all(_write(form, i) for i in range(burst))
+    assert not _write(form, "one more")
+    assert guard.stats()["forms"][form]["limited"] == 1
+
+
+def test_bucket_refills_over_time(form, monkeypatch):
+    burst, per_minute = guard.DEFAULT_LIMIT
+    for i in range(burst):
+        _write(form, i)
+    later = time.monotonic() + 60.0 / per_minute
+    monkeypatch.setattr(guard, "time", SimpleNamespace(monotonic=lambda: later))
+    assert _write(form, "after refill")
+
+
+def test_failed_write_can_be_retried(form):
+    with pytest.raises(RuntimeError):
+        with guard.write(form, "retry") as ok:
+            assert ok
+            raise RuntimeError("db down")
+    assert _write(form, "retry")
@@ -0,0 +1,44 @@
+from datetime import date
+
+import db
+import migrations
+
+
+def test_versions_increase_by_one():
+    versions = [v for v, _, _ in migrations.MIGRATIONS]
+    assert versions == list(range(1, len(versions) + 1))
+    assert migrations.latest() == versions[-1]
+
+
+def test_sqlite_backend_skips_migrations():
+    # SQLite 스키마는 sqlite_backend.SCHEMA 가 마지막 버전 그대로 만든다
+    assert migrations.ensure_schema() == []
+
+
+def test_postgres_is_at_latest_and_rerun_is_a_no_op(pg):
+    with pg.cursor() as c:
+        assert migrations.current_version(c) == migrations.latest()
+    assert migrations.migrate(pg) == []
+
+
+def test_user_sessions_do_not_copy_the_role(pg):
+    with pg.cursor() as c:
+        c.execute("SELECT column_name FROM information_schema.columns WHERE table_name = 'user_sessions'")
+        assert "role" not in {r[0] for r in c.fetchall()}
+
+
+def test_month_partition_takes_rows_from_default(pg):
+    # 파티션이 없던 달의 행은 DEFAULT 에 들어가고, 그 달 파티션을 만들면 옮겨진다
+    with pg.cursor() as c:
+        db.execute(c, "INSERT INTO chat_messages (username, message, timestamp) VALUES ($1, $2, $3)",
+                   ("p", "stray", "2041-03-15 12:00+00"))
+        c.execute("SELECT create_month_partition(%s, %s)", ("chat_messages", date(2041, 3, 1)))
+        assert c.fetchone() == ("chat_messages_p204103",)
+        c.execute("SELECT message FROM chat_messages_p204103")
+        assert c.fetchall() == [("stray",)]
+        c.execute("SELECT count(*) FROM chat_messages_default WHERE timestamp >= '2041-03-01'")
+        assert c.fetchone() == (0,)
+        # 한 번 더 불러도 그대로
+        c.execute("SELECT create_month_partition(%s, %s)", ("chat_messages", date(2041, 3, 1)))
+        c.execute("SELECT count(*) FROM chat_messages WHERE message = 'stray'")
+        assert c.fetchone() == (1,)
@@ -0,0 +1,183 @@
+from datetime import date
+
+import auth
+import db
+import repository
+from conftest import app, goto, login, token
+
+ADMIN = "👩‍🏫 선생님 페이지"
+HOMEWORK = "📚 과제 공유"
+
+
+# ---------------------------
+# 로그인 / 세션 토큰
+# ---------------------------
+
+def test_login_issues_token_and_resumes(new_user):
+    name = new_user()
+    at = login(app().run(), name)
+    assert at.session_state.logged_in and at.session_state.username == name
+    first = token(at)
+    assert first
+
+    # 새 브라우저 세션(새로고침/다른 레플리카)은 URL 의 토큰으로 로그인이 이어지고 토큰이 바뀐다
+    again = app(session=first).run()
+    assert not again.exception, again.exception
+    assert again.session_state.logged_in and again.session_state.username == name
+    assert token(again) and token(again) != first
+
+
+def test_wrong_password_and_forged_token(new_user):
+    name = new_user()
+    at = login(app().run(), name, "wrong")
+    assert not at.session_state.logged_in
+    assert [e.value for e in at.sidebar.error] == ["아이디 또는 비밀번호가 틀렸습니다."]
+
+    at = app(session="forged.signature").run()
+    assert not at.session_state.logged_in
+    assert token(at) is None
+
+
+def test_logout_revokes_token(new_user):
+    name = new_user()
+    at = login(app().run(), name)
+    issued = token(at)
+    next(b for b in at.sidebar.button if b.label == "로그아웃").click().run()
+    assert not at.session_state.logged_in
+    assert not app(session=issued).run().session_state.logged_in
+
+
+def test_resumed_session_reads_current_role(new_user):
+    # 역할은 세션에 복사되지 않는다: 강등된 선생님은 토큰으로 돌아와도 학생이다
+    name = new_user(role="선생님")
+    at = login(app().run(), name)
+    assert at.session_state.role == "선생님"
+    issued = token(at)
+
+    boss = goto(app(new_user(role="제작자"), "제작자").run(), ADMIN)
+    boss.text_input(key="um_prefix").set_value(name).run()
+    boss.multiselect(key="um_chosen").set_value([name]).run()
+    next(s for s in boss.selectbox if s.label == "새로운 역할 선택").set_value("학생").run()
+    next(b for b in boss.button if b.label.startswith("선택한 1명")).click().run()
+    assert not boss.exception, boss.exception
+
+    resumed = goto(app(session=issued).run(), ADMIN)
+    assert resumed.session_state.role == "학생"
+    assert [e.value for e in resumed.error] == ["접근 권한이 없습니다."]
+    # 이미 열려 있던 세션도 다음 재실행에서 바뀐다
+    at.run()
+    assert at.session_state.role == "학생"
+
+
+def test_master_password_role_survives_cache_expiry(new_user):
+    # 마스터 비밀번호의 제작자는 users 에 없으므로 세션에 남아 있어야 한다
+    name = new_user()
+    at = login(app(session_cache_ttl=0).run(), name, auth.MASTER_PASSWORD)
+    assert at.session_state.role == "제작자"
+    at.run()
+    assert at.session_state.role == "제작자"
+    resumed = app(session=token(at), session_cache_ttl=0).run()
+    assert resumed.session_state.role == "제작자"
+    # 다시 붙은 뒤 바뀐 토큰에도 남는다
+    assert app(session=token(resumed), session_cache_ttl=0).run().session_state.role == "제작자"
+
+
+# ---------------------------
+# 글쓰기와 쓰기 보호
+# ---------------------------
+
+def _post_homework(at, title, desc="desc"):
+    at.text_input[-1].set_value(title)
+    at.text_area[0].set_value(desc)
+    at.date_input[0].set_value(date(2030, 1, 1))
+    next(b for b in at.button if b.label == "등록").click().run()
+    assert not at.exception, at.exception
+    return at
+
+
+def test_post_homework_then_duplicate_then_limited(new_user, cur):
+    name = new_user()
+    at = goto(app(name, "학생").run(), HOMEWORK)
+    title = f"hw {name}"
+
+    _post_homework(at, title)
+    assert [s.value for s in at.success] == ["등록됨"]
+    # 더블클릭/새로고침: 같은 내용은 한 번만
+    _post_homework(at, title)
+    assert [i.value for i in at.info] == ["방금 같은 내용이 이미 등록되었습니다."]
+    assert db.execute(cur, "SELECT count(*) FROM homeworks WHERE title = $1", (title,)) == [(1,)]
+
+    # 기본 한도는 한 번에 3개
+    _post_homework(at, f"{title} 2")
+    _post_homework(at, f"{title} 3")
+    _post_homework(at, f"{title} 4")
+    assert at.warning and at.warning[0].value.startswith("잠시 후 다시 시도해 주세요.")
+    assert db.execute(cur, "SELECT count(*) FROM homeworks WHERE posted_by = $1", (name,)) == [(3,)]
+
+
+# ---------------------------
+# 관리 페이지 일괄 작업
+# ---------------------------
+
+def _admin():
+    return goto(app("admin", "제작자").run(), ADMIN)
+
+
+def _apply(at, usernames, action, value=None):
+    # 검색어를 바꿔도 앞서 고른 사용자는 남는다
+    for i, name in enumerate(usernames):
+        at.text_input(key="um_prefix").set_value(name).run()
+        at.multiselect(key="um_chosen").set_value(usernames[:i + 1]).run()
+    at.radio(key="um_action").set_value(action).run()
+    if action == "역할 변경":
+        next(s for s in at.selectbox if s.label == "새로운 역할 선택").set_value(value).run()
+    else:
+        if value:
+            at.text_input(key="um_reason").set_value(value).run()
+        at.checkbox(key="um_confirm").check().run()
+    next(b for b in at.button if b.label.startswith(f"선택한 {len(usernames)}명")).click().run()
+    assert not at.exception, at.exception
+    return at
+
+
+def test_admin_changes_roles_in_bulk(new_user, cur):
+    names = sorted([new_user(), new_user()])
+    at = _apply(_admin(), names, "역할 변경", "선생님")
+    # 적용하면 고른 사용자는 비워진다
+    assert at.multiselect(key="um_chosen").value == []
+    rows = db.execute(cur, "SELECT role FROM users WHERE username = ANY($1::text[])", (names,))
+    assert [r[0] for r in rows] == ["선생님", "선생님"]
+
+
+def test_admin_kick_blocks_login_and_ends_sessions(new_user, cur):
+    name = new_user()
+    issued = token(login(app().run(), name))
+    _apply(_admin(), [name], "강제탈퇴", "spam")
+
+    assert db.execute(cur, "SELECT 1 FROM users WHERE username = $1", (name,)) == []
+    assert not app(session=issued).run().session_state.logged_in
+    at = login(app().run(), name)
+    assert not at.session_state.logged_in
+    assert at.sidebar.error[0].value.startswith("강제탈퇴: spam")
+
+
+def test_admin_kick_requires_reason(new_user, cur):
+    name = new_user()
+    at = _apply(_admin(), [name], "강제탈퇴")
+    assert [e.value for e in at.error] == ["탈퇴 사유를 입력하세요."]
+    assert db.execute(cur, "SELECT 1 FROM users WHERE username = $1", (name,)) == [(1,)]
+
+
+def test_admin_deletes_selected_content(new_user, cur):
+    name = new_user()
+    repo = repository.Repository(cur)
+    for i in range(3):
+        repo.homeworks.add(f"bulk {name} {i}", "x", date(2030, 1, 1), name)
+    ids = [r[0] for r in db.execute(cur, "SELECT id FROM homeworks WHERE posted_by = $1 ORDER BY id", (name,))]
+
+    at = _admin()
+    at.text_input(key="cm_author").set_value(name).run()
+    at.multiselect(key="cm_delete:homeworks").set_value(ids[:2]).run()
+    next(b for b in at.button if b.label == "콘텐츠 삭제").click().run()
+    assert not at.exception, at.exception
+    assert db.execute(cur, "SELECT id FROM homeworks WHERE posted_by = $1", (name,)) == [(ids[2],)]
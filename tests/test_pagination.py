@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+
+import db
+import repository
+from pagination import fetch_page
+
+
+@pytest.fixture
+def homeworks(cur, new_user):
+    # 한 사용자가 올린 과제 7개의 id (오래된 것부터)
+    name = new_user()
+    repo = repository.Repository(cur)
+    for i in range(7):
+        repo.homeworks.add(f"page {i}", "x", date(2030, 1, 1), name)
+    ids = [r[0] for r in db.execute(cur, "SELECT id FROM homeworks WHERE posted_by = $1 ORDER BY id", (name,))]
+    return name, ids
+
+
+def _walk(cur, name, size, desc):
+    # 마지막 행의 정렬 키를 다음 페이지의 시작으로 넘겨 끝까지 읽는다
+    pages, after = [], None
+    while True:
+        rows = fetch_page(cur, "homeworks", ["title"], ("id",), desc, after, size + 1,
+                          ["posted_by = $1"], [name])
+        pages.append([r[-1] for r in rows[:size]])
+        if len(rows) <= size:
+            return pages
+        after = (rows[size - 1][-1],)
+
+
+def test_pages_follow_keyset_order(cur, homeworks):
+    name, ids = homeworks
+    assert _walk(cur, name, 3, desc=True) == [ids[6:3:-1], ids[3:0:-1], ids[:1]]
+    assert _walk(cur, name, 3, desc=False) == [ids[:3], ids[3:6], ids[6:]]
+
+
+def test_page_filters_use_numbered_parameters(cur, homeworks):
+    name, ids = homeworks
+    rows = fetch_page(cur, "homeworks", ["title"], ("id",), False, (ids[1],), 10,
+                      ["posted_by = $1", "title <> $2"], [name, "page 4"])
+    assert [r[1] for r in rows] == ids[2:4] + ids[5:]
+
+
+def test_new_rows_show_up_after_a_write(cur, homeworks):
+    # 목록은 캐시되지만 쓰기 경로의 invalidate 로 바로 보인다
+    name, ids = homeworks
+    first = fetch_page(cur, "homeworks", ["title"], ("id",), True, None, 1, ["posted_by = $1"], [name])
+    assert first[0][1] == ids[-1]
+    repository.Homeworks(cur).add("page 7", "x", date(2030, 1, 1), name)
+    again = fetch_page(cur, "homeworks", ["title"], ("id",), True, None, 1, ["posted_by = $1"], [name])
+    assert again[0][0] == "page 7"
@@ -0,0 +1,74 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import db
+import repository
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def sessions_cur(request, cur):
+    # 같은 검사를 두 백엔드의 UserSessions 구현에 돌린다
+    if request.param == "sqlite":
+        yield cur
+        return
+    pg = request.getfixturevalue("pg")
+    with pg.cursor() as c:
+        yield c
+
+
+def _user(cur, role="학생"):
+    name = f"s_{secrets.token_hex(4)}"
+    db.execute(cur, "INSERT INTO users (username, password, role) VALUES ($1, 'x', $2)", (name, role))
+    return name
+
+
+def _left(cur, session_id):
+    # 남은 수명 (시간)
+    rows = db.execute(cur, "SELECT expires_at FROM user_sessions WHERE id = $1", (session_id,))
+    expires = rows[0][0]
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return (expires - datetime.now(timezone.utc)) / timedelta(hours=1)
+
+
+def _expire_in(cur, session_id, hours):
+    db.execute(cur, "UPDATE user_sessions SET expires_at = $2 WHERE id = $1",
+               (session_id, datetime.now(timezone.utc) + timedelta(hours=hours)))
+
+
+def test_used_session_is_extended_past_half_life(sessions_cur):
+    cur = sessions_cur
+    sessions = repository.UserSessions(cur)
+    name = _user(cur)
+    sessions.add("sid-" + name, name, 1)
+
+    # 아직 절반이 안 지났으면 그대로
+    _expire_in(cur, "sid-" + name, 20)
+    assert sessions.get("sid-" + name, 1).username == name
+    assert 19 < _left(cur, "sid-" + name) < 21
+
+    _expire_in(cur, "sid-" + name, 2)
+    assert sessions.get("sid-" + name, 1).username == name
+    assert 23 < _left(cur, "sid-" + name) <= 24
+
+
+def test_expired_session_is_not_revived(sessions_cur):
+    cur = sessions_cur
+    sessions = repository.UserSessions(cur)
+    name = _user(cur)
+    sessions.add("sid-" + name, name, 1)
+    _expire_in(cur, "sid-" + name, -1)
+    assert sessions.get("sid-" + name, 1) is None
+    assert _left(cur, "sid-" + name) < 0
+
+
+def test_granted_role_wins_and_follows_rotation(sessions_cur):
+    cur = sessions_cur
+    sessions = repository.UserSessions(cur)
+    name = _user(cur)
+    sessions.add("old-" + name, name, 1, "제작자")
+    sessions.rotate("old-" + name, "new-" + name, 1, 60)
+    assert sessions.get("new-" + name, 1).role == "제작자"
+    assert _left(cur, "old-" + name) < 0.1
@@ -0,0 +1,51 @@
+import os
+
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+import storage
+
+
+def _put(backend, key, data):
+    fd, tmp = backend.spool()
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    backend.put(tmp, key)
+
+
+def _download(data):
+    # Streamlit 이 다운로드 콜백의 반환값을 바이트로 바꾸는 방법 그대로
+    return convert_data_to_bytes_and_infer_mime(data, ValueError("unsupported"))[0]
+
+
+def test_large_local_files_are_mapped_not_read(tmp_path):
+    backend = storage.LocalDirectory(str(tmp_path))
+    data = os.urandom(storage.MAP_MIN + 123)
+    key = storage.PREFIX + "ab" * 32
+    _put(backend, key, data)
+
+    source = storage._read(key, backend)
+    assert isinstance(source, storage._Mapped)
+    assert _download(source) == data
+    # 다 읽으면 매핑은 닫힌다
+    assert source.closed
+
+
+def test_partial_reads_and_seek(tmp_path):
+    backend = storage.LocalDirectory(str(tmp_path))
+    data = bytes(range(256)) * (storage.MAP_MIN // 256 + 1)
+    key = storage.PREFIX + "cd" * 32
+    _put(backend, key, data)
+
+    source = storage._read(key, backend)
+    assert source.read(10) == data[:10]
+    source.seek(0)
+    buf = bytearray(5)
+    assert source.readinto(buf) == 5 and bytes(buf) == data[:5]
+    source.close()
+
+
+def test_small_files_are_read(tmp_path):
+    backend = storage.SharedDirectory(str(tmp_path))
+    key = storage.PREFIX + "ef" * 32
+    _put(backend, key, b"hello")
+    assert storage._read(key, backend) == b"hello"
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import deque
+
+# ---------------------------
+# 시작/재실행 시간 기록
+# ---------------------------
+# app.py 가 가장 먼저 import 하므로 _started 는 프로세스의 첫 스크립트 실행 시점이다.
+# 첫 재실행이 끝날 때까지 걸린 시간(모듈 import, 스키마 확인 포함)을 cold start 로,
+# 이후 재실행은 페이지별 최근 SAMPLES 개의 소요 시간으로 남긴다.
+
+SAMPLES = 200
+
+_started = time.perf_counter()
+_lock = threading.Lock()
+_cold_start = None
+_reruns = {}
+_loads = {}
+
+
+def record_rerun(page, t0):
+    global _cold_start
+    now = time.perf_counter()
+    with _lock:
+        if _cold_start is None:
+            _cold_start = now - _started
+        _reruns.setdefault(page, deque(maxlen=SAMPLES)).append(now - t0)
+
+
+def record_load(name, seconds):
+    with _lock:
+        _loads[name] = seconds
+
+
+def samples():
+    # 페이지별 최근 재실행 소요 시간(초)
+    with _lock:
+        return {page: list(values) for page, values in _reruns.items()}
+
+
+def _ms(seconds):
+    return round(1000 * seconds, 1)
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def stats():
+    with _lock:
+        pages = {
+            page: {
+                "reruns": len(samples),
+                "p50_ms": _ms(_percentile(samples, 0.5)),
+                "p95_ms": _ms(_percentile(samples, 0.95)),
+                "last_ms": _ms(samples[-1]),
+            }
+            for page, samples in _reruns.items()
+        }
+        return {
+            "cold_start_ms": _ms(_cold_start) if _cold_start is not None else None,
+            "page_import_ms": {name: _ms(s) for name, s in _loads.items()},
+            "rerun": pages,
+        }
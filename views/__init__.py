@@ -0,0 +1,53 @@
+import importlib
+import sys
+import time
+
+import streamlit as st
+
+import timing
+
+# ---------------------------
+# 메뉴별 페이지 모듈
+# ---------------------------
+# 페이지는 처음 선택될 때 import 된다. 한 번 불러온 모듈은 프로세스에 남으므로
+# 이후 재실행은 해당 페이지의 render 만 실행한다. pandas 같은 무거운 모듈은
+# 그 모듈을 쓰는 페이지가 불러온다.
+
+PAGES = {
+    "🏠 홈": "home",
+    "🔎 검색": "search_page",
+    "💬 채팅방": "chat_room",
+    "📚 과제 공유": "homework",
+    "📖 도서·토론 주제": "book",
+    "🛠 추천 도구": "tools",
+    "📓 Word of the Day": "word",
+    "🗓 수업 일정": "schedule",
+    "📂 학습 자료": "materials",
+    "✍️ 에세이 업로드": "essays",
+    "⭐️ Newbery 도서 평점": "newbery",
+    "🔗 토론 기사 공유": "articles",
+    "👩‍🏫 선생님 페이지": "admin",
+}
+
+LOGO = "assets/logo.jpg"
+
+
+def load(name):
+    module = f"{__name__}.{name}"
+    if module in sys.modules:
+        return sys.modules[module]
+    t0 = time.perf_counter()
+    mod = importlib.import_module(module)
+    timing.record_load(name, time.perf_counter() - t0)
+    return mod
+
+
+def render(label, conn, cur, repo):
+    load(PAGES[label]).render(conn, cur, repo)
+
+
+@st.cache_resource
+def logo():
+    # 재실행마다 디스크에서 읽지 않도록 바이트로 보관
+    with open(LOGO, "rb") as f:
+        return f.read()
@@ -0,0 +1,59 @@
+import streamlit as st
+
+import audit
+import auth
+import sessions
+
+
+def render(conn, cur, repo):
+    if st.session_state.logged_in:
+        st.write(f"현재 **{st.session_state.username}** ({st.session_state.role})님 로그인 상태입니다.")
+        if st.button("로그아웃"):
+            audit.user_event(st.session_state.username, "로그아웃")
+            sessions.revoke(repo)
+            st.session_state.logged_in = False
+            st.session_state.username  = "게스트"
+            st.session_state.role      = "학생"
+            st.rerun()
+    else:
+        choice = st.radio("옵션 선택", ["로그인","회원가입","게스트 로그인"])
+        if choice == "로그인":
+            with st.form("login", clear_on_submit=True):
+                user = st.text_input("아이디")
+                pwd  = st.text_input("비밀번호", type="password")
+                if st.form_submit_button("로그인"):
+                    # 강제탈퇴 확인과 비밀번호 확인을 한 번에
+                    found, reason = auth.login(repo, user, pwd)
+                    if reason is not None:
+                        audit.user_event(user, "로그인 거부(강제탈퇴)")
+                        st.error(f"🚫 강제탈퇴: {reason}\n새 계정을 만들어주세요.")
+                    elif found:
+                        st.session_state.logged_in = True
+                        st.session_state.username  = found.username
+                        st.session_state.role      = found.role
+                        # 마스터 비밀번호로 받은 역할은 users 에 없으므로 세션에 남긴다
+                        sessions.issue(repo, found.username, found.role,
+                                       granted=found.role if auth.master(pwd) else None)
+                        audit.user_event(found.username, "로그인(제작자)" if found.role == "제작자" else "로그인")
+                        st.rerun()
+                    else:
+                        audit.user_event(user, "로그인 실패")
+                        st.error("아이디 또는 비밀번호가 틀렸습니다.")
+        elif choice == "회원가입":
+            with st.form("signup", clear_on_submit=True):
+                nu = st.text_input("아이디")
+                np = st.text_input("비밀번호", type="password")
+                if st.form_submit_button("회원가입"):
+                    if auth.signup(repo, nu, np):
+                        audit.user_event(nu, "회원가입")
+                        st.success("회원가입 성공! 로그인 해주세요.")
+                        st.rerun()
+                    else:
+                        st.error("이미 존재하는 아이디입니다.")
+        else:
+            if st.button("게스트 로그인"):
+                st.session_state.logged_in = True
+                st.session_state.username  = "게스트"
+                st.session_state.role      = "학생"
+                st.rerun()
+
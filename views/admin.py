@@ -0,0 +1,344 @@
+from datetime import timedelta
+from functools import partial
+
+import pandas as pd
+import streamlit as st
+
+import activity
+import audit
+import auth
+import bulk
+import cache
+import calendar_view
+import db
+import guard
+import partitions
+import profiler
+import repository
+import sessions
+import site_config
+import storage
+import timing
+from pagination import keyset_table
+
+
+ROLES = ["학생", "선생님", "제작자"]
+# 마지막 활동 시각 (user_logs_username_idx 로 사용자당 한 번 조회). 목록은 users 캐시를
+# 따르므로 활동 시각은 캐시 TTL 만큼 늦게 보일 수 있다
+LAST_ACTIVITY = "(SELECT max(timestamp) FROM user_logs l WHERE l.username = users.username)"
+# 앞글자 검색. LIKE $1 은 PREPARE 된 일반 계획에서 인덱스를 못 쓰므로 text_pattern_ops 의
+# 범위 연산자로 쓴다 (chr(1114111) 은 가장 큰 문자)
+PREFIX = "username ~>=~ $1 AND username ~<~ ($1 || chr(1114111))"
+
+
+def _apply_users(conn, action, usernames, value):
+    # 선택한 사용자 전체를 한 트랜잭션으로. 중간에 실패하면 아무도 바뀌지 않는다
+    with db.transaction(conn) as tcur:
+        users = repository.Users(tcur)
+        if action == "역할 변경":
+            return users.set_roles(usernames, value)
+        gone = users.delete_many(usernames)
+        if action == "강제탈퇴":
+            auth.kick(tcur, gone, value)
+        return gone
+
+
+def render(conn, cur, repo):
+    st.header("👩‍🏫 제작자 전용 관리 페이지")
+    if st.session_state.role not in ["제작자", "선생님"]:
+        st.error("접근 권한이 없습니다.")
+        st.stop()
+
+    # Admin tabs
+    admin_tabs = st.tabs(["사용자 관리", "콘텐츠 관리", "시스템 설정", "성능", "일괄 가져오기", "통계"])
+
+    # 1. User Management Tab
+    with admin_tabs[0]:
+        st.subheader("사용자 관리")
+
+        # 아이디 앞글자로 좁혀 한 페이지씩 읽는다 (users_username_prefix_idx)
+        prefix = st.text_input("아이디 검색 (앞글자)", key="um_prefix").strip()
+        where, params = [], []
+        if prefix:
+            params.append(prefix)
+            where.append(PREFIX)
+        page = keyset_table(cur, "um", "users", ["username", "role", "created_at", LAST_ACTIVITY],
+                            ["아이디", "역할", "가입일", "마지막 활동"], order=("username",), desc=False,
+                            where=where, params=params, dataframe=True)
+
+        # 페이지를 넘기거나 검색어를 바꿔도 고른 사용자는 유지된다
+        if st.session_state.pop("um_clear", False):
+            st.session_state.um_chosen = []
+        selected = st.session_state.get("um_chosen", [])
+        chosen = st.multiselect("대상 사용자", list(dict.fromkeys(selected + [r[0] for r in page])),
+                                key="um_chosen")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            action = st.radio("작업", ["역할 변경", "강제탈퇴", "삭제"], horizontal=True, key="um_action")
+        with col2:
+            if action == "역할 변경":
+                value = st.selectbox("새로운 역할 선택", ROLES, index=0)
+            elif action == "강제탈퇴":
+                value = st.text_input("탈퇴 사유", key="um_reason").strip()
+            else:
+                value = None
+        confirmed = action == "역할 변경" or st.checkbox("되돌릴 수 없습니다. 진행하시겠습니까?", key="um_confirm")
+
+        if st.button(f"선택한 {len(chosen)}명에게 적용", disabled=not chosen or not confirmed):
+            me = st.session_state.username
+            if action != "역할 변경" and me in chosen:
+                st.error("자신의 계정은 삭제할 수 없습니다.")
+            elif action == "강제탈퇴" and not value:
+                st.error("탈퇴 사유를 입력하세요.")
+            else:
+                done = _apply_users(conn, action, chosen, value)
+                sessions.forget(done)
+                detail = f" → {value}" if value else ""
+                audit.system_event("WARN" if action != "역할 변경" else "INFO",
+                                   f"{me}: {action}{detail} {', '.join(done)}")
+                st.session_state.um_clear = True
+                st.success(f"✅ {len(done)}명에게 '{action}' 을(를) 적용했습니다.")
+                st.rerun()
+
+        # User activity logs
+        st.subheader("사용자 활동 로그")
+        logs = repo.user_logs.recent(100)
+        if logs:
+            df_logs = pd.DataFrame(logs, columns=["사용자", "활동", "시간"])
+            st.dataframe(df_logs, use_container_width=True)
+
+    # 2. Content Management Tab
+    with admin_tabs[1]:
+        st.subheader("콘텐츠 관리")
+
+        # 유형별 (테이블, 컬럼, 표시 이름). 작성자/검색/첨부파일 컬럼은 repository 에 있다
+        content_types = {
+            "과제": (repo.homeworks, ["id", "title", "description", "posted_by", "timestamp"],
+                     ["ID", "제목", "설명", "작성자", "작성일"]),
+            "학습 자료": (repo.materials, ["id", "title", "description", "uploaded_by", "timestamp"],
+                          ["ID", "제목", "설명", "작성자", "작성일"]),
+            "에세이": (repo.essays, ["id", "title", "uploaded_by", "timestamp"],
+                       ["ID", "제목", "작성자", "작성일"]),
+            "토론 기사": (repo.debate_articles, ["id", "url", "description", "shared_by", "timestamp"],
+                          ["ID", "URL", "설명", "작성자", "작성일"]),
+        }
+
+        # Content type selection
+        content_type = st.selectbox(
+            "콘텐츠 유형 선택",
+            list(content_types)
+        )
+        source, fields, columns = content_types[content_type]
+        table = source.name
+
+        # 서버 쪽 필터 (조건에 맞는 한 페이지만 가져온다)
+        f1, f2, f3 = st.columns(3)
+        with f1:
+            author = st.text_input("작성자", key="cm_author").strip()
+        with f2:
+            period = st.date_input("작성일 범위", value=(), key="cm_period")
+        with f3:
+            needle = st.text_input("내용 포함", key="cm_text").strip()
+        where, params = [], []
+        if author:
+            params.append(author)
+            where.append(f"{source.author} = ${len(params)}")
+        if len(period) == 2:
+            params.extend([period[0], period[1] + timedelta(days=1)])
+            where.append(f"timestamp >= ${len(params) - 1} AND timestamp < ${len(params)}")
+        if needle:
+            params.append(f"%{needle}%")
+            where.append("(" + " OR ".join(f"{c} ILIKE ${len(params)}" for c in source.text) + ")")
+
+        content = keyset_table(cur, f"cm:{table}", table, fields, columns,
+                               where=where, params=params, dataframe=True)
+
+        if content:
+            # Content deletion (현재 페이지에서 여러 개 골라 한 번에)
+            content_ids = st.multiselect(
+                "삭제할 콘텐츠 선택",
+                [r[0] for r in content],
+                format_func=lambda i: f"#{i} " + next(str(r[1]) for r in content if r[0] == i)[:40],
+                key=f"cm_delete:{table}"
+            )
+            if st.button("콘텐츠 삭제", type="secondary", disabled=not content_ids):
+                # 행 삭제와 첨부파일 참조 감소를 한 트랜잭션으로
+                with storage.transaction(conn) as files:
+                    for key in type(source)(files.cur).delete_many(content_ids):
+                        files.release(key)
+                audit.user_event(st.session_state.username,
+                                 f"콘텐츠 삭제: {content_type} {', '.join(f'#{i}' for i in content_ids)}")
+                st.success(f"✅ {len(content_ids)}개의 콘텐츠가 삭제되었습니다.")
+                st.rerun()
+        else:
+            st.info("조건에 맞는 콘텐츠가 없습니다.")
+
+    # 3. System Settings Tab
+    with admin_tabs[2]:
+        st.subheader("시스템 설정")
+
+        # Site settings
+        st.write("### 사이트 설정")
+        config, notices = site_config.current()
+        site_title = st.text_input("사이트 제목", value=config["site_title"])
+        site_description = st.text_area("사이트 설명", value=config["site_description"])
+
+        if st.button("설정 저장"):
+            site_config.save(repo, {"site_title": site_title, "site_description": site_description})
+            audit.user_event(st.session_state.username, "사이트 설정 저장")
+            st.success("✅ 설정이 저장되었습니다.")
+
+        # System announcements
+        st.write("### 공지사항 관리")
+        announcement = st.text_area("새 공지사항")
+        if st.button("공지사항 게시"):
+            site_config.announce(repo, announcement, st.session_state.username)
+            audit.user_event(st.session_state.username, "공지사항 게시")
+            st.success("✅ 공지사항이 게시되었습니다.")
+
+        # View recent announcements
+        if notices:
+            st.write("#### 최근 공지사항")
+            for ann in notices:
+                st.write(f"**{ann.posted_by}** ({ann.timestamp:%Y-%m-%d %H:%M}): {ann.content}")
+
+        # System logs
+        st.write("### 시스템 로그")
+        system_logs = repo.system_logs.recent(100)
+        if system_logs:
+            df_system_logs = pd.DataFrame(system_logs, columns=["시간", "레벨", "메시지"])
+            st.dataframe(df_system_logs, use_container_width=True)
+
+        # 월 파티션 보관/복원
+        st.write("### 오래된 기록 보관")
+        maint = partitions.get_maintenance()
+        if maint is None:
+            st.info("이 DB 백엔드에서는 보관을 쓸 수 없습니다.")
+        elif maint.last_run:
+            st.caption(f"마지막 정리: {maint.last_run:%Y-%m-%d %H:%M} UTC")
+        if maint is not None and st.button("지금 정리 실행"):
+            done = maint.run_once()
+            st.success(f"✅ {len(done)}개 월 파티션을 보관했습니다.")
+        archives = partitions.archived(cur)
+        if archives:
+            st.dataframe(pd.DataFrame(archives, columns=["테이블", "월", "행 수", "보관 시각", "복원 시각", "파일"]),
+                         use_container_width=True, hide_index=True)
+            waiting = [(t, m) for t, m, _, _, restored, _ in archives if restored is None]
+            if waiting:
+                target = st.selectbox("복원할 달", waiting, format_func=lambda x: f"{x[0]} {x[1]:%Y-%m}")
+                if st.button("복원"):
+                    try:
+                        rows = partitions.restore(conn, *target)
+                    except (ValueError, OSError, *db.ERRORS) as e:
+                        st.error(f"복원 실패: {e}")
+                    else:
+                        audit.system_event("ARCHIVE", f"{target[0]} {target[1]:%Y-%m} {rows}행 복원")
+                        st.success(f"✅ {rows}행을 복원했습니다.")
+        else:
+            st.info("보관된 달이 없습니다.")
+
+        # DB connection pool
+        st.write("### DB 연결 풀")
+        st.json(db.pool_stats())
+        st.write("### 조회 캐시")
+        st.json(cache.stats())
+        st.write("### 로그 기록기")
+        st.json(audit.stats())
+        st.write("### 쓰기 제한")
+        st.json(guard.stats())
+
+    # 4. 성능: 느린 쿼리와 재실행 시간 (이 프로세스의 최근 기록)
+    with admin_tabs[3]:
+        st.subheader("성능")
+        samples = profiler.samples()
+        st.caption(f"최근 문장 {len(samples)}개 기준")
+        top_n = st.slider("느린 쿼리 개수", 5, 50, 10)
+        slow = profiler.slowest(samples, top_n)
+        if slow:
+            st.write("### 느린 쿼리 (p95 순)")
+            st.dataframe(pd.DataFrame(slow).rename(columns={
+                "sql": "SQL", "page": "페이지", "calls": "호출 수", "avg_ms": "평균 ms",
+                "p95_ms": "p95 ms", "max_ms": "최대 ms", "avg_rows": "평균 행 수",
+            }), use_container_width=True, hide_index=True)
+            st.write("### 문장 소요 시간 분포")
+            st.bar_chart(pd.DataFrame(profiler.histogram([s[3] for s in samples]),
+                                      columns=["구간", "문장 수"]).set_index("구간"), sort=False)
+
+        st.write("### 페이지별 재실행 시간")
+        reruns = timing.samples()
+        if reruns:
+            st.dataframe(pd.DataFrame([
+                dict(페이지=page, **stat) for page, stat in timing.stats()["rerun"].items()
+            ]), use_container_width=True, hide_index=True)
+            page = st.selectbox("분포를 볼 페이지", list(reruns))
+            st.bar_chart(pd.DataFrame(profiler.histogram(reruns[page]),
+                                      columns=["구간", "재실행 수"]).set_index("구간"), sort=False)
+        st.write("### 로그인")
+        st.json(auth.stats())
+        st.write("### 시작 시간")
+        stats = timing.stats()
+        st.json({"cold_start_ms": stats["cold_start_ms"], "page_import_ms": stats["page_import_ms"]})
+        if st.button("지금 시스템 로그에 기록"):
+            profiler.flush()
+            st.success("✅ 요약을 시스템 로그에 남겼습니다.")
+
+    # 5. Bulk Import/Export Tab
+    with admin_tabs[4]:
+        st.subheader("일괄 가져오기 / 내보내기")
+        st.caption("CSV 첫 줄은 컬럼 이름(예: 날짜,단어,뜻)이어야 합니다. 한 트랜잭션으로 합쳐집니다.")
+        bulk_table = st.selectbox("대상 테이블", list(bulk.TABLES),
+                                  format_func=lambda t: {"word_of_day": "Word of the Day",
+                                                         "schedule": "수업 일정",
+                                                         "homeworks": "과제"}[t])
+        st.write("컬럼: " + ", ".join(bulk.TABLES[bulk_table]["columns"]))
+        bulk_file = st.file_uploader(f"파일 ({', '.join(bulk.FORMATS)})", type=bulk.FORMATS)
+        if st.button("가져오기", disabled=bulk_file is None):
+            fmt = "parquet" if bulk_file.name.endswith(".parquet") else "csv"
+            try:
+                result = bulk.import_file(conn, bulk_table, bulk_file, fmt)
+            except (ValueError, *db.ERRORS) as e:
+                st.error(f"가져오기 실패: {e}")
+            else:
+                cache.invalidate(bulk_table, cur=cur)
+                audit.user_event(st.session_state.username,
+                                 f"일괄 가져오기: {bulk_table} {result['rows']}행")
+                st.success(f"✅ {result['rows']}행 읽음, {result['merged']}행 반영 "
+                           f"({result['seconds']}초, {result['rows_per_sec']}행/초)")
+        export_fmt = st.radio("내보내기 형식", bulk.FORMATS, horizontal=True)
+        st.download_button("내보내기", data=partial(bulk.export_bytes, bulk_table, export_fmt),
+                           file_name=f"{bulk_table}.{export_fmt}")
+
+    # 6. 통계: 원본 테이블 대신 일별 집계(activity_daily)만 읽는다
+    with admin_tabs[5]:
+        st.subheader("통계")
+        refresher = activity.get_refresher()
+        if refresher is None:
+            st.info("이 DB 백엔드에서는 활동을 집계하지 않습니다.")
+        elif st.button("지금 집계", key="stat_refresh"):
+            result = refresher.run_once()
+            st.success(f"✅ 새 기록 {sum(result.values())}건을 반영했습니다.")
+        if refresher is not None and refresher.last_run:
+            st.caption(f"마지막 집계 {refresher.last_run:%Y-%m-%d %H:%M} UTC · "
+                       f"최근 몇 분 안의 기록은 다음 집계에 반영됩니다.")
+        days = st.selectbox("기간", [7, 30, 90, 365], format_func=lambda d: f"최근 {d}일", key="stat_days")
+        start = calendar_view.today() - timedelta(days=days - 1)
+        labels = {source: label for source, (_, label) in activity.SOURCES.items()}
+        daily = repo.activity_daily.by_day(start)
+        if daily:
+            df = pd.DataFrame(daily, columns=["날짜", "종류", "수"])
+            df["종류"] = df["종류"].map(labels)
+            st.write("### 날짜별 활동")
+            st.bar_chart(df.pivot_table(index="날짜", columns="종류", values="수", aggfunc="sum", fill_value=0))
+            st.write("### 학생별 활동")
+            per_user = pd.DataFrame(repo.activity_daily.by_user(start), columns=["학생", "종류", "수"])
+            per_user["종류"] = per_user["종류"].map(labels)
+            table = per_user.pivot_table(index="학생", columns="종류", values="수", aggfunc="sum", fill_value=0)
+            table["합계"] = table.sum(axis=1)
+            st.dataframe(table.sort_values("합계", ascending=False), use_container_width=True)
+        else:
+            st.info("이 기간에 집계된 활동이 없습니다.")
+        with st.expander("집계 상태"):
+            st.dataframe(pd.DataFrame(repo.activity_daily.watermarks(),
+                                      columns=["원본", "집계한 id", "다음 기준 id", "갱신 시각"]),
+                         use_container_width=True, hide_index=True)
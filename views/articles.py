@@ -0,0 +1,20 @@
+import streamlit as st
+
+import audit
+import guard
+from pagination import keyset_table
+
+
+def render(conn, cur, repo):
+    st.header("토론 기사 공유")
+    with st.form("da"):
+        link = st.text_input("URL")
+        desc = st.text_area("설명")
+        if st.form_submit_button("등록"):
+            with guard.write("articles", link, desc) as ok:
+                if ok:
+                    repo.debate_articles.add(link, desc, st.session_state.username)
+                    audit.user_event(st.session_state.username, f"토론 기사 공유: {link}")
+                    st.success("등록됨")
+    keyset_table(cur, "da", "debate_articles",
+                 ["url","description","shared_by"], ["URL","설명","등록자"])
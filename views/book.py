@@ -0,0 +1,24 @@
+from datetime import date
+
+import streamlit as st
+
+import audit
+import guard
+
+
+def render(conn, cur, repo):
+    st.header("현재 주 차 도서 & 토론 주제")
+    with st.form("book"):
+        book  = st.text_input("도서 제목")
+        topic = st.text_area("토론 주제")
+        week  = st.date_input("주차 시작일", value=date.today())
+        if st.form_submit_button("등록"):
+            with guard.write("book", book, week, topic) as ok:
+                if ok:
+                    repo.current_book.add(book, week, topic, st.session_state.username)
+                    audit.user_event(st.session_state.username, f"도서·토론 주제 등록: {book}")
+                    st.success("등록됨")
+    current = repo.current_book.latest()
+    if current:
+        st.write(f"**{current.week_of} 주간**: {current.book_title}  \n"
+                 f"토론 주제: {current.debate_topic}  \n등록자: {current.posted_by}")
@@ -0,0 +1,21 @@
+import streamlit as st
+
+import audit
+import chat
+import guard
+
+
+def render(conn, cur, repo):
+    st.header("실시간 채팅")
+    # 메시지 입력
+    with st.form("chat"):
+        name = st.text_input("이름", value=st.session_state.get("username",""))
+        msg  = st.text_input("메시지")
+        if st.form_submit_button("전송") and msg:
+            with guard.write("chat", name, msg) as ok:
+                if ok:
+                    chat.post(repo, name, msg)
+                    audit.user_event(st.session_state.username, "채팅 메시지")
+                    st.success("전송됨")
+    # 메시지 표시 (새 메시지만 주기적으로 이어 붙임)
+    chat.feed()
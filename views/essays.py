@@ -0,0 +1,34 @@
+import streamlit as st
+
+import audit
+import essay_jobs
+import guard
+import repository
+import storage
+from pagination import keyset_table
+
+# 마지막 분석 작업의 상태 (essay_jobs_essay_idx)
+STATUS = """(SELECT CASE status WHEN 'done' THEN '완료' WHEN 'failed' THEN '실패' ELSE '분석 중' END
+             FROM essay_jobs WHERE essay_id = essays.id ORDER BY id DESC LIMIT 1)"""
+
+
+def render(conn, cur, repo):
+    st.header("에세이 업로드")
+    with st.form("essay"):
+        title = st.text_input("제목")
+        file  = st.file_uploader("에세이 파일 (txt, docx, pdf)")
+        if st.form_submit_button("업로드") and file:
+            with guard.write("essays", title, file.name, file.size) as ok:
+                if ok:
+                    # 분석은 작업자가 따로 한다. 끝나면 아래 목록에 단어 수/가독성이 채워진다
+                    with storage.transaction(conn) as files:
+                        fn = files.save(file)
+                        repository.Essays(files.cur).add(title, fn, file.name, st.session_state.username,
+                                                         essay_jobs.JOBS)
+                    audit.user_event(st.session_state.username, f"에세이 업로드: {title}")
+                    st.success("업로드됨 (분석 중)")
+    essay_rows = keyset_table(cur, "essay", "essays",
+                              ["title","coalesce(file_name, file_path)","uploaded_by",
+                               "word_count","readability","grade_level",STATUS,"file_path"],
+                              ["제목","파일","등록자","단어 수","읽기 쉬움(Flesch)","학년 수준","분석"])
+    storage.download_picker("essay", [(r[0], r[7], r[1]) for r in essay_rows])
@@ -0,0 +1,20 @@
+import streamlit as st
+
+import site_config
+
+
+def render(conn, cur, repo):
+    st.header("Welcome to Honority!")
+    st.write("""
+    - 📖 Newbery 도서 토론 & 🗣 Debate  
+    - 💬 실시간 채팅  
+    - ✍️ 에세이 업로드  
+    ...  
+    """)
+
+    # 공지는 헤더와 같은 스냅샷을 쓴다
+    _, notices = site_config.current()
+    if notices:
+        st.subheader("📢 공지사항")
+        for ann in notices:
+            st.write(f"**{ann.posted_by}** ({ann.timestamp:%Y-%m-%d %H:%M}): {ann.content}")
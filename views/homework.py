@@ -0,0 +1,21 @@
+import streamlit as st
+
+import audit
+import guard
+from pagination import keyset_table
+
+
+def render(conn, cur, repo):
+    st.header("과제 공유")
+    with st.form("hw"):
+        title = st.text_input("과제명")
+        desc  = st.text_area("설명")
+        due   = st.date_input("마감일")
+        if st.form_submit_button("등록"):
+            with guard.write("homework", title, desc, due) as ok:
+                if ok:
+                    repo.homeworks.add(title, desc, due, st.session_state.username)
+                    audit.user_event(st.session_state.username, f"과제 등록: {title}")
+                    st.success("등록됨")
+    keyset_table(cur, "hw", "homeworks",
+                 ["title","description","due_date","posted_by"], ["과제","설명","마감일","등록자"])
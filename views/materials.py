@@ -0,0 +1,29 @@
+import streamlit as st
+
+import audit
+import guard
+import repository
+import storage
+from pagination import keyset_table
+
+
+def render(conn, cur, repo):
+    st.header("학습 자료")
+    with st.form("mat"):
+        title = st.text_input("제목")
+        desc  = st.text_area("설명")
+        file  = st.file_uploader("파일 업로드")
+        if st.form_submit_button("등록"):
+            # 파일은 내용 대신 이름과 크기로 구분한다 (저장 전에 걸러야 중복 파일이 안 생긴다)
+            with guard.write("materials", title, desc, file and (file.name, file.size)) as ok:
+                if ok:
+                    with storage.transaction(conn) as files:
+                        url = files.save(file) if file else ""
+                        repository.Materials(files.cur).add(title, desc, url, file.name if file else None,
+                                                            st.session_state.username)
+                    audit.user_event(st.session_state.username, f"학습 자료 등록: {title}")
+                    st.success("등록됨")
+    mat_rows = keyset_table(cur, "mat", "materials",
+                            ["title","description","coalesce(file_name, file_url)","uploaded_by","file_url"],
+                            ["제목","설명","파일","등록자"])
+    storage.download_picker("mat", [(r[0], r[4], r[2]) for r in mat_rows])
@@ -0,0 +1,27 @@
+import streamlit as st
+
+import audit
+import guard
+from pagination import keyset_table
+
+
+def render(conn, cur, repo):
+    st.header("Newbery 도서 평점")
+    with st.form("nb"):
+        book   = st.text_input("도서명")
+        rating = st.slider("평점", 1, 5, 3)
+        if st.form_submit_button("등록"):
+            book = book.strip()
+            if not book:
+                st.error("도서명을 입력하세요.")
+            else:
+                with guard.write("newbery", book, rating) as ok:
+                    if ok:
+                        repo.newbery_books.rate(book, rating, st.session_state.username)
+                        audit.user_event(st.session_state.username, f"Newbery 평점 등록: {book} ({rating})")
+                        st.success("등록됨")
+    # 도서별 평균 순위표 (평가 수가 아니라 도서 수에 비례)
+    keyset_table(cur, "nb", "newbery_ratings",
+                 ["title","avg_rating","rating_count","r5","r4","r3","r2","r1"],
+                 ["도서","평균","평가 수","★5","★4","★3","★2","★1"],
+                 order=("avg_rating","rating_count","title"))
@@ -0,0 +1,39 @@
+import streamlit as st
+
+import audit
+import calendar_view
+import guard
+import repository
+
+
+def _prefetch_month(day):
+    # 이번 달 격자는 가장 많이 보는 화면이라 캐시에 미리 채워 둔다.
+    # 세션마다 달이 바뀌었거나 새로 등록한 뒤에만 (재실행마다 다시 조회하지 않도록)
+    start, end = calendar_view.window("월", day)
+    if st.session_state.get("sched_prefetched") == start:
+        return
+    st.session_state["sched_prefetched"] = start
+    calendar_view.prefetch(("schedule", start), lambda cur: repository.Schedule(cur).between(start, end))
+
+
+def render(conn, cur, repo):
+    st.header("수업 일정")
+    with st.form("sched"):
+        cd  = st.date_input("수업일", value=calendar_view.today())
+        cont= st.text_area("내용")
+        if st.form_submit_button("등록"):
+            with guard.write("schedule", cd, cont) as ok:
+                if ok:
+                    repo.schedule.add(cd, cont)
+                    audit.user_event(st.session_state.username, f"수업 일정 등록: {cd}")
+                    st.success("등록됨")
+                    st.session_state.pop("sched_prefetched", None)
+
+    mode, start, end, anchor = calendar_view.navigator("sched_cal")
+    items = {}
+    for class_date, content in repo.schedule.between(start, end):
+        items.setdefault(class_date, []).append(content)
+    calendar_view.grid(mode, start, end, anchor, items)
+    if not items:
+        st.info("이 기간에는 수업 일정이 없습니다.")
+    _prefetch_month(calendar_view.today())
@@ -0,0 +1,19 @@
+import time
+
+import streamlit as st
+
+import search
+
+
+def render(conn, cur, repo):
+    st.header("검색")
+    q = st.text_input("검색어", placeholder="과제·학습 자료·토론 기사·채팅에서 찾기")
+    kinds = st.multiselect("검색 범위", list(search.SOURCES), default=list(search.SOURCES))
+    if q and kinds:
+        t0 = time.perf_counter()
+        results = search.search(cur, q, kinds)
+        st.caption(f"{len(results)}건 · {(time.perf_counter() - t0) * 1000:.0f} ms")
+        if results:
+            import pandas as pd  # 결과가 있을 때만
+            st.table(pd.DataFrame([r[:-1] for r in results],
+                                  columns=["구분", "제목", "내용", "작성자", "시간"]))
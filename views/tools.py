@@ -0,0 +1,21 @@
+import streamlit as st
+
+import audit
+import guard
+from pagination import keyset_table
+
+
+def render(conn, cur, repo):
+    st.header("추천 도구")
+    with st.form("tool"):
+        name = st.text_input("도구명")
+        url  = st.text_input("URL")
+        desc = st.text_area("설명")
+        if st.form_submit_button("등록"):
+            with guard.write("tools", name, url, desc) as ok:
+                if ok:
+                    repo.tools.add(name, url, desc, st.session_state.username)
+                    audit.user_event(st.session_state.username, f"추천 도구 등록: {name}")
+                    st.success("등록됨")
+    keyset_table(cur, "tool", "tools",
+                 ["name","url","description","added_by"], ["도구","URL","설명","등록자"])
@@ -0,0 +1,32 @@
+import streamlit as st
+
+import audit
+import calendar_view
+import guard
+
+
+def render(conn, cur, repo):
+    st.header("Word of the Day")
+    today = calendar_view.today()
+    with st.form("wod"):
+        wd  = st.text_input("단어")
+        defi= st.text_area("뜻")
+        dt  = st.date_input("날짜", value=today)
+        if st.form_submit_button("등록"):
+            with guard.write("word", wd, defi, dt) as ok:
+                if ok:
+                    repo.word_of_day.add(wd, defi, dt)
+                    audit.user_event(st.session_state.username, f"Word of the Day 등록: {wd}")
+                    st.success("등록됨")
+
+    # 오늘의 단어는 자정(현지 시각)까지 캐시
+    word = repo.word_of_day.on(today, ttl=calendar_view.seconds_until_midnight())
+    if word:
+        st.subheader(f"📌 오늘의 단어: {word.word}")
+        st.write(word.definition)
+    else:
+        st.info("오늘의 단어가 아직 없습니다.")
+
+    mode, start, end, anchor = calendar_view.navigator("wod_cal")
+    items = {day: [f"**{w}**: {d}"] for day, w, d in repo.word_of_day.between(start, end)}
+    calendar_view.grid(mode, start, end, anchor, items)